@@ -13,12 +13,21 @@ from datetime import datetime
 import time
 import sys
 import os
+from pathlib import Path
+
+from frame_sampler import FrameSampler
+
+# Shared pipeline metrics live with the YOLOv8 detector modules
+sys.path.insert(0, str(Path(__file__).parent.parent / 'yolov8-person-detector'))
+from embedders import encoding_version, get_embedder
+from metrics import observe, start_metrics_server, timed
+from run_control import headless_requested, install_control_signals
 
 # Configuration
 API_URL = 'http://localhost:3000'
 CAMERA_ID = 'webcam_surveillance'
 CONFIDENCE_THRESHOLD = 0.6
-PROCESS_EVERY_N_FRAMES = 3
+TARGET_ANALYSIS_FPS = 10  # Analyses per second, independent of the camera frame rate
 CHECK_DATABASE_INTERVAL = 30  # Reload persons every 30 seconds
 MATCH_COOLDOWN = 10  # seconds between alerts for same person
 
@@ -28,8 +37,11 @@ class AutoSurveillance:
         self.known_face_encodings = []
         self.known_face_names = []
         self.known_face_ids = []
+        self.embedder = get_embedder()  # the configured embedder (embedders.ENCODER_VERSION)
         self.frame_count = 0
+        self.sampler = FrameSampler(TARGET_ANALYSIS_FPS)
         self.last_match_time = {}
+        self.headless = headless_requested()  # no drawing or GUI calls (server processes)
         self.last_database_check = 0
         self.running = False
         
@@ -51,7 +63,10 @@ class AutoSurveillance:
                     if person.get('faceEncodings') and len(person['faceEncodings']) > 0:
                         for encoding_data in person['faceEncodings']:
                             encoding = encoding_data.get('encoding')
-                            if encoding and len(encoding) == 128:
+                            # Vectors from other embedders cannot be compared with ours
+                            if encoding_version(encoding_data) != self.embedder.version:
+                                continue
+                            if encoding and len(encoding) == self.embedder.size:
                                 self.known_face_encodings.append(np.array(encoding))
                                 self.known_face_names.append(person['name'])
                                 self.known_face_ids.append(str(person['_id']))
@@ -121,7 +136,8 @@ class AutoSurveillance:
             }
             
             # Send to API
-            response = requests.post(f'{API_URL}/api/recognize', json=data, timeout=5)
+            with timed('dispatch', CAMERA_ID):
+                response = requests.post(f'{API_URL}/api/recognize', json=data, timeout=5)
             
             if response.status_code == 200:
                 print(f"🚨 ALERT: {person_name} detected! (confidence: {similarity:.2%})")
@@ -135,16 +151,19 @@ class AutoSurveillance:
     def process_frame(self, frame):
         """Process frame for face detection and recognition"""
         # Resize for faster processing
-        small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        with timed('resize', CAMERA_ID):
+            small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
+            rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
         
         # Detect faces
-        face_locations = face_recognition.face_locations(rgb_small_frame, model='hog')
+        with timed('face_detection', CAMERA_ID):
+            face_locations = face_recognition.face_locations(rgb_small_frame, model='hog')
         
         if len(face_locations) == 0:
             return [], [], []
         
-        face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
+        with timed('encoding', CAMERA_ID):
+            face_encodings = self.embedder.embed(rgb_small_frame, face_locations)
         
         face_names = []
         face_similarities = []
@@ -157,16 +176,17 @@ class AutoSurveillance:
             
             if len(self.known_face_encodings) > 0:
                 # Compare with known faces
-                matches = face_recognition.compare_faces(
-                    self.known_face_encodings,
-                    face_encoding,
-                    tolerance=CONFIDENCE_THRESHOLD
-                )
-                
-                face_distances = face_recognition.face_distance(
-                    self.known_face_encodings,
-                    face_encoding
-                )
+                with timed('matching', CAMERA_ID):
+                    matches = face_recognition.compare_faces(
+                        self.known_face_encodings,
+                        face_encoding,
+                        tolerance=CONFIDENCE_THRESHOLD
+                    )
+                    
+                    face_distances = face_recognition.face_distance(
+                        self.known_face_encodings,
+                        face_encoding
+                    )
                 
                 if len(face_distances) > 0:
                     best_match_index = np.argmin(face_distances)
@@ -236,6 +256,10 @@ class AutoSurveillance:
         print(f"Match Cooldown: {MATCH_COOLDOWN}s")
         print("=" * 60)
         
+        # Per-stage latency histograms (and /control for headless runs)
+        start_metrics_server()
+        control = install_control_signals()
+        
         # Load persons from database
         if not self.load_persons_from_api():
             print("\n⚠️  Warning: Could not load persons from database")
@@ -248,30 +272,41 @@ class AutoSurveillance:
         
         print("\n✅ SURVEILLANCE ACTIVE")
         print("=" * 60)
-        print("Controls:")
-        print("  'q' - Quit")
-        print("  'r' - Reload persons from database")
-        print("  's' - Show/Hide video window")
+        if self.headless:
+            print("Headless mode (no video window):")
+            print("  SIGTERM or POST /control/stop   - Quit")
+            print("  SIGHUP or POST /control/reload  - Reload persons from database")
+        else:
+            print("Controls:")
+            print("  'q' - Quit")
+            print("  'r' - Reload persons from database")
+            print("  's' - Show/Hide video window")
         print("=" * 60)
         
         self.running = True
-        show_window = True
+        show_window = not self.headless
         
         try:
-            while self.running:
+            while self.running and not control.stopping:
+                read_start = time.perf_counter()
                 ret, frame = self.video_capture.read()
+                capture_time = time.monotonic()
                 
                 if not ret:
                     print("❌ Failed to grab frame")
-                    time.sleep(0.1)
+                    control.wait(0.1)
                     continue
+                observe('decode', CAMERA_ID, time.perf_counter() - read_start)
                 
-                # Check if we need to reload database
-                if time.time() - self.last_database_check > CHECK_DATABASE_INTERVAL:
+                # Check if we need to reload database (periodic, or requested by SIGHUP / /control/reload)
+                if control.take_reload():
+                    print("\n🔄 Reloading persons from database...")
+                    self.load_persons_from_api()
+                elif time.time() - self.last_database_check > CHECK_DATABASE_INTERVAL:
                     self.load_persons_from_api()
                 
-                # Process every Nth frame
-                if self.frame_count % PROCESS_EVERY_N_FRAMES == 0:
+                # Analyse frames at the target rate based on capture time
+                if self.sampler.should_process(capture_time):
                     face_locations, face_names, face_similarities = self.process_frame(frame)
                     
                     # Draw detections
@@ -280,6 +315,10 @@ class AutoSurveillance:
                 
                 self.frame_count += 1
                 
+                # Headless: no window or key polling between analyses
+                if self.headless:
+                    continue
+                
                 # Display frame
                 if show_window:
                     cv2.imshow('Surveillance Monitor', frame)
@@ -313,7 +352,8 @@ class AutoSurveillance:
         self.running = False
         if self.video_capture:
             self.video_capture.release()
-        cv2.destroyAllWindows()
+        if not self.headless:
+            cv2.destroyAllWindows()
         print("✅ Surveillance stopped")
 
 
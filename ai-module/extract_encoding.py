@@ -5,15 +5,22 @@ Standalone script to extract face encoding from a single image
 
 import sys
 import json
+from contextlib import redirect_stdout
 import face_recognition
 import numpy as np
+from pathlib import Path
 
-def extract_face_encoding(image_path):
+# Shared embedders live with the YOLOv8 detector modules
+sys.path.insert(0, str(Path(__file__).parent.parent / 'yolov8-person-detector'))
+from embedders import get_embedder
+
+def extract_face_encoding(image_path, encoder_version=None):
     """
     Extract face encoding from image file
     
     Args:
         image_path: Path to image file
+        encoder_version: Embedder version (default: the configured ENCODER_VERSION)
         
     Returns:
         dict: Result with encoding or error
@@ -37,7 +44,10 @@ def extract_face_encoding(image_path):
             face_locations = [max(face_locations, key=lambda loc: (loc[2] - loc[0]) * (loc[1] - loc[3]))]
         
         # Get face encodings
-        face_encodings = face_recognition.face_encodings(image, face_locations)
+        # stdout carries the JSON result; embedder fallback warnings go to stderr
+        with redirect_stdout(sys.stderr):
+            embedder = get_embedder(encoder_version)
+        face_encodings = embedder.embed(image, face_locations)
         
         if len(face_encodings) == 0:
             return {
@@ -52,6 +62,7 @@ def extract_face_encoding(image_path):
         return {
             'success': True,
             'encoding': encoding,
+            'encoderVersion': embedder.version,
             'faces_detected': len(face_locations),
             'face_location': {
                 'top': int(face_locations[0][0]),
@@ -82,7 +93,8 @@ if __name__ == '__main__':
         sys.exit(1)
     
     image_path = sys.argv[1]
-    result = extract_face_encoding(image_path)
+    encoder_version = sys.argv[2] if len(sys.argv) > 2 else None
+    result = extract_face_encoding(image_path, encoder_version)
     
     # Output result as JSON
     print(json.dumps(result))
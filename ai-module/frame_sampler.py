@@ -0,0 +1,72 @@
+"""
+Time-Based Frame Sampler
+Chooses which frames to analyse from their capture timestamps so every
+camera gets a predictable analysis rate regardless of its stream FPS
+"""
+
+import time
+
+
+class FrameSampler:
+    """Selects frames at a target analysis rate using frame timestamps"""
+
+    def __init__(self, target_fps):
+        self.target_fps = 0.0
+        self.interval = 0.0
+        self.next_due = None
+        self.set_rate(target_fps)
+
+    def set_rate(self, target_fps):
+        """Change the analysis rate (0 or None analyses every frame)"""
+        self.target_fps = float(target_fps or 0)
+        self.interval = 1.0 / self.target_fps if self.target_fps > 0 else 0.0
+
+    def should_process(self, timestamp=None):
+        """
+        Decide whether the frame captured at `timestamp` should be analysed
+
+        Args:
+            timestamp: Monotonic capture time in seconds (defaults to now)
+
+        Returns:
+            True if the frame falls on or after the next analysis slot
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        if self.interval <= 0:
+            return True
+
+        if self.next_due is None or timestamp >= self.next_due:
+            if self.next_due is None or timestamp - self.next_due >= self.interval:
+                # First frame or we fell behind: re-anchor instead of bursting to catch up
+                self.next_due = timestamp + self.interval
+            else:
+                # Stay on the fixed grid so the long-run rate matches the target exactly
+                self.next_due += self.interval
+            return True
+
+        return False
+
+
+def analysis_fps_for(camera_config, default_fps, budget=None, camera_count=1):
+    """
+    Resolve the target analysis rate for a camera
+
+    Uses the camera's `analysisFps` if set, otherwise an equal share of the
+    node-wide `budget` (analyses per second), otherwise `default_fps`. The
+    result never exceeds the camera's stream `fps`.
+    """
+    target = camera_config.get('analysisFps')
+
+    if not target:
+        if budget:
+            target = budget / max(camera_count, 1)
+        else:
+            target = default_fps
+
+    stream_fps = camera_config.get('fps')
+    if stream_fps:
+        target = min(target, stream_fps)
+
+    return target
@@ -0,0 +1,77 @@
+"""
+Camera Heartbeat Aggregator
+Collects the status of every camera processor on this node and reports
+them to the backend in a single bulk request per interval
+"""
+
+import requests
+import threading
+
+# Configuration
+HEARTBEAT_INTERVAL = 10  # seconds between bulk status reports
+
+
+class HeartbeatAggregator:
+    """Batches per-camera status into one PATCH /api/cameras/status/bulk call"""
+
+    def __init__(self, backend_url, interval=HEARTBEAT_INTERVAL):
+        self.backend_url = backend_url
+        self.interval = interval
+        self.processors = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self._stop_event = threading.Event()
+
+    def register(self, processor):
+        """Include a camera processor in the heartbeat"""
+        with self.lock:
+            self.processors[processor.camera_id] = processor
+
+    def unregister(self, processor):
+        """Stop reporting a camera processor"""
+        with self.lock:
+            self.processors.pop(processor.camera_id, None)
+
+    def collect(self):
+        """Gather heartbeat entries from all registered processors"""
+        with self.lock:
+            processors = list(self.processors.values())
+        return [processor.heartbeat() for processor in processors]
+
+    def send(self):
+        """Send one bulk status report; returns True on success"""
+        cameras = self.collect()
+        if not cameras:
+            return True
+
+        try:
+            response = requests.patch(
+                f'{self.backend_url}/api/cameras/status/bulk',
+                json={'cameras': cameras},
+                timeout=5
+            )
+            if response.status_code != 200:
+                print(f"⚠️  Heartbeat for {len(cameras)} cameras failed: HTTP {response.status_code}")
+                return False
+            return True
+        except Exception as e:
+            print(f"⚠️  Heartbeat for {len(cameras)} cameras failed: {e}")
+            return False
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.send()
+
+    def start(self):
+        """Start the background reporting thread"""
+        if self.thread is None:
+            self._stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name='heartbeat', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop the reporting thread"""
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
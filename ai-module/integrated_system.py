@@ -11,6 +11,8 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '
 import cv2
 import logging
 from main import PersonDetectionAI
+from metrics import FrameTrace, observe, start_metrics_server
+from run_control import headless_requested, install_control_signals
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'camera-module'))
 from camera_service import CameraService
 
@@ -28,6 +30,7 @@ class IntegratedSystem:
         self.camera_service = CameraService()
         self.ai_module = PersonDetectionAI()
         self.running = False
+        self.headless = headless_requested()  # no drawing or GUI calls (server processes)
     
     def start(self):
         """Start the integrated system"""
@@ -39,6 +42,7 @@ class IntegratedSystem:
             return False
         
         self.camera_service.start()
+        start_metrics_server()
         self.running = True
         
         logger.info("Integrated system started successfully")
@@ -56,29 +60,39 @@ class IntegratedSystem:
         if not self.start():
             return
         
+        # Matching happens in the backend, so there is no local database to reload
+        control = install_control_signals(reload=False)
+        
         try:
-            logger.info("Processing started. Press 'q' to quit.")
+            if self.headless:
+                logger.info("Processing started headless. Stop with SIGTERM or POST /control/stop.")
+            else:
+                logger.info("Processing started. Press 'q' to quit.")
             
-            while self.running:
+            while self.running and not control.stopping:
                 # Get frames from all cameras
                 frames = self.camera_service.get_all_frames()
                 
                 if not frames:
+                    control.wait(0.01)
                     continue
                 
                 # Process each camera frame
                 for camera_id, frame_data in frames.items():
                     frame = frame_data['frame']
                     timestamp = frame_data['timestamp']
+                    observe('decode', camera_id, frame_data['read_seconds'])
+                    trace = FrameTrace(frame_data['captured_at'], frame_data['read_seconds'])
                     
                     # Process frame with AI module
-                    results = self.ai_module.process_frame(frame, camera_id)
-                    
-                    # Draw results on frame
-                    annotated_frame = self.ai_module.draw_results(frame, results)
+                    results = self.ai_module.process_frame(frame, camera_id, trace)
                     
-                    # Display frame
-                    cv2.imshow(f'Detection - {camera_id}', annotated_frame)
+                    if not self.headless:
+                        # Draw results on frame
+                        annotated_frame = self.ai_module.draw_results(frame, results)
+                        
+                        # Display frame
+                        cv2.imshow(f'Detection - {camera_id}', annotated_frame)
                     
                     # Log matches
                     if results['matches']:
@@ -89,7 +103,7 @@ class IntegratedSystem:
                             )
                 
                 # Check for quit key
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                if not self.headless and cv2.waitKey(1) & 0xFF == ord('q'):
                     break
         
         except KeyboardInterrupt:
@@ -97,7 +111,8 @@ class IntegratedSystem:
         
         finally:
             self.stop()
-            cv2.destroyAllWindows()
+            if not self.headless:
+                cv2.destroyAllWindows()
 
 
 def main():
@@ -0,0 +1,124 @@
+"""
+Adaptive Load Shedding Controller
+Watches per-camera processing latency and backlog and trades analysis rate,
+detection resolution and the face stage for bounded detection latency
+"""
+
+import time
+
+# Configuration
+MAX_ANALYSIS_LATENCY = 1.0  # seconds - worst-case processing time allowed per analysed frame
+MAX_BACKLOG_FRAMES = 15  # buffered frames tolerated before shedding load
+LATENCY_SMOOTHING = 0.3  # weight of the newest latency sample
+RESTORE_RATIO = 0.6  # restore quality once latency falls below this share of the budget
+DEGRADE_HOLD = 2.0  # seconds between successive degrade steps
+RESTORE_HOLD = 10.0  # seconds of headroom required before each restore step
+
+# Quality ladder from full quality (index 0) down to maximum shedding.
+# resize_scale is applied to the processor's detection width (RESIZE_FRAME_WIDTH).
+QUALITY_LEVELS = [
+    {'analysis_scale': 1.0, 'resize_scale': 1.0, 'face_stage': True},
+    {'analysis_scale': 0.75, 'resize_scale': 1.0, 'face_stage': True},
+    {'analysis_scale': 0.5, 'resize_scale': 0.8, 'face_stage': True},
+    {'analysis_scale': 0.5, 'resize_scale': 0.65, 'face_stage': True},
+    {'analysis_scale': 0.25, 'resize_scale': 0.5, 'face_stage': True},
+    {'analysis_scale': 0.25, 'resize_scale': 0.5, 'face_stage': False},
+]
+
+
+class LoadController:
+    """Feedback controller that steps a camera up and down the quality ladder"""
+
+    def __init__(self, analysis_fps, levels=QUALITY_LEVELS, max_level=None, min_level=0):
+        """
+        Args:
+            analysis_fps: Target analysis rate at full quality
+            levels: Quality ladder, best first
+            max_level: Deepest level the controller may shed to (default: last)
+            min_level: Best level the controller may restore to
+        """
+        self.levels = levels
+        self.min_level = min_level
+        self.max_level = len(levels) - 1 if max_level is None else max_level
+        self.level = min_level
+        self.analysis_fps = analysis_fps
+        self.latency = 0.0
+        self.last_change = 0.0
+        self.headroom_since = None
+
+    @property
+    def settings(self):
+        """Settings of the current quality level"""
+        return self.levels[self.level]
+
+    def effective_fps(self):
+        """Analysis rate after shedding"""
+        return self.analysis_fps * self.settings['analysis_scale']
+
+    def latency_budget(self):
+        """Processing time per analysed frame that keeps up with the stream"""
+        fps = self.effective_fps()
+        interval = 1.0 / fps if fps > 0 else MAX_ANALYSIS_LATENCY
+        return min(interval, MAX_ANALYSIS_LATENCY)
+
+    def set_bounds(self, min_level=0, max_level=None):
+        """
+        Restrict the levels the controller may use
+
+        Returns:
+            True if the current level had to move to respect the new bounds
+        """
+        self.min_level = min_level
+        self.max_level = len(self.levels) - 1 if max_level is None else max_level
+
+        level = min(max(self.level, self.min_level), self.max_level)
+        if level != self.level:
+            self.level = level
+            return True
+        return False
+
+    def observe(self, latency, backlog=0, now=None):
+        """
+        Feed one processing measurement
+
+        Args:
+            latency: Seconds spent analysing the last frame
+            backlog: Stale frames found buffered behind it (overload above MAX_BACKLOG_FRAMES)
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            True if the quality level changed
+        """
+        if now is None:
+            now = time.monotonic()
+
+        if self.latency == 0:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+
+        budget = self.latency_budget()
+        overloaded = self.latency > budget or backlog > MAX_BACKLOG_FRAMES
+
+        if overloaded:
+            self.headroom_since = None
+            if self.level < self.max_level and now - self.last_change >= DEGRADE_HOLD:
+                self.level += 1
+                self.last_change = now
+                return True
+            return False
+
+        # Headroom is judged on latency alone: a few frames always queue up behind
+        # an analysis slower than the stream's frame interval and are skipped anyway
+        if self.latency < budget * RESTORE_RATIO:
+            if self.headroom_since is None:
+                self.headroom_since = now
+            if self.level > self.min_level and now - self.headroom_since >= RESTORE_HOLD:
+                self.level -= 1
+                self.last_change = now
+                self.headroom_since = now
+                return True
+        else:
+            self.headroom_since = None
+
+        return False
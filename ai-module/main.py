@@ -11,9 +11,21 @@ import numpy as np
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import time
+import sys
+from pathlib import Path
 import face_recognition
 from ultralytics import YOLO
 
+# Shared pipeline metrics, annotation and run control live with the YOLOv8 detector modules
+sys.path.insert(0, str(Path(__file__).parent.parent / 'yolov8-person-detector'))
+from annotation import Annotations
+from metrics import FrameTrace, observe, observe_alert_latency, start_metrics_server, timed
+from run_control import headless_requested, install_control_signals
+
+# Replay sources (video files and image sequences as cameras) live in the camera module
+sys.path.insert(0, str(Path(__file__).parent.parent / 'camera-module'))
+from replay_source import open_capture
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -54,7 +66,8 @@ class PersonDetectionAI:
                 "confidence_threshold": 0.6,
                 "yolo_model": "yolov8n.pt",
                 "face_detection_model": "hog",
-                "min_face_size": 50
+                "min_face_size": 50,
+                "camera_source": 0
             }
     
     def _initialize_models(self):
@@ -70,12 +83,15 @@ class PersonDetectionAI:
             logger.error(f"Error initializing models: {str(e)}")
             raise
     
-    def detect_persons(self, frame: np.ndarray) -> List[Dict]:
+    def detect_persons(self, frame: np.ndarray, camera_id: str = "camera_0",
+                       trace: Optional[FrameTrace] = None) -> List[Dict]:
         """
         Detect persons in a frame using YOLOv8
         
         Args:
             frame: Input image frame
+            camera_id: Camera label for the latency metrics
+            trace: FrameTrace of the frame, receives the stage timing
             
         Returns:
             List of detected person bounding boxes with confidence scores
@@ -86,7 +102,8 @@ class PersonDetectionAI:
         
         try:
             # Run inference
-            results = self.yolo_model(frame, verbose=False)
+            with timed('yolo', camera_id, trace):
+                results = self.yolo_model(frame, verbose=False)
             
             persons = []
             for result in results:
@@ -111,13 +128,17 @@ class PersonDetectionAI:
             logger.error(f"Error detecting persons: {str(e)}")
             return []
     
-    def extract_face_encodings(self, frame: np.ndarray, person_bbox: List[int]) -> Optional[List[float]]:
+    def extract_face_encodings(self, frame: np.ndarray, person_bbox: List[int],
+                               camera_id: str = "camera_0",
+                               trace: Optional[FrameTrace] = None) -> Optional[List[float]]:
         """
         Extract face encoding from a person's bounding box
         
         Args:
             frame: Input image frame
             person_bbox: Bounding box [x1, y1, x2, y2] of detected person
+            camera_id: Camera label for the latency metrics
+            trace: FrameTrace of the frame, receives the stage timings
             
         Returns:
             Face encoding as list of floats, or None if no face detected
@@ -136,17 +157,19 @@ class PersonDetectionAI:
             rgb_img = cv2.cvtColor(person_img, cv2.COLOR_BGR2RGB)
             
             # Detect face locations
-            face_locations = face_recognition.face_locations(
-                rgb_img,
-                model=self.face_detection_model
-            )
+            with timed('face_detection', camera_id, trace):
+                face_locations = face_recognition.face_locations(
+                    rgb_img,
+                    model=self.face_detection_model
+                )
             
             if not face_locations:
                 logger.debug("No face detected in person bounding box")
                 return None
             
             # Get face encoding for the first detected face
-            face_encodings = face_recognition.face_encodings(rgb_img, face_locations)
+            with timed('encoding', camera_id, trace):
+                face_encodings = face_recognition.face_encodings(rgb_img, face_locations)
             
             if face_encodings:
                 # Convert to list for JSON serialization
@@ -159,13 +182,15 @@ class PersonDetectionAI:
             logger.error(f"Error extracting face encoding: {str(e)}")
             return None
     
-    def send_to_backend(self, encoding: List[float], metadata: Dict) -> Optional[Dict]:
+    def send_to_backend(self, encoding: List[float], metadata: Dict,
+                        trace: Optional[FrameTrace] = None) -> Optional[Dict]:
         """
         Send face encoding to backend API for identification
         
         Args:
             encoding: Face encoding vector
             metadata: Additional metadata (camera_id, timestamp, etc.)
+            trace: FrameTrace of the frame; its timings let the backend store capture-to-report latency
             
         Returns:
             Response from backend API or None on error
@@ -177,12 +202,16 @@ class PersonDetectionAI:
                 'encoding': encoding,
                 'metadata': metadata
             }
+            if trace is not None:
+                payload['timings'] = trace.to_payload()
             
-            response = requests.post(
-                url,
-                json=payload,
-                timeout=5
-            )
+            # Identification happens in the backend, so this covers matching too
+            with timed('dispatch', metadata.get('camera_id', 'camera_0')):
+                response = requests.post(
+                    url,
+                    json=payload,
+                    timeout=5
+                )
             
             if response.status_code == 200:
                 return response.json()
@@ -194,18 +223,21 @@ class PersonDetectionAI:
             logger.error(f"Error sending to backend: {str(e)}")
             return None
     
-    def process_frame(self, frame: np.ndarray, camera_id: str = "camera_0") -> Dict:
+    def process_frame(self, frame: np.ndarray, camera_id: str = "camera_0",
+                      trace: Optional[FrameTrace] = None) -> Dict:
         """
         Process a single frame: detect persons, extract faces, send to backend
         
         Args:
             frame: Input video frame
             camera_id: Identifier for the camera source
+            trace: FrameTrace with the frame's capture time (default: captured now)
             
         Returns:
             Processing results including detections and matches
         """
-        timestamp = datetime.now().isoformat()
+        trace = trace or FrameTrace()
+        timestamp = datetime.fromtimestamp(trace.captured_wall).isoformat()
         
         results = {
             'camera_id': camera_id,
@@ -216,7 +248,7 @@ class PersonDetectionAI:
         }
         
         # Detect persons
-        persons = self.detect_persons(frame)
+        persons = self.detect_persons(frame, camera_id, trace)
         results['persons_detected'] = len(persons)
         
         if not persons:
@@ -228,7 +260,7 @@ class PersonDetectionAI:
             confidence = person['confidence']
             
             # Extract face encoding
-            encoding = self.extract_face_encodings(frame, bbox)
+            encoding = self.extract_face_encodings(frame, bbox, camera_id, trace)
             
             if encoding is not None:
                 results['faces_extracted'] += 1
@@ -241,9 +273,10 @@ class PersonDetectionAI:
                     'detection_confidence': confidence
                 }
                 
-                response = self.send_to_backend(encoding, metadata)
+                response = self.send_to_backend(encoding, metadata, trace)
                 
                 if response and response.get('match_found'):
+                    observe_alert_latency(trace, camera_id)
                     results['matches'].append({
                         'person_id': response.get('person_id'),
                         'name': response.get('name'),
@@ -257,53 +290,28 @@ class PersonDetectionAI:
     
     def draw_results(self, frame: np.ndarray, results: Dict) -> np.ndarray:
         """
-        Draw detection results on frame
+        Draw detection results on frame (in place, the frame is not copied)
         
         Args:
             frame: Input frame
             results: Processing results from process_frame
             
         Returns:
-            Frame with drawn annotations
+            The same frame with drawn annotations
         """
-        annotated_frame = frame.copy()
+        annotations = Annotations()
         
         # Draw matches
         for match in results.get('matches', []):
-            bbox = match['bbox']
-            name = match['name']
-            similarity = match['similarity']
-            
-            x1, y1, x2, y2 = bbox
-            
-            # Draw bounding box
-            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            
-            # Draw label
-            label = f"{name} ({similarity:.2f})"
-            cv2.putText(
-                annotated_frame,
-                label,
-                (x1, y1 - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.6,
-                (0, 255, 0),
-                2
-            )
+            x1, y1, x2, y2 = match['bbox']
+            annotations.box((x1, y1, x2, y2), (0, 255, 0), 2)
+            annotations.text(f"{match['name']} ({match['similarity']:.2f})", (x1, y1 - 10), 0.6, (0, 255, 0), 2)
         
         # Draw info
         info_text = f"Persons: {results['persons_detected']} | Faces: {results['faces_extracted']} | Matches: {len(results['matches'])}"
-        cv2.putText(
-            annotated_frame,
-            info_text,
-            (10, 30),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.7,
-            (255, 255, 255),
-            2
-        )
+        annotations.text(info_text, (10, 30), 0.7, (255, 255, 255), 2)
         
-        return annotated_frame
+        return annotations.render(frame)
 
 
 def main():
@@ -312,26 +320,40 @@ def main():
     
     # Initialize AI module
     ai_module = PersonDetectionAI()
+    start_metrics_server()
+    # Matching happens in the backend, so there is no local database to reload
+    control = install_control_signals(reload=False)
+    headless = headless_requested()  # no drawing or GUI calls (server processes)
     
-    # Initialize camera
-    cap = cv2.VideoCapture(0)
+    # Initialize camera (device index, stream URL or replay: source)
+    cap = open_capture(ai_module.config.get('camera_source', 0))
     
     if not cap.isOpened():
         logger.error("Failed to open camera")
         return
     
-    logger.info("AI module running. Press 'q' to quit.")
+    if headless:
+        logger.info("AI module running headless. Stop with SIGTERM or POST /control/stop.")
+    else:
+        logger.info("AI module running. Press 'q' to quit.")
     
     try:
-        while True:
+        while not control.stopping:
+            read_start = time.perf_counter()
             ret, frame = cap.read()
             
             if not ret:
                 logger.warning("Failed to read frame")
                 break
+            read_seconds = time.perf_counter() - read_start
+            observe('decode', 'camera_0', read_seconds)
             
             # Process frame
-            results = ai_module.process_frame(frame, camera_id="camera_0")
+            results = ai_module.process_frame(frame, camera_id="camera_0", trace=FrameTrace(read_seconds=read_seconds))
+            
+            # Headless: no annotated copy, window or key polling
+            if headless:
+                continue
             
             # Draw results
             annotated_frame = ai_module.draw_results(frame, results)
@@ -348,7 +370,8 @@ def main():
     
     finally:
         cap.release()
-        cv2.destroyAllWindows()
+        if not headless:
+            cv2.destroyAllWindows()
         logger.info("AI module terminated")
 
 
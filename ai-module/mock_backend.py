@@ -0,0 +1,444 @@
+"""
+Mock Backend
+Stand-in for the Node backend with a synthetic gallery, configurable latency
+and error rates, recording every alert it receives. Used with replay camera
+sources for reproducible end-to-end throughput and latency runs, fully offline.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+# Add yolov8-person-detector to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'yolov8-person-detector'))
+
+from embedders import ENCODER_VERSION, encoding_version
+from gallery import best_matches
+
+# Configuration
+MOCK_PORT = 3000  # the surveillance scripts expect the backend here
+MOCK_HOST = '127.0.0.1'
+GALLERY_SIZE = 1000  # missing persons served by /api/persons
+EMBEDDING_SIZE = 128
+MATCH_THRESHOLD = 0.6  # similarity (1 - distance), as FACE_MATCH_THRESHOLD in the backend
+CAMERA_START_STAGGER = 250  # frames between the {start} offsets of generated cameras
+MAX_RECORDED_ALERTS = 100000  # kept in memory for /mock/alerts (all go to --alerts-file)
+
+RECOGNITION_PATHS = ('/api/recognition', '/api/recognize')
+CAMERA_STATUS_PATH = re.compile(r'^/api/cameras/([^/]+)/status$')
+
+
+def int_param(query, name, default):
+    """Integer query parameter; missing or malformed values fall back to the default"""
+    try:
+        return int(query.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def object_id(index):
+    """24-hex id shaped like a MongoDB _id"""
+    return f"{index:024x}"
+
+
+def synthetic_persons(size, version=ENCODER_VERSION, seed=0):
+    """Missing persons with one random encoding each, spread like dlib vectors"""
+    rng = np.random.default_rng(seed)
+    encodings = rng.standard_normal((size, EMBEDDING_SIZE)) * 0.1
+    priorities = ('low', 'medium', 'high', 'critical')
+    return [
+        {
+            '_id': object_id(index + 1),
+            'name': f"Synthetic Person {index + 1}",
+            'status': 'missing',
+            'priority': priorities[index % len(priorities)],
+            'isActive': True,
+            'faceEncodings': [{'encoding': encoding.tolist(), 'encoderVersion': version}]
+        }
+        for index, encoding in enumerate(encodings)
+    ]
+
+
+def generated_cameras(count, stream_url):
+    """
+    Active cameras for /api/cameras/active/list
+
+    stream_url may use {index}, {camera_id} and {start} (index * CAMERA_START_STAGGER),
+    e.g. replay:/data/lobby.mp4?start={start}
+    """
+    cameras = []
+    for index in range(count):
+        camera_id = f"mock_cam_{index + 1:02d}"
+        cameras.append({
+            '_id': object_id(1_000_000 + index),
+            'cameraId': camera_id,
+            'name': f"Mock Camera {index + 1}",
+            'location': 'Load Test',
+            'streamUrl': stream_url.format(index=index, camera_id=camera_id, start=index * CAMERA_START_STAGGER),
+            'resolution': {'width': 1280, 'height': 720},
+            'fps': 30,
+            'importance': 'normal'
+        })
+    return cameras
+
+
+class Slowdown:
+    """Extra latency during a window of the run: START:DURATION:LATENCY_MS (seconds, seconds, ms)"""
+
+    def __init__(self, spec):
+        try:
+            start, duration, latency_ms = (float(part) for part in spec.split(':'))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"slowdown must be START:DURATION:LATENCY_MS, got '{spec}'")
+        self.start = start
+        self.end = start + duration
+        self.latency = latency_ms / 1000
+
+    def extra(self, elapsed):
+        return self.latency if self.start <= elapsed < self.end else 0.0
+
+
+class MockBackend:
+    """State behind the mock endpoints: gallery, cameras, fault settings and recorded alerts"""
+
+    def __init__(self, persons, cameras, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 slowdowns=(), threshold=MATCH_THRESHOLD, alerts_file=None, seed=0):
+        self.persons = persons
+        self.cameras = {camera['cameraId']: camera for camera in cameras}
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.slowdowns = list(slowdowns)
+        self.threshold = threshold
+        self.alerts = []
+        self.alerts_file = open(alerts_file, 'a') if alerts_file else None
+        self.requests = {}  # endpoint -> count
+        self.errors = {}  # endpoint -> injected errors
+        self.started_at = time.monotonic()
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.galleries = self._build_galleries(persons)
+
+    @staticmethod
+    def _build_galleries(persons):
+        """Per encoder version: (matrix, person of each row), as the backend compares versions separately"""
+        rows = {}
+        for person in persons:
+            for enc_data in person.get('faceEncodings', []):
+                encoding = enc_data.get('encoding')
+                if encoding:
+                    rows.setdefault(encoding_version(enc_data), []).append((encoding, person))
+        return {
+            version: (np.array([encoding for encoding, _ in entries], dtype=np.float64),
+                      [person for _, person in entries])
+            for version, entries in rows.items()
+        }
+
+    def configure(self, settings):
+        """Change fault settings mid-run (POST /mock/config)"""
+        with self.lock:
+            if 'latency_ms' in settings:
+                self.latency = float(settings['latency_ms']) / 1000
+            if 'jitter_ms' in settings:
+                self.jitter = float(settings['jitter_ms']) / 1000
+            if 'error_rate' in settings:
+                self.error_rate = float(settings['error_rate'])
+            return self.settings()
+
+    def settings(self):
+        return {
+            'latency_ms': self.latency * 1000,
+            'jitter_ms': self.jitter * 1000,
+            'error_rate': self.error_rate,
+            'slowdowns': [
+                {'start': s.start, 'end': s.end, 'latency_ms': s.latency * 1000} for s in self.slowdowns
+            ]
+        }
+
+    def delay(self):
+        """Latency to apply to the current request"""
+        with self.lock:
+            elapsed = time.monotonic() - self.started_at
+            delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+            delay += sum(slowdown.extra(elapsed) for slowdown in self.slowdowns)
+            return max(0.0, delay)
+
+    def admit(self, endpoint):
+        """Count a request; False if it should fail with an injected error"""
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+                return False
+            return True
+
+    def list_persons(self, query):
+        status = query.get('status')
+        persons = [p for p in self.persons if not status or p.get('status') == status]
+        limit = max(1, int_param(query, 'limit', 20))
+        page = max(1, int_param(query, 'page', 1))
+        return {
+            'persons': persons[(page - 1) * limit:page * limit],
+            'totalPages': -(-len(persons) // limit),
+            'currentPage': page,
+            'total': len(persons)
+        }
+
+    def recognize(self, endpoint, body, received_at):
+        """Match an encoding like POST /api/recognition and record the alert"""
+        encoding = body.get('encoding')
+        if not isinstance(encoding, list) or not encoding:
+            return 400, {'error': 'Valid face encoding vector is required'}
+
+        version = body.get('encoderVersion') or ENCODER_VERSION
+        metadata = body.get('metadata') or {}
+        known, owners = self.galleries.get(version, (None, []))
+
+        match, similarity = None, 0.0
+        if known is not None and len(encoding) == known.shape[1]:
+            indices, distances = best_matches(known, [encoding])
+            similarity = max(0.0, 1.0 - min(float(distances[0]), 1.0))
+            if similarity >= self.threshold:
+                match = owners[int(indices[0])]
+
+        alert = {
+            'receivedAt': datetime.now().isoformat(),
+            'elapsed': round(time.monotonic() - self.started_at, 4),
+            'endpoint': endpoint,
+            'encoderVersion': version,
+            'metadata': metadata,
+            'match_found': match is not None,
+            'matchedPersonId': match['_id'] if match else None,
+            'similarity': round(similarity, 4)
+        }
+        timings = body.get('timings') or {}
+        if isinstance(timings.get('captureToDispatchMs'), (int, float)):
+            # As the backend stores it: worker time until dispatch plus time spent here (with injected latency)
+            backend_ms = (time.monotonic() - received_at) * 1000
+            alert['latency'] = {
+                **timings,
+                'backendMs': round(backend_ms, 2),
+                'captureToReportMs': round(timings['captureToDispatchMs'] + backend_ms, 2)
+            }
+        with self.lock:
+            alert['id'] = len(self.alerts) + 1
+            if len(self.alerts) < MAX_RECORDED_ALERTS:
+                self.alerts.append(alert)
+            if self.alerts_file:
+                self.alerts_file.write(json.dumps(alert) + '\n')
+                self.alerts_file.flush()
+
+        if match is None:
+            return 200, {'match_found': False, 'message': 'No matching person found'}
+        return 200, {
+            'match_found': True,
+            'person_id': match['_id'],
+            'name': match['name'],
+            'similarity': similarity,
+            'status': match.get('status'),
+            'priority': match.get('priority'),
+            'report_id': object_id(2_000_000 + alert['id'])
+        }
+
+    def update_camera(self, camera_id, entry):
+        """Apply a status/heartbeat entry as PATCH /api/cameras/:id/status does; None if unknown"""
+        with self.lock:
+            camera = self.cameras.get(camera_id)
+            if camera is None:
+                return None
+            for key in ('status', 'health'):
+                if entry.get(key):
+                    camera[key] = entry[key]
+            if isinstance(entry.get('online'), bool):
+                camera['online'] = entry['online']
+            if entry.get('lastOnline'):
+                camera['lastOnline'] = entry['lastOnline']
+            elif entry.get('online') is not False:
+                camera['lastOnline'] = datetime.now().isoformat()
+            return camera
+
+    def active_cameras(self):
+        with self.lock:
+            cameras = [dict(c) for c in self.cameras.values() if c.get('status', 'active') == 'active']
+        return {'cameras': cameras, 'total': len(cameras)}
+
+    def stats(self):
+        with self.lock:
+            matched = sum(alert['match_found'] for alert in self.alerts)
+            latencies = [alert['latency']['captureToReportMs'] for alert in self.alerts if 'latency' in alert]
+            return {
+                'uptime': round(time.monotonic() - self.started_at, 1),
+                'persons': len(self.persons),
+                'cameras': len(self.cameras),
+                'requests': dict(self.requests),
+                'injected_errors': dict(self.errors),
+                'alerts': len(self.alerts),
+                'matched_alerts': matched,
+                'capture_to_report_ms': {
+                    'p50': round(float(np.percentile(latencies, 50)), 1),
+                    'p95': round(float(np.percentile(latencies, 95)), 1),
+                    'max': round(max(latencies), 1)
+                } if latencies else None,
+                'settings': self.settings()
+            }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    backend = None  # set by serve()
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    def _handle(self, method):
+        received_at = time.monotonic()
+        url = urlparse(self.path)
+        path = url.path.rstrip('/') or '/'
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        body = self._body() if method in ('POST', 'PATCH') else {}
+        backend = self.backend
+
+        # Control endpoints are never delayed or failed
+        if path.startswith('/mock/') or path == '/health':
+            if path == '/health':
+                return self._send(200, {'status': 'OK', 'mock': True})
+            if path == '/mock/stats' and method == 'GET':
+                return self._send(200, backend.stats())
+            if path == '/mock/alerts' and method == 'GET':
+                since = int_param(query, 'since', 0)
+                with backend.lock:
+                    alerts = [alert for alert in backend.alerts if alert['id'] > since]
+                return self._send(200, {'alerts': alerts, 'total': len(alerts)})
+            if path == '/mock/config' and method == 'POST' and isinstance(body, dict):
+                return self._send(200, backend.configure(body))
+            return self._send(404, {'error': 'Not found'})
+
+        endpoint = f"{method} {CAMERA_STATUS_PATH.sub('/api/cameras/:id/status', path)}"
+        time.sleep(backend.delay())
+        if not backend.admit(endpoint):
+            return self._send(500, {'error': 'Injected mock backend error'})
+        if body is None:
+            return self._send(400, {'error': 'Invalid JSON body'})
+
+        if method == 'GET' and path == '/api/persons':
+            return self._send(200, backend.list_persons(query))
+        if method == 'POST' and path in RECOGNITION_PATHS:
+            return self._send(*backend.recognize(path, body, received_at))
+        if method == 'GET' and path == '/api/cameras/active/list':
+            return self._send(200, backend.active_cameras())
+        if method == 'PATCH' and path == '/api/cameras/status/bulk':
+            entries = [entry for entry in body.get('cameras') or [] if isinstance(entry, dict) and entry.get('cameraId')]
+            if not entries:
+                return self._send(400, {'error': 'Each entry requires a cameraId'})
+            matched = sum(backend.update_camera(entry['cameraId'], entry) is not None for entry in entries)
+            return self._send(200, {'message': 'Camera statuses updated', 'total': len(entries),
+                                    'matched': matched, 'modified': matched})
+        status_path = CAMERA_STATUS_PATH.match(path)
+        if method == 'PATCH' and status_path:
+            camera = backend.update_camera(status_path.group(1), body)
+            if camera is None:
+                return self._send(404, {'error': 'Camera not found'})
+            return self._send(200, {'message': 'Camera status updated', 'camera': camera})
+
+        self._send(404, {'error': 'Not found'})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def log_message(self, format, *args):
+        pass  # Every frame's alerts and heartbeats would flood the console
+
+
+def serve(backend, port=MOCK_PORT, host=MOCK_HOST):
+    """Serve the mock endpoints until interrupted"""
+    MockHandler.backend = backend
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    print(f"🧪 Mock backend at http://{host}:{port} "
+          f"({len(backend.persons)} persons, {len(backend.cameras)} cameras)")
+    print(f"   Latency {backend.latency * 1000:g}±{backend.jitter * 1000:g} ms, "
+          f"error rate {backend.error_rate:.1%}, {len(backend.slowdowns)} slowdown window(s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        stats = backend.stats()
+        print(f"\n📊 {sum(stats['requests'].values())} requests, {stats['alerts']} alerts "
+              f"({stats['matched_alerts']} matched), {sum(stats['injected_errors'].values())} injected errors")
+        if backend.alerts_file:
+            backend.alerts_file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline stand-in for the backend API')
+    parser.add_argument('--port', type=int, default=MOCK_PORT)
+    parser.add_argument('--host', default=MOCK_HOST)
+    parser.add_argument('--gallery-size', type=int, default=GALLERY_SIZE, help='Synthetic missing persons')
+    parser.add_argument('--persons-file', help='Saved /api/persons response whose persons are served '
+                                               'before the synthetic ones (real faces that can match)')
+    parser.add_argument('--encoder-version', default=ENCODER_VERSION, help='Version tag of synthetic encodings')
+    parser.add_argument('--cameras', type=int, default=0, help='Generated active cameras')
+    parser.add_argument('--stream-url', default='replay:sample.mp4?start={start}',
+                        help='streamUrl template of generated cameras ({index}, {camera_id}, {start})')
+    parser.add_argument('--cameras-file', help='JSON list of camera configurations to serve')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Added to every API response')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Uniform +- variation of the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of API requests answered with 500')
+    parser.add_argument('--slowdown', type=Slowdown, action='append', default=[], metavar='START:DURATION:MS',
+                        help='Extra latency during part of the run, e.g. 60:30:2000 (repeatable)')
+    parser.add_argument('--threshold', type=float, default=MATCH_THRESHOLD)
+    parser.add_argument('--alerts-file', help='Append every received alert to this JSONL file')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    persons = []
+    if args.persons_file:
+        with open(args.persons_file) as f:
+            saved = json.load(f)
+        persons = saved.get('persons', []) if isinstance(saved, dict) else saved
+    persons += synthetic_persons(args.gallery_size, args.encoder_version, args.seed)
+
+    cameras = generated_cameras(args.cameras, args.stream_url)
+    if args.cameras_file:
+        with open(args.cameras_file) as f:
+            cameras += [dict(camera, status=camera.get('status', 'active')) for camera in json.load(f)]
+
+    backend = MockBackend(persons, cameras, args.latency_ms, args.jitter_ms, args.error_rate,
+                          args.slowdown, args.threshold, args.alerts_file, args.seed)
+    serve(backend, args.port, args.host)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,10 +14,29 @@ from datetime import datetime
 from pathlib import Path
 import sys
 
+from frame_sampler import FrameSampler, analysis_fps_for
+from heartbeat import HeartbeatAggregator
+from load_controller import LoadController
+from priority_scheduler import PriorityScheduler
+from stream_health import StreamHealthManager
+
 # Add yolov8-person-detector to path
 yolo_path = Path(__file__).parent.parent / 'yolov8-person-detector'
 sys.path.insert(0, str(yolo_path))
 
+from encoding_cache import EncodingCache, face_hashes
+from embedders import encoding_version
+from encoding_pool import LocalFaceEncoder, create_face_encoder
+from face_detectors import detector_stats
+from face_quality import FACE_SELECTION, FaceQualityGate, select_faces
+from face_stage import find_faces_in_frame
+from frame_context import FrameContext
+from gallery import best_matches
+from metrics import FrameTrace, observe, observe_alert_latency, start_metrics_server, timed
+from preview_server import close_channel, preview_channel, scale_box, start_preview_server
+from profiler import CAMERA_THREAD_PREFIX, install_profile_signal
+from run_control import install_control_signals
+
 try:
     from ultralytics import YOLO
     YOLO_AVAILABLE = True
@@ -27,37 +46,82 @@ except ImportError:
 
 # Configuration
 BACKEND_URL = 'http://localhost:3000'
-YOLO_MODEL_PATH = str(yolo_path / 'yolov8n.pt')
+YOLO_MODEL = 'yolov8n.pt'  # Options: yolov8n.pt, yolov8n-pose.pt (keypoints locate faces without a face detector pass)
+YOLO_MODEL_PATH = str(yolo_path / YOLO_MODEL)
 YOLO_CONFIDENCE = 0.5
 FACE_CONFIDENCE_THRESHOLD = 0.4  # Minimum confidence for face detection
 FACE_MATCH_THRESHOLD = 0.45  # Alert only if 55% or above similarity (distance 0.45 = 55% match)
-PROCESS_EVERY_N_FRAMES = 3  # Increased from 2 to 3 for better performance
+TARGET_ANALYSIS_FPS = 10  # Analyses per second per camera (capped at the camera's stream fps)
+ANALYSIS_FPS_BUDGET = None  # Optional total analyses per second shared by all cameras on this node
 MATCH_COOLDOWN = 10  # seconds between alerts for same person on same camera
 CHECK_DATABASE_INTERVAL = 10  # seconds - check for new cameras
 RESIZE_FRAME_WIDTH = 640  # Resize frames for faster processing
+ADAPTIVE_LOAD_SHEDDING = True  # Trade analysis rate/resolution/face stage for bounded latency
+MAX_DRAIN_FRAMES = 30  # Stale buffered frames skipped at most after a slow analysis
+SCHEDULE_INTERVAL = 5  # seconds between priority rebalances of analysis capacity
+STATS_REPORT_INTERVAL = 60  # seconds between face detector and encoding cache reports
 
 class CameraProcessor:
     """Processes a single camera stream"""
     
-    def __init__(self, camera_config, yolo_model=None):
+    def __init__(self, camera_config, yolo_model=None, scheduler=None, encoder=None, encoding_cache=None):
+        self.camera_config = camera_config
         self.camera_id = camera_config['cameraId']
         self.camera_name = camera_config['name']
         self.location = camera_config['location']
         self.stream_url = camera_config['streamUrl']
         self.yolo_model = yolo_model
+        self.scheduler = scheduler
+        self.encoder = encoder or LocalFaceEncoder()
+        self.encoding_cache = encoding_cache or EncodingCache()
+        self.quality_gate = FaceQualityGate()
+        self.frame_context = FrameContext()
         
-        self.video_capture = None
+        self.stream = StreamHealthManager(self.camera_id, self.stream_url, BACKEND_URL, self.camera_name)
         self.known_face_encodings = []
+        self.known_face_matrix = np.empty((0, 128))
         self.known_face_names = []
         self.known_face_ids = []
+        self.gallery_version = 0  # Bumped on every reload so cached matches are re-checked
+        self.person_priorities = {}
         self.frame_count = 0
+        self.pending_frames = 0  # Frames read since the last analysed one
+        self.stream_fps = camera_config.get('fps') or 30
+        self.load_controller = LoadController(analysis_fps_for(camera_config, TARGET_ANALYSIS_FPS))
+        self.sampler = FrameSampler(self.load_controller.effective_fps())
         self.last_match_time = {}
         self.last_database_check = 0
         self.running = False
         self.thread = None
+        self.preview = preview_channel(self.camera_id)
+        self.last_detections = []  # person boxes of the last analysed frame (analysis coordinates)
         
         print(f"📹 Initialized camera: {self.camera_name} ({self.camera_id})")
     
+    def load_persons(self, persons):
+        """Replace the gallery with the face encodings of the given person records"""
+        self.known_face_encodings = []
+        self.known_face_names = []
+        self.known_face_ids = []
+        self.person_priorities = {}
+        
+        for person in persons:
+            self.person_priorities[str(person.get('_id', ''))] = person.get('priority', 'medium')
+            if person.get('faceEncodings') and len(person['faceEncodings']) > 0:
+                for enc_data in person['faceEncodings']:
+                    encoding = enc_data.get('encoding')
+                    # Only vectors from the same embedder are comparable
+                    if encoding_version(enc_data) != self.encoder.version:
+                        continue
+                    if encoding and len(encoding) == self.encoder.embedder.size:
+                        self.known_face_encodings.append(np.array(encoding))
+                        self.known_face_names.append(person.get('name', 'Unknown'))
+                        self.known_face_ids.append(str(person.get('_id', '')))
+        
+        self.known_face_matrix = np.array(self.known_face_encodings).reshape(-1, self.encoder.embedder.size)
+        self.gallery_version += 1
+        print(f"[{self.camera_name}] ✅ Loaded {len(self.known_face_encodings)} {self.encoder.version} face encodings")
+    
     def load_persons_from_api(self):
         """Load persons with face encodings from API (only missing persons)"""
         try:
@@ -65,23 +129,7 @@ class CameraProcessor:
             response = requests.get(f'{BACKEND_URL}/api/persons?status=missing&limit=1000', timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                persons = data.get('persons', [])
-                
-                self.known_face_encodings = []
-                self.known_face_names = []
-                self.known_face_ids = []
-                
-                for person in persons:
-                    if person.get('faceEncodings') and len(person['faceEncodings']) > 0:
-                        for enc_data in person['faceEncodings']:
-                            encoding = enc_data.get('encoding')
-                            if encoding and len(encoding) == 128:
-                                self.known_face_encodings.append(np.array(encoding))
-                                self.known_face_names.append(person.get('name', 'Unknown'))
-                                self.known_face_ids.append(str(person.get('_id', '')))
-                
-                print(f"[{self.camera_name}] ✅ Loaded {len(self.known_face_encodings)} face encodings")
+                self.load_persons(response.json().get('persons', []))
                 return True
             else:
                 print(f"[{self.camera_name}] ⚠️  Failed to load persons: {response.status_code}")
@@ -91,18 +139,21 @@ class CameraProcessor:
             print(f"[{self.camera_name}] ❌ Error loading persons: {e}")
             return False
     
-    def detect_persons_yolo(self, frame):
+    def detect_persons_yolo(self, frame, trace=None):
         """Detect persons using YOLOv8"""
         if not self.yolo_model:
             return []
         
         try:
-            results = self.yolo_model(frame, verbose=False)
+            with timed('yolo', self.camera_id, trace):
+                results = self.yolo_model(frame, verbose=False)
             detections = []
             
             for result in results:
                 boxes = result.boxes
-                for box in boxes:
+                # Pose models also return 17 COCO keypoints per person
+                keypoints = result.keypoints.data.cpu().numpy() if result.keypoints is not None else None
+                for index, box in enumerate(boxes):
                     class_id = int(box.cls[0])
                     confidence = float(box.conf[0])
                     
@@ -111,7 +162,8 @@ class CameraProcessor:
                         x1, y1, x2, y2 = map(int, box.xyxy[0])
                         detections.append({
                             'bbox': (x1, y1, x2, y2),
-                            'confidence': confidence
+                            'confidence': confidence,
+                            'keypoints': keypoints[index] if keypoints is not None else None
                         })
             
             return detections
@@ -119,61 +171,119 @@ class CameraProcessor:
             print(f"[{self.camera_name}] ⚠️  YOLO detection error: {e}")
             return []
     
-    def match_face(self, face_image):
-        """Match face against known encodings"""
+    def match_encodings(self, face_encodings):
+        """Match face encodings against known encodings in one batched lookup"""
+        indices, distances = best_matches(self.known_face_matrix, face_encodings)
+        
+        matches = []
+        for face_encoding, index, distance in zip(face_encodings, indices, distances):
+            # Check threshold - Alert only if 55% or above similarity
+            if distance <= FACE_MATCH_THRESHOLD:  # 0.45 distance = 55% similarity minimum
+                matches.append((
+                    self.known_face_names[index],
+                    self.known_face_ids[index],
+                    1 - distance,
+                    face_encoding  # Return the actual face encoding
+                ))
+            else:
+                matches.append((None, None, 0, None))
+        
+        return matches
+    
+    def match_faces(self, frame, bboxes, keypoints=None, trace=None, now=None):
+        """
+        Match the faces of all persons in a frame (a FrameContext or BGR image)
+
+        Pose keypoints (one entry per box, may be None) give face boxes without a
+        detector pass. Otherwise overlapping head regions are searched once and every face belongs to one
+        person. Faces that look like one seen moments ago reuse its cached encoding
+        and match. The rest are quality-scored (all passing faces or the best one
+        per person, see FACE_SELECTION) and only the best face per face track is
+        encoded, in one encoder call per frame. All fresh encodings then go through
+        one gallery lookup. Returns (bbox, match, trace) triples, which may include
+        deferred faces from earlier frames; trace is the FrameTrace of the frame
+        the face was captured in. now (monotonic seconds, default the current time)
+        ages cache entries and face tracks; replays pass their own clip time.
+        """
+        if now is None:
+            now = time.monotonic()
         if len(self.known_face_encodings) == 0:
-            return None, None, 0, None
+            return []
         
         try:
-            # Convert to RGB
-            rgb_face = cv2.cvtColor(face_image, cv2.COLOR_BGR2RGB)
-            
-            # Resize for faster face detection
-            height, width = rgb_face.shape[:2]
-            if width > 400:
-                scale = 400 / width
-                new_width = 400
-                new_height = int(height * scale)
-                rgb_face = cv2.resize(rgb_face, (new_width, new_height))
+            with timed('face_detection', self.camera_id, trace):
+                faces = find_faces_in_frame(frame, bboxes, keypoints=keypoints)
             
-            # Get face encodings with faster HOG model
-            face_locations = face_recognition.face_locations(rgb_face, model='hog', number_of_times_to_upsample=0)
+            results = []
+            lookups = []  # (bbox, cache key, encoding, encode ms, trace) awaiting a gallery lookup
+            misses = []
+            cached_owners = set()
+            for face in faces:
+                face['hash'] = face_hashes(face['rgb'], face['location'])
+                cached = self.encoding_cache.get(self.camera_id, face['hash'], self.gallery_version, now)
+                if cached is None:
+                    misses.append(face)
+                    continue
+                
+                cached_owners.add(face['owner'])
+                encoding, match = cached
+                if match is None:
+                    lookups.append((bboxes[face['owner']], face['hash'], encoding, None, trace))
+                else:
+                    results.append((bboxes[face['owner']], match, trace))
             
-            if not face_locations:
-                return None, None, 0, None
+            # In best-face mode a person with a cached face needs no other face encoded
+            if FACE_SELECTION == 'best':
+                misses = [face for face in misses if face['owner'] not in cached_owners]
             
-            face_encodings = face_recognition.face_encodings(rgb_face, face_locations, num_jitters=1)
+            candidates = []
+            for face in select_faces(misses):
+                top, right, bottom, left = face['image_location']
+                candidates.append({**face, 'bbox': bboxes[face['owner']], 'track_box': (left, top, right, bottom),
+                                   'trace': trace})
             
-            if not face_encodings:
-                return None, None, 0, None
+            # Spend encoder time only where a match is possible
+            # Faces held for a later frame must not point into this frame's buffers
+            selected = self.quality_gate.select(candidates, now, detach=lambda c: {**c, 'rgb': c['rgb'].copy()})
             
-            face_encoding = face_encodings[0]
+            if selected:
+                # Encode the whole batch at once (in worker processes when a pool is configured)
+                start = time.perf_counter()
+                encodings = self.encoder.encode([(c['rgb'], [c['location']], [c.get('landmarks')]) for c in selected])
+                encode_seconds = time.perf_counter() - start
+                observe('encoding', self.camera_id, encode_seconds)
+                encode_ms = encode_seconds * 1000 / len(selected)
+                # Deferred faces carry the trace of their own frame
+                for face_trace in {id(c['trace']): c['trace'] for c in selected if c['trace']}.values():
+                    face_trace.add('encoding', encode_seconds)
+                
+                for candidate, face_encodings in zip(selected, encodings):
+                    if len(face_encodings):
+                        lookups.append((candidate['bbox'], candidate['hash'], face_encodings[0], encode_ms,
+                                        candidate['trace']))
             
-            # Calculate distances
-            face_distances = face_recognition.face_distance(self.known_face_encodings, face_encoding)
+            if not lookups:
+                return results
             
-            # Find best match
-            best_match_index = np.argmin(face_distances)
-            best_distance = face_distances[best_match_index]
+            # One gallery lookup for every face of the frame
+            start = time.perf_counter()
+            matches = self.match_encodings([encoding for _, _, encoding, _, _ in lookups])
+            match_seconds = time.perf_counter() - start
+            observe('matching', self.camera_id, match_seconds)
+            for face_trace in {id(t): t for *_, t in lookups if t}.values():
+                face_trace.add('matching', match_seconds)
+            for (bbox, key, encoding, encode_ms, face_trace), match in zip(lookups, matches):
+                self.encoding_cache.put(self.camera_id, key, encoding, match, self.gallery_version, encode_ms, now)
+                results.append((bbox, match, face_trace))
             
-            # Check threshold - Alert only if 55% or above similarity
-            if best_distance <= FACE_MATCH_THRESHOLD:  # 0.45 distance = 55% similarity minimum
-                similarity = 1 - best_distance
-                return (
-                    self.known_face_names[best_match_index],
-                    self.known_face_ids[best_match_index],
-                    similarity,
-                    face_encoding  # Return the actual face encoding
-                )
-            
-            return None, None, 0, None
+            return results
             
         except Exception as e:
             print(f"[{self.camera_name}] ⚠️  Face matching error: {e}")
-            return None, None, 0, None
+            return []
     
-    def send_match_to_backend(self, person_name, person_id, similarity, bbox, face_encoding):
-        """Send match detection to backend"""
+    def send_match_to_backend(self, person_name, person_id, similarity, bbox, face_encoding, trace=None):
+        """Send match detection to backend (with the frame's stage timings when traced)"""
         try:
             current_time = time.time()
             
@@ -184,7 +294,8 @@ class CameraProcessor:
             
             # Prepare payload with real face encoding
             payload = {
-                'encoding': face_encoding.tolist() if face_encoding is not None else [0] * 128,
+                'encoding': face_encoding.tolist() if face_encoding is not None else [0] * self.encoder.embedder.size,
+                'encoderVersion': self.encoder.version,
                 'metadata': {
                     'camera_id': self.camera_id,
                     'camera_name': self.camera_name,
@@ -196,11 +307,18 @@ class CameraProcessor:
                     'person_name': person_name
                 }
             }
+            if trace is not None:
+                # Capture-to-dispatch time and stage split, so the backend can store capture-to-report latency
+                payload['timings'] = trace.to_payload()
+                payload['metadata']['timestamp'] = payload['timings']['capturedAt']
             
-            response = requests.post(f'{BACKEND_URL}/api/recognition', json=payload, timeout=5)
+            with timed('dispatch', self.camera_id):
+                response = requests.post(f'{BACKEND_URL}/api/recognition', json=payload, timeout=5)
             
             if response.status_code == 200:
                 self.last_match_time[person_id] = current_time
+                if trace is not None:
+                    observe_alert_latency(trace, self.camera_id, self.camera_name)
                 print(f"[{self.camera_name}] 🚨 ALERT: {person_name} detected (similarity: {similarity:.2%})")
             else:
                 print(f"[{self.camera_name}] ⚠️  Backend response: {response.status_code}")
@@ -208,103 +326,173 @@ class CameraProcessor:
         except Exception as e:
             print(f"[{self.camera_name}] ❌ Error sending to backend: {e}")
     
-    def update_camera_status(self):
-        """Update camera status in backend"""
-        try:
-            requests.patch(
-                f'{BACKEND_URL}/api/cameras/{self.camera_id}/status',
-                json={'status': 'active', 'lastOnline': datetime.now().isoformat()},
-                timeout=5
-            )
-        except:
-            pass
+    def set_analysis_rate(self, analysis_fps):
+        """Set the full-quality analysis rate; load shedding scales it down"""
+        self.load_controller.analysis_fps = analysis_fps
+        self.sampler.set_rate(self.load_controller.effective_fps())
+    
+    def adapt_to_load(self, latency):
+        """Skip frames that went stale during the analysis and feed the load controller"""
+        # Only an analysis slower than a frame interval leaves frames queued behind
+        # us. Jump back to live by dropping what is actually buffered: the drain
+        # stops at the first frame it has to wait for.
+        backlog = 0
+        frame_interval = 1.0 / self.stream_fps
+        if latency > frame_interval:
+            backlog = self.stream.drain(MAX_DRAIN_FRAMES, live_seconds=frame_interval / 2)
+        
+        if self.load_controller.observe(latency, backlog):
+            settings = self.load_controller.settings
+            self.sampler.set_rate(self.load_controller.effective_fps())
+            print(f"[{self.camera_name}] ⚖️  Quality level {self.load_controller.level}: "
+                  f"{self.load_controller.effective_fps():.1f} analyses/s, "
+                  f"width {int(RESIZE_FRAME_WIDTH * settings['resize_scale'])}px, "
+                  f"face stage {'on' if settings['face_stage'] else 'off'}")
+    
+    def heartbeat(self):
+        """Status entry for the node's bulk heartbeat"""
+        health = self.stream.health.to_dict()
+        cache_stats = self.encoding_cache.stats(self.camera_id)
+        return {
+            'cameraId': self.camera_id,
+            'online': health['online'],
+            'lastOnline': health['lastFrameAt'],
+            'health': {
+                **health,
+                'queueDepth': self.pending_frames,
+                'qualityLevel': self.load_controller.level,
+                'cacheHitRate': cache_stats['hit_rate'],
+                'encoderMsSaved': cache_stats['saved_ms']
+            }
+        }
+    
+    def analyze_frame(self, frame, quality, trace=None, now=None):
+        """
+        Detect persons and match their faces in one sampled frame
+
+        Args:
+            frame: BGR frame as read from the stream
+            quality: Load controller settings (resize_scale, face_stage)
+            trace: FrameTrace of the frame, filled in with the stage timings
+            now: Capture time in monotonic seconds (default: now); replays pass the
+                clip time so cache and face track ages follow the footage
+
+        Returns:
+            List of (bbox, match, trace) triples similar enough to alert on
+        """
+        # Resize frame for faster processing (into a buffer reused across frames)
+        resize_width = int(RESIZE_FRAME_WIDTH * quality['resize_scale'])
+        with timed('resize', self.camera_id, trace):
+            frame = self.frame_context.update(frame, resize_width)
+        
+        # Detect persons
+        if YOLO_AVAILABLE and self.yolo_model:
+            detections = self.detect_persons_yolo(frame, trace)
+        else:
+            # Fallback: treat whole frame as detection
+            h, w = frame.shape[:2]
+            detections = [{'bbox': (0, 0, w, h), 'confidence': 1.0}]
+        self.last_detections = [detection['bbox'] for detection in detections]
+        
+        # Face stage is the first thing shed under heavy load
+        if not quality['face_stage']:
+            detections = []
+        
+        # Persons large enough to hold a usable face
+        detections = [
+            detection for detection in detections
+            if detection['bbox'][3] - detection['bbox'][1] >= 50 and detection['bbox'][2] - detection['bbox'][0] >= 50
+        ]
+        bboxes = [detection['bbox'] for detection in detections]
+        keypoints = [detection.get('keypoints') for detection in detections]
+        
+        # Match faces for the whole frame in one batch
+        return [
+            (bbox, match, match_trace)
+            for bbox, match, match_trace in self.match_faces(self.frame_context, bboxes, keypoints, trace, now)
+            if match[0] and match[2] >= FACE_CONFIDENCE_THRESHOLD
+        ]
+    
+    def draw_preview(self, image, scale, matches):
+        """Person boxes, matched names and the camera name on a downscaled preview frame"""
+        for bbox in self.last_detections:
+            x1, y1, x2, y2 = scale_box(bbox, scale)
+            cv2.rectangle(image, (x1, y1), (x2, y2), (0, 165, 255), 1)
+        
+        for bbox, (person_name, _, similarity, _), _ in matches:
+            x1, y1, x2, y2 = scale_box(bbox, scale)
+            cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(image, f"{person_name} ({similarity:.0%})", (x1, max(y1 - 6, 12)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+        
+        cv2.putText(image, self.camera_name, (8, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255, 255, 255), 1)
     
     def process_stream(self):
         """Main processing loop for this camera"""
         print(f"[{self.camera_name}] 🎥 Starting stream processing...")
         
-        # Open video capture
-        self.video_capture = cv2.VideoCapture(self.stream_url)
-        
-        if not self.video_capture.isOpened():
-            print(f"[{self.camera_name}] ❌ Failed to open stream: {self.stream_url}")
-            return
-        
         # Load initial person database
         self.load_persons_from_api()
         
-        self.running = True
-        
         while self.running:
-            ret, frame = self.video_capture.read()
+            # Blocks through reconnect backoff; None means we were stopped
+            frame = self.stream.read()
             
-            if not ret:
-                print(f"[{self.camera_name}] ⚠️  Failed to read frame, retrying...")
-                time.sleep(1)
-                continue
+            if frame is None:
+                break
             
+            capture_time = time.monotonic()
             self.frame_count += 1
+            observe('decode', self.camera_id, self.stream.last_read_seconds)
             
             # Reload database periodically
             current_time = time.time()
             if current_time - self.last_database_check > CHECK_DATABASE_INTERVAL:
                 self.load_persons_from_api()
                 self.last_database_check = current_time
-                self.update_camera_status()
             
-            # Process every Nth frame
-            if self.frame_count % PROCESS_EVERY_N_FRAMES != 0:
+            # Analyse frames on the camera's time grid, not every Nth frame
+            self.pending_frames += 1
+            if not self.sampler.should_process(capture_time):
                 continue
+            self.pending_frames = 0
+            trace = FrameTrace(capture_time, self.stream.last_read_seconds)
             
-            # Resize frame for faster processing
-            height, width = frame.shape[:2]
-            if width > RESIZE_FRAME_WIDTH:
-                scale = RESIZE_FRAME_WIDTH / width
-                new_width = RESIZE_FRAME_WIDTH
-                new_height = int(height * scale)
-                frame = cv2.resize(frame, (new_width, new_height))
+            matches = self.analyze_frame(frame, self.load_controller.settings, trace, capture_time)
+            for bbox, match, match_trace in matches:
+                person_name, person_id, similarity, face_encoding = match
+                self.send_match_to_backend(person_name, person_id, similarity, bbox, face_encoding, match_trace)
+                if self.scheduler:
+                    self.scheduler.record_sighting(self.camera_id, self.person_priorities.get(person_id))
             
-            # Detect persons
-            if YOLO_AVAILABLE and self.yolo_model:
-                detections = self.detect_persons_yolo(frame)
-            else:
-                # Fallback: treat whole frame as detection
-                h, w = frame.shape[:2]
-                detections = [{'bbox': (0, 0, w, h), 'confidence': 1.0}]
+            # Annotated preview, rendered only while somebody watches (after the alerts went out)
+            if self.preview.wants_frame():
+                self.preview.publish(self.frame_context.frame,
+                                     lambda image, scale: self.draw_preview(image, scale, matches))
             
-            # Process each detection
-            for detection in detections:
-                x1, y1, x2, y2 = detection['bbox']
-                
-                # Crop person region
-                person_crop = frame[y1:y2, x1:x2]
-                
-                if person_crop.shape[0] < 50 or person_crop.shape[1] < 50:
-                    continue
-                
-                # Match face
-                person_name, person_id, similarity, face_encoding = self.match_face(person_crop)
-                
-                if person_name and similarity >= FACE_CONFIDENCE_THRESHOLD:
-                    self.send_match_to_backend(person_name, person_id, similarity, (x1, y1, x2, y2), face_encoding)
+            if ADAPTIVE_LOAD_SHEDDING:
+                self.adapt_to_load(time.monotonic() - capture_time)
         
         # Cleanup
-        if self.video_capture:
-            self.video_capture.release()
+        self.stream.release()
         
         print(f"[{self.camera_name}] 🛑 Stream processing stopped")
     
     def start(self):
         """Start processing in a separate thread"""
         if not self.running:
-            self.thread = threading.Thread(target=self.process_stream, daemon=True)
+            self.running = True
+            self.thread = threading.Thread(target=self.process_stream, name=f"{CAMERA_THREAD_PREFIX}{self.camera_id}",
+                                           daemon=True)
             self.thread.start()
     
     def stop(self):
         """Stop processing"""
         self.running = False
+        self.stream.stop()
         if self.thread:
             self.thread.join(timeout=5)
+        close_channel(self.camera_id)
 
 
 class MultiCameraSurveillance:
@@ -314,6 +502,10 @@ class MultiCameraSurveillance:
         self.cameras = []
         self.processors = []
         self.yolo_model = None
+        self.heartbeat = HeartbeatAggregator(BACKEND_URL, CHECK_DATABASE_INTERVAL)
+        self.scheduler = PriorityScheduler(TARGET_ANALYSIS_FPS, ANALYSIS_FPS_BUDGET)
+        self.encoder = None
+        self.encoding_cache = EncodingCache()
     
     def initialize_yolo(self):
         """Initialize YOLO model (shared across cameras)"""
@@ -371,19 +563,27 @@ class MultiCameraSurveillance:
         print(f"\n🚀 Starting surveillance on {len(self.cameras)} cameras...\n")
         
         for camera_config in self.cameras:
-            processor = CameraProcessor(camera_config, self.yolo_model)
+            processor = CameraProcessor(camera_config, self.yolo_model, self.scheduler, self.encoder,
+                                        self.encoding_cache)
             processor.start()
             self.processors.append(processor)
+            self.heartbeat.register(processor)
             time.sleep(0.5)  # Stagger starts
         
+        self.rebalance_analysis_rates()
         print("\n✅ All cameras started\n")
     
+    def rebalance_analysis_rates(self):
+        """Share analysis capacity between cameras by importance and recent sightings"""
+        self.scheduler.rebalance(self.processors)
+    
     def stop_all_cameras(self):
         """Stop all camera processors"""
         print("\n🛑 Stopping all cameras...")
         
         for processor in self.processors:
             processor.stop()
+            self.heartbeat.unregister(processor)
         
         self.processors = []
         print("✅ All cameras stopped\n")
@@ -414,17 +614,23 @@ class MultiCameraSurveillance:
                     print(f"🛑 Stopping removed camera: {processor.camera_name}")
                     processor.stop()
                     self.processors.remove(processor)
+                    self.heartbeat.unregister(processor)
                 
                 # Add new cameras
                 if cameras_to_add:
                     print(f"✅ Found {len(cameras_to_add)} new camera(s)")
                     for camera_config in cameras_to_add:
-                        processor = CameraProcessor(camera_config, self.yolo_model)
+                        processor = CameraProcessor(camera_config, self.yolo_model, self.scheduler, self.encoder,
+                                                    self.encoding_cache)
                         processor.start()
                         self.processors.append(processor)
+                        self.heartbeat.register(processor)
                         time.sleep(0.5)
                 else:
                     print("ℹ️  No new cameras")
+                
+                if cameras_to_add or cameras_to_remove:
+                    self.rebalance_analysis_rates()
                     
         except Exception as e:
             print(f"⚠️  Error reloading cameras: {e}")
@@ -435,9 +641,25 @@ class MultiCameraSurveillance:
         print("Multi-Camera Surveillance System")
         print("="*60)
         
+        # Per-stage latency histograms for every camera of this node
+        start_metrics_server()
+        
+        # Profiles on demand: SIGUSR1 or GET /profile?seconds=N on the metrics port
+        install_profile_signal()
+        
+        # SIGTERM or POST /control/stop stops all cameras cleanly; SIGHUP or
+        # POST /control/reload re-reads cameras and persons
+        control = install_control_signals()
+        
+        # Annotated MJPEG previews of every camera, rendered only while watched
+        start_preview_server()
+        
         # Initialize YOLO
         self.initialize_yolo()
         
+        # Face encoding runs in worker processes shared by all cameras
+        self.encoder = create_face_encoder()
+        
         # Load cameras
         if not self.load_cameras_from_api():
             print("⚠️  No cameras configured initially. Will check periodically...")
@@ -445,16 +667,40 @@ class MultiCameraSurveillance:
             # Start all cameras
             self.start_all_cameras()
         
+        # One bulk status report per interval for all cameras on this node
+        self.heartbeat.start()
+        
         # Keep running and check for new cameras periodically
         last_reload = time.time()
+        last_schedule = time.time()
+        last_stats_report = time.time()
         reload_interval = CHECK_DATABASE_INTERVAL
         
         try:
             print("Press Ctrl+C to stop\n")
             print(f"ℹ️  Will check for new cameras every {reload_interval} seconds\n")
             
-            while True:
-                time.sleep(1)
+            while not control.stopping:
+                control.wait(1)
+                
+                if control.take_reload():
+                    self.reload_cameras()
+                    for processor in self.processors:
+                        processor.last_database_check = 0  # persons reload on the next frame
+                    last_reload = time.time()
+                
+                # Follow load and sightings with the compute split
+                if time.time() - last_schedule >= SCHEDULE_INTERVAL:
+                    self.rebalance_analysis_rates()
+                    last_schedule = time.time()
+                
+                if time.time() - last_stats_report >= STATS_REPORT_INTERVAL:
+                    for backend, stats in detector_stats().items():
+                        print(f"⏱️  Face detector {backend}: {stats['calls']} calls, {stats['avg_ms']} ms avg")
+                    cache_stats = self.encoding_cache.stats()
+                    print(f"♻️  Encoding cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                          f"{cache_stats['saved_ms']:.0f} ms encoder time saved")
+                    last_stats_report = time.time()
                 
                 # Check if it's time to reload cameras
                 if time.time() - last_reload >= reload_interval:
@@ -464,7 +710,10 @@ class MultiCameraSurveillance:
         except KeyboardInterrupt:
             print("\n\n⚠️  Interrupted by user")
         finally:
+            self.heartbeat.stop()
             self.stop_all_cameras()
+            if self.encoder:
+                self.encoder.close()
 
 
 if __name__ == "__main__":
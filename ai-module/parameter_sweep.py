@@ -0,0 +1,263 @@
+"""
+Parameter Sweep
+Replays a labelled dataset through the camera pipeline over a grid of settings
+and reports throughput, CPU per camera, recall and false alerts, marking the
+Pareto-optimal settings for choosing production values
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Detector modules and replay sources live next to the AI module
+sys.path.insert(0, str(Path(__file__).parent.parent / 'yolov8-person-detector'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'camera-module'))
+
+import face_stage
+import multi_camera_surveillance as pipeline
+from frame_sampler import FrameSampler
+from load_controller import QUALITY_LEVELS
+from multi_camera_surveillance import CameraProcessor, MultiCameraSurveillance
+from replay_source import ReplayCapture
+
+# Sweep Settings (each list is one axis of the grid; override on the command line)
+ANALYSIS_FPS_VALUES = [2, 5, 10]  # TARGET_ANALYSIS_FPS - analyses per second per camera
+RESIZE_WIDTH_VALUES = [480, 640, 960]  # RESIZE_FRAME_WIDTH
+YOLO_CONFIDENCE_VALUES = [0.35, 0.5]  # YOLO_CONFIDENCE
+REGION_SIZE_VALUES = [300, 400]  # face_stage.MAX_REGION_SIZE - head crop cap
+MATCH_THRESHOLD_VALUES = [0.4, 0.45, 0.5, 0.55]  # FACE_MATCH_THRESHOLD (distance), scored after each run
+OUTPUT = 'sweep_results.json'
+
+
+def load_dataset(path):
+    """
+    Read a dataset manifest
+
+    Format:
+        {
+          "persons_file": "persons.json",  (saved /api/persons response, or "persons": [...])
+          "clips": [
+            {"source": "clips/lobby.mp4", "fps": 25,
+             "appearances": [{"person_id": "<_id>", "start": 120, "end": 480}]}
+          ]
+        }
+
+    Clip sources are replayable videos, image directories or globs; appearance
+    start/end are inclusive frame indices during which the person's face is visible.
+    Relative paths are resolved against the manifest's directory.
+    """
+    base = Path(path).parent
+    with open(path) as f:
+        manifest = json.load(f)
+
+    persons = manifest.get('persons')
+    if persons is None:
+        with open(base / manifest['persons_file']) as f:
+            saved = json.load(f)
+        persons = saved.get('persons', []) if isinstance(saved, dict) else saved
+
+    clips = []
+    for index, clip in enumerate(manifest['clips']):
+        clips.append({
+            'name': clip.get('name', f"clip_{index + 1}"),
+            'source': str(base / clip['source']),
+            'fps': clip.get('fps'),
+            'appearances': clip.get('appearances', [])
+        })
+    return persons, clips
+
+
+def apply_settings(resize_width, yolo_confidence, region_size, match_threshold):
+    """Set the pipeline's module-level knobs for the next run"""
+    pipeline.RESIZE_FRAME_WIDTH = resize_width
+    pipeline.YOLO_CONFIDENCE = yolo_confidence
+    pipeline.FACE_MATCH_THRESHOLD = match_threshold
+    face_stage.MAX_REGION_SIZE = region_size
+
+
+def replay_clip(processor, clip, analysis_fps):
+    """
+    Run one clip through the processor as fast as it decodes
+
+    Frames are sampled on the clip's own timeline, and the encoding cache and
+    face quality gate age entries and tracks by clip time too, so which frames
+    are analysed and which faces are encoded do not depend on how fast this
+    machine is.
+
+    Returns:
+        Tuple (frames read, frames analysed, clip fps, sightings) - sightings are
+        (frame index, person id, distance) for every face similar enough to alert on
+    """
+    capture = ReplayCapture(clip['source'], mode='fast', fps=clip['fps'], loop=False)
+    if not capture.isOpened():
+        raise SystemExit(f"❌ Cannot replay {clip['source']}")
+
+    sampler = FrameSampler(min(analysis_fps, capture.fps))
+    quality = QUALITY_LEVELS[0]
+    sightings = []
+    frames = analysed = 0
+
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        index = frames
+        frames += 1
+        clip_time = index / capture.fps
+        if not sampler.should_process(clip_time):
+            continue
+        analysed += 1
+        for bbox, (person_name, person_id, similarity, _), _ in processor.analyze_frame(frame, quality,
+                                                                                       now=clip_time):
+            sightings.append((index, person_id, 1 - similarity))
+
+    capture.release()
+    return frames, analysed, capture.fps, sightings
+
+
+def score(clip_runs, threshold, cooldown=pipeline.MATCH_COOLDOWN):
+    """
+    Alerts at a match threshold, with the processor's per-person cooldown
+
+    Returns:
+        Tuple (appearances found, appearances, false alerts, alerts)
+    """
+    found = total = false_alerts = alert_count = 0
+    for clip, sightings, fps in clip_runs:
+        last_alert = {}
+        alerts = []
+        for index, person_id, distance in sightings:
+            if distance > threshold:
+                continue
+            if person_id in last_alert and (index - last_alert[person_id]) / fps < cooldown:
+                continue
+            last_alert[person_id] = index
+            alerts.append((index, person_id))
+
+        def covers(appearance, index, person_id):
+            return appearance['person_id'] == person_id and appearance['start'] <= index <= appearance['end']
+
+        total += len(clip['appearances'])
+        found += sum(any(covers(a, *alert) for alert in alerts) for a in clip['appearances'])
+        false_alerts += sum(not any(covers(a, *alert) for a in clip['appearances']) for alert in alerts)
+        alert_count += len(alerts)
+    return found, total, false_alerts, alert_count
+
+
+def run_settings(persons, clips, yolo_model, analysis_fps, resize_width, yolo_confidence, region_size,
+                 thresholds):
+    """One pipeline run over all clips; every match threshold is scored from the same run"""
+    # The loosest threshold keeps every candidate; stricter ones only filter them
+    apply_settings(resize_width, yolo_confidence, region_size, max(thresholds))
+
+    clip_runs = []
+    frames = analysed = 0
+    footage = 0.0
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+
+    for clip in clips:
+        # Fresh processor per clip: no encoding cache or face tracks carried over
+        processor = CameraProcessor({'cameraId': f"sweep_{clip['name']}", 'name': clip['name'],
+                                     'location': 'Sweep', 'streamUrl': clip['source']}, yolo_model)
+        processor.load_persons(persons)
+        clip_frames, clip_analysed, fps, sightings = replay_clip(processor, clip, analysis_fps)
+        frames += clip_frames
+        analysed += clip_analysed
+        footage += clip_frames / fps
+        clip_runs.append((clip, sightings, fps))
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    rows = []
+    for threshold in thresholds:
+        found, total, false_alerts, alerts = score(clip_runs, threshold)
+        rows.append({
+            'analysis_fps': analysis_fps,
+            'resize_width': resize_width,
+            'yolo_confidence': yolo_confidence,
+            'max_region_size': region_size,
+            'match_threshold': threshold,
+            'frames': frames,
+            'analysed_frames': analysed,
+            'footage_seconds': round(footage, 2),
+            'wall_seconds': round(wall, 2),
+            'realtime_factor': round(footage / wall, 2) if wall else None,  # cameras of this kind one node keeps up with
+            'fps_throughput': round(frames / wall, 1) if wall else None,
+            'cpu_per_camera': round(cpu / footage, 3) if footage else None,  # CPU cores one live camera needs
+            'recall': round(found / total, 3) if total else None,
+            'appearances': total,
+            'alerts': alerts,
+            'false_alerts': false_alerts,
+            'false_alerts_per_hour': round(false_alerts * 3600 / footage, 1) if footage else None
+        })
+    return rows
+
+
+def mark_pareto(rows):
+    """Flag rows no other row beats on recall, false alerts and CPU at once"""
+    def key(row):
+        return (-(row['recall'] or 0), row['false_alerts_per_hour'] or 0, row['cpu_per_camera'] or 0)
+
+    for row in rows:
+        mine = key(row)
+        row['pareto'] = not any(
+            all(a <= b for a, b in zip(key(other), mine)) and key(other) != mine for other in rows
+        )
+    return rows
+
+
+def print_table(rows, pareto_only=False):
+    print(f"\n{'fps':>4} {'width':>5} {'conf':>5} {'crop':>5} {'thresh':>6} "
+          f"{'x realtime':>10} {'cpu/cam':>8} {'recall':>7} {'false/h':>8}")
+    for row in sorted(rows, key=lambda r: (r['cpu_per_camera'] or 0, -(r['recall'] or 0))):
+        if pareto_only and not row['pareto']:
+            continue
+        recall = f"{row['recall']:.1%}" if row['recall'] is not None else '-'
+        print(f"{row['analysis_fps']:>4} {row['resize_width']:>5} {row['yolo_confidence']:>5} "
+              f"{row['max_region_size']:>5} {row['match_threshold']:>6} {row['realtime_factor']:>10} "
+              f"{row['cpu_per_camera']:>8} {recall:>7} {row['false_alerts_per_hour']:>8}"
+              f"{'  ★' if row['pareto'] else ''}")
+    print("\n★ Pareto-optimal: no other setting has better recall, fewer false alerts and lower CPU together")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep pipeline settings over a labelled replay dataset')
+    parser.add_argument('dataset', help='Dataset manifest JSON (see load_dataset)')
+    parser.add_argument('--analysis-fps', type=float, nargs='+', default=ANALYSIS_FPS_VALUES)
+    parser.add_argument('--resize-width', type=int, nargs='+', default=RESIZE_WIDTH_VALUES)
+    parser.add_argument('--yolo-confidence', type=float, nargs='+', default=YOLO_CONFIDENCE_VALUES)
+    parser.add_argument('--max-region-size', type=int, nargs='+', default=REGION_SIZE_VALUES)
+    parser.add_argument('--match-threshold', type=float, nargs='+', default=MATCH_THRESHOLD_VALUES)
+    parser.add_argument('--pareto-only', action='store_true', help='Print only the Pareto-optimal rows')
+    parser.add_argument('--output', default=OUTPUT)
+    args = parser.parse_args()
+
+    persons, clips = load_dataset(args.dataset)
+    surveillance = MultiCameraSurveillance()
+    surveillance.initialize_yolo()
+
+    grid = list(itertools.product(args.analysis_fps, args.resize_width, args.yolo_confidence, args.max_region_size))
+    print(f"🔬 {len(grid)} runs over {len(clips)} clips, {len(args.match_threshold)} thresholds each")
+
+    rows = []
+    for number, (analysis_fps, resize_width, yolo_confidence, region_size) in enumerate(grid, 1):
+        print(f"\n▶️  Run {number}/{len(grid)}: {analysis_fps:g} fps, width {resize_width}, "
+              f"conf {yolo_confidence}, crop {region_size}")
+        rows += run_settings(persons, clips, surveillance.yolo_model, analysis_fps, resize_width,
+                             yolo_confidence, region_size, sorted(args.match_threshold))
+
+    mark_pareto(rows)
+    print_table(rows, args.pareto_only)
+
+    with open(args.output, 'w') as f:
+        json.dump({'dataset': os.path.abspath(args.dataset), 'clips': len(clips), 'results': rows}, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Priority-Aware Compute Scheduler
+Shares the node's analysis capacity between cameras by camera importance
+and by recent sightings of high-priority missing persons
+"""
+
+import time
+
+from frame_sampler import analysis_fps_for
+
+# Configuration
+IMPORTANCE_WEIGHTS = {'low': 0.5, 'normal': 1.0, 'high': 2.0, 'critical': 3.0}
+PERSON_PRIORITY_BOOST = {'high': 2.0, 'critical': 4.0}  # Person.priority values that boost a camera
+SIGHTING_BOOST_WINDOW = 300  # seconds a sighting keeps boosting its camera
+PROTECTED_WEIGHT = 2.0  # cameras at or above this weight are never shed past PROTECTED_MAX_LEVEL
+PROTECTED_MAX_LEVEL = 1  # deepest load-shedding level for protected cameras
+CONTENTION_SHED_LEVEL = 2  # level forced on below-normal cameras while others are shedding
+
+
+class PriorityScheduler:
+    """Assigns analysis rate and load-shedding bounds to camera processors"""
+
+    def __init__(self, default_fps, budget=None):
+        """
+        Args:
+            default_fps: Analysis rate of a normal-importance camera
+            budget: Optional total analyses per second for the whole node
+        """
+        self.default_fps = default_fps
+        self.budget = budget
+        self.sightings = {}  # camera_id -> (boost, time)
+
+    def record_sighting(self, camera_id, priority, now=None):
+        """Remember that a person of the given priority was matched on a camera"""
+        boost = PERSON_PRIORITY_BOOST.get(priority)
+        if not boost:
+            return
+
+        if now is None:
+            now = time.monotonic()
+
+        previous = self.sightings.get(camera_id)
+        if previous and now - previous[1] < SIGHTING_BOOST_WINDOW and previous[0] > boost:
+            boost = previous[0]
+        self.sightings[camera_id] = (boost, now)
+
+    def weight(self, processor, now=None):
+        """Scheduling weight of a camera processor"""
+        if now is None:
+            now = time.monotonic()
+
+        importance = processor.camera_config.get('importance', 'normal')
+        weight = IMPORTANCE_WEIGHTS.get(importance, 1.0)
+
+        sighting = self.sightings.get(processor.camera_id)
+        if sighting and now - sighting[1] < SIGHTING_BOOST_WINDOW:
+            weight *= sighting[0]
+
+        return weight
+
+    def rebalance(self, processors, now=None):
+        """
+        Recompute analysis rates and shedding bounds for all processors
+
+        A camera with its own `analysisFps` keeps that rate while the node has
+        room, but with a budget it never gets more than its weighted share; the
+        share pinned cameras leave unused goes to the others. Shedding bounds
+        apply to pinned cameras like to any other.
+        """
+        if not processors:
+            return
+
+        if now is None:
+            now = time.monotonic()
+
+        # Forget expired sightings
+        self.sightings = {
+            camera_id: sighting for camera_id, sighting in self.sightings.items()
+            if now - sighting[1] < SIGHTING_BOOST_WINDOW
+        }
+
+        weights = {processor.camera_id: self.weight(processor, now) for processor in processors}
+        total_weight = sum(weights.values())
+        # Cameras we forced down ourselves do not count as contention
+        contention = any(
+            processor.load_controller.level > processor.load_controller.min_level
+            for processor in processors
+        )
+
+        rates = {}
+        if self.budget:
+            # Weighted shares of the node budget instead of equal ones
+            pinned = [processor for processor in processors if processor.camera_config.get('analysisFps')]
+            for processor in pinned:
+                share = self.budget * weights[processor.camera_id] / total_weight
+                rates[processor.camera_id] = min(analysis_fps_for(processor.camera_config, self.default_fps), share)
+
+            spare = max(self.budget - sum(rates.values()), 0)
+            free_weight = total_weight - sum(weights[processor.camera_id] for processor in pinned)
+            for processor in processors:
+                if processor.camera_id not in rates:
+                    share = spare * weights[processor.camera_id] / free_weight
+                    rates[processor.camera_id] = analysis_fps_for(processor.camera_config, self.default_fps, share)
+        else:
+            for processor in processors:
+                # An explicit analysisFps is kept as is; the rest scale with their weight
+                base_fps = analysis_fps_for(processor.camera_config, self.default_fps)
+                rates[processor.camera_id] = analysis_fps_for(processor.camera_config,
+                                                              base_fps * weights[processor.camera_id])
+
+        for processor in processors:
+            weight = weights[processor.camera_id]
+            fps = rates[processor.camera_id]
+
+            if weight >= PROTECTED_WEIGHT:
+                min_level, max_level = 0, PROTECTED_MAX_LEVEL
+            elif contention and weight < 1.0:
+                min_level, max_level = CONTENTION_SHED_LEVEL, None
+            else:
+                min_level, max_level = 0, None
+
+            processor.load_controller.set_bounds(min_level, max_level)
+            processor.set_analysis_rate(fps)
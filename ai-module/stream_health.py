@@ -0,0 +1,231 @@
+"""
+Stream Health Manager
+Keeps a camera's VideoCapture alive, reopening it with jittered exponential
+backoff, and tracks per-camera uptime, frame rate and decode errors
+"""
+
+import random
+import requests
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Replay sources (video files and image sequences as cameras) live in the camera module
+sys.path.insert(0, str(Path(__file__).parent.parent / 'camera-module'))
+from replay_source import open_capture
+
+# Configuration
+RECONNECT_BASE_DELAY = 1.0  # seconds before the first reconnect attempt
+RECONNECT_MAX_DELAY = 60.0  # cap for the exponential backoff
+MAX_CONSECUTIVE_READ_FAILURES = 5  # failed reads before the capture is treated as dead
+READ_RETRY_DELAY = 0.1  # seconds between failed reads on an open capture
+STABLE_UPTIME = 30  # seconds online before the backoff resets (stops flapping loops)
+FPS_SMOOTHING = 0.1  # weight of the newest sample in the FPS moving average
+
+
+class StreamHealth:
+    """Health counters for a single camera stream"""
+
+    def __init__(self, camera_id):
+        self.camera_id = camera_id
+        self.online = None  # Unknown until the first open attempt
+        self.online_since = None
+        self.last_frame_time = None
+        self.frames = 0
+        self.decode_errors = 0
+        self.dropped_frames = 0
+        self.reconnects = 0
+        self.fps = 0.0
+
+    def uptime(self):
+        """Seconds since the stream last came online (0 while offline)"""
+        if not self.online or self.online_since is None:
+            return 0.0
+        return time.time() - self.online_since
+
+    def record_frame(self, now):
+        """Register a successfully decoded frame"""
+        if self.last_frame_time is not None:
+            interval = now - self.last_frame_time
+            if interval > 0:
+                instant_fps = 1.0 / interval
+                if self.fps == 0:
+                    self.fps = instant_fps
+                else:
+                    self.fps += FPS_SMOOTHING * (instant_fps - self.fps)
+        self.last_frame_time = now
+        self.frames += 1
+
+    def to_dict(self):
+        """Serializable snapshot for the backend"""
+        return {
+            'online': bool(self.online),
+            'uptimeSeconds': round(self.uptime(), 1),
+            'fps': round(self.fps, 2),
+            'frames': self.frames,
+            'decodeErrors': self.decode_errors,
+            'droppedFrames': self.dropped_frames,
+            'reconnects': self.reconnects,
+            'lastFrameAt': datetime.fromtimestamp(self.last_frame_time).isoformat() if self.last_frame_time else None
+        }
+
+
+class StreamHealthManager:
+    """Owns the VideoCapture of one camera and reopens it when it fails"""
+
+    def __init__(self, camera_id, stream_url, backend_url, camera_name=None):
+        self.camera_id = camera_id
+        self.stream_url = stream_url
+        self.backend_url = backend_url
+        self.camera_name = camera_name or camera_id
+
+        self.capture = None
+        self.health = StreamHealth(camera_id)
+        self.attempt = 0
+        self.consecutive_failures = 0
+        self.opened_once = False
+        self.last_read_seconds = 0.0  # duration of the last successful capture read
+        self._live_frame = None  # frame drain() had to wait for, handed out by the next read()
+        self._stop_event = threading.Event()
+
+    def backoff_delay(self):
+        """Exponential delay for the current attempt with equal jitter"""
+        delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * (2 ** self.attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def open(self):
+        """Try to open the stream once; returns True on success"""
+        self.release()
+        capture = open_capture(self.stream_url)
+
+        if not capture.isOpened():
+            capture.release()
+            print(f"[{self.camera_name}] ❌ Failed to open stream: {self.stream_url}")
+            self._set_online(False)
+            return False
+
+        self.capture = capture
+        self.consecutive_failures = 0
+        if self.opened_once:
+            self.health.reconnects += 1
+        self.opened_once = True
+        print(f"[{self.camera_name}] ✅ Stream opened")
+        return True
+
+    def read(self):
+        """
+        Return the next decoded frame, reconnecting as needed
+
+        Blocks through reconnect backoff and only returns None once stop() has been called.
+        """
+        while not self._stop_event.is_set():
+            if self.capture is None:
+                if not self.open():
+                    self._wait_backoff()
+                    continue
+
+            read_start = time.perf_counter()
+            if self._live_frame is not None:
+                ret, frame, self._live_frame = True, self._live_frame, None
+            else:
+                ret, frame = self.capture.read()
+
+            if ret and frame is not None:
+                self.last_read_seconds = time.perf_counter() - read_start
+                now = time.time()
+                self.consecutive_failures = 0
+                self._set_online(True)
+                self.health.record_frame(now)
+                # Only a stream that stays up earns a fast reconnect next time
+                if self.attempt and self.health.uptime() >= STABLE_UPTIME:
+                    self.attempt = 0
+                return frame
+
+            self.health.decode_errors += 1
+            self.consecutive_failures += 1
+
+            if self.consecutive_failures >= MAX_CONSECUTIVE_READ_FAILURES:
+                print(f"[{self.camera_name}] ⚠️  Stream lost after {self.consecutive_failures} failed reads, reconnecting...")
+                self.release()
+                self._set_online(False)
+                self._wait_backoff()
+            else:
+                self._stop_event.wait(READ_RETRY_DELAY)
+
+        return None
+
+    def drain(self, count, live_seconds=None):
+        """
+        Discard up to `count` buffered frames without decoding them
+
+        With live_seconds, stops at the first grab that had to wait that long: the
+        buffer is empty and the frame is live, so it is kept for the next read().
+
+        Returns:
+            Number of stale frames dropped
+        """
+        if self.capture is None:
+            return 0
+
+        dropped = 0
+        for _ in range(count):
+            grab_start = time.perf_counter()
+            if not self.capture.grab():
+                break
+            if live_seconds is not None and time.perf_counter() - grab_start >= live_seconds:
+                ok, frame = self.capture.retrieve()
+                if ok and frame is not None:
+                    self._live_frame = frame
+                break
+            dropped += 1
+
+        self.health.dropped_frames += dropped
+        return dropped
+
+    def stop(self):
+        """Interrupt any pending backoff and make read() return"""
+        self._stop_event.set()
+
+    def release(self):
+        """Release the underlying capture"""
+        self._live_frame = None
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+    def _wait_backoff(self):
+        delay = self.backoff_delay()
+        self.attempt += 1
+        print(f"[{self.camera_name}] 🔄 Reconnecting in {delay:.1f}s (attempt {self.attempt})")
+        self._stop_event.wait(delay)
+
+    def _set_online(self, online):
+        """Record an online/offline transition and push it to the backend on change"""
+        if self.health.online == online:
+            return
+
+        self.health.online = online
+        self.health.online_since = time.time() if online else None
+        self.push_status()
+
+    def push_status(self):
+        """Send the current online state and health counters to the backend"""
+        payload = {
+            'online': bool(self.health.online),
+            'health': self.health.to_dict()
+        }
+        if self.health.online:
+            payload['lastOnline'] = datetime.now().isoformat()
+
+        try:
+            response = requests.patch(
+                f'{self.backend_url}/api/cameras/{self.camera_id}/status',
+                json=payload,
+                timeout=5
+            )
+            if response.status_code != 200:
+                print(f"[{self.camera_name}] ⚠️  Status update failed: {response.status_code}")
+        except Exception as e:
+            print(f"[{self.camera_name}] ⚠️  Could not push stream status: {e}")
@@ -0,0 +1,63 @@
+"""Load shedding recovers once analysis keeps up with the stream again"""
+import time
+
+import numpy as np
+
+from load_controller import RESTORE_HOLD, LoadController
+from stream_health import StreamHealthManager
+
+
+def test_degraded_camera_recovers_at_realistic_latency():
+    """80 ms analyses on a 25 fps stream: two frames queue behind each one, yet quality comes back"""
+    controller = LoadController(5.0)
+    controller.level = 3
+    now = 0.0
+    while now < 4 * RESTORE_HOLD and controller.level > 0:
+        controller.observe(0.08, backlog=2, now=now)
+        now += 1 / controller.effective_fps()
+
+    assert controller.level == 0
+
+
+def test_overload_still_degrades():
+    controller = LoadController(5.0)
+    for step in range(10):
+        controller.observe(0.5, now=step * 2.5)
+
+    assert controller.level > 0
+
+
+class BufferedCapture:
+    """Live camera stand-in: `buffered` frames are ready, every further grab waits a frame interval"""
+
+    def __init__(self, buffered, interval=0.04):
+        self.buffered = buffered
+        self.interval = interval
+        self.frames = 0
+
+    def grab(self):
+        if self.buffered:
+            self.buffered -= 1
+        else:
+            time.sleep(self.interval)
+        self.frames += 1
+        return True
+
+    def retrieve(self):
+        return True, np.full((2, 2, 3), self.frames, dtype=np.uint8)
+
+    def read(self):
+        self.grab()
+        return self.retrieve()
+
+    def release(self):
+        pass
+
+
+def test_drain_drops_only_buffered_frames_and_keeps_the_live_one():
+    stream = StreamHealthManager('cam', 'rtsp://test', 'http://backend')
+    stream.capture = BufferedCapture(buffered=3)
+
+    assert stream.drain(30, live_seconds=0.02) == 3
+    assert stream.read()[0, 0, 0] == 4  # the live frame drain waited for, not a later one
+    assert stream.health.dropped_frames == 3
@@ -10,12 +10,22 @@ import requests
 import json
 from datetime import datetime
 import time
+import sys
+from pathlib import Path
+
+from frame_sampler import FrameSampler
+
+# Shared pipeline metrics live with the YOLOv8 detector modules
+sys.path.insert(0, str(Path(__file__).parent.parent / 'yolov8-person-detector'))
+from embedders import encoding_version, get_embedder
+from metrics import observe, start_metrics_server, timed
+from run_control import headless_requested, install_control_signals
 
 # Configuration
 API_URL = 'http://localhost:3000'
 CAMERA_ID = 'webcam_0'
 CONFIDENCE_THRESHOLD = 0.6
-PROCESS_EVERY_N_FRAMES = 5  # Process every 5th frame for better performance
+TARGET_ANALYSIS_FPS = 6  # Analyses per second, independent of the camera frame rate
 
 class WebcamDetection:
     def __init__(self):
@@ -23,9 +33,12 @@ class WebcamDetection:
         self.known_face_encodings = []
         self.known_face_names = []
         self.known_face_ids = []
+        self.embedder = get_embedder()  # the configured embedder (embedders.ENCODER_VERSION)
         self.frame_count = 0
+        self.sampler = FrameSampler(TARGET_ANALYSIS_FPS)
         self.last_match_time = {}
         self.match_cooldown = 10  # seconds between matches for same person
+        self.headless = headless_requested()  # no drawing or GUI calls (server processes)
         
     def load_known_faces(self):
         """Load known faces from API (only missing persons)"""
@@ -43,7 +56,10 @@ class WebcamDetection:
                     if person.get('faceEncodings'):
                         for encoding_data in person['faceEncodings']:
                             encoding = encoding_data.get('encoding')
-                            if encoding and len(encoding) == 128:
+                            # Vectors from other embedders cannot be compared with ours
+                            if encoding_version(encoding_data) != self.embedder.version:
+                                continue
+                            if encoding and len(encoding) == self.embedder.size:
                                 self.known_face_encodings.append(np.array(encoding))
                                 self.known_face_names.append(person['name'])
                                 self.known_face_ids.append(str(person['_id']))
@@ -100,7 +116,8 @@ class WebcamDetection:
                 }
             }
             
-            response = requests.post(f'{API_URL}/api/recognize', json=data)
+            with timed('dispatch', CAMERA_ID):
+                response = requests.post(f'{API_URL}/api/recognize', json=data)
             
             if response.status_code == 200:
                 print(f"✅ Match reported: {person_name} (similarity: {similarity:.2f})")
@@ -114,33 +131,36 @@ class WebcamDetection:
     def process_frame(self, frame):
         """Process a single frame for face detection and recognition"""
         # Resize frame for faster processing
-        small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        with timed('resize', CAMERA_ID):
+            small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
+            rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
         
         # Find faces
-        face_locations = face_recognition.face_locations(rgb_small_frame, model='hog')
-        face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
+        with timed('face_detection', CAMERA_ID):
+            face_locations = face_recognition.face_locations(rgb_small_frame, model='hog')
+        with timed('encoding', CAMERA_ID):
+            face_encodings = self.embedder.embed(rgb_small_frame, face_locations)
         
         face_names = []
         face_similarities = []
         
         for face_encoding in face_encodings:
-            matches = face_recognition.compare_faces(
-                self.known_face_encodings, 
-                face_encoding, 
-                tolerance=CONFIDENCE_THRESHOLD
-            )
-            name = "Unknown"
-            similarity = 0.0
-            person_id = None
-            
-            if len(self.known_face_encodings) > 0:
+            with timed('matching', CAMERA_ID):
+                matches = face_recognition.compare_faces(
+                    self.known_face_encodings, 
+                    face_encoding, 
+                    tolerance=CONFIDENCE_THRESHOLD
+                )
                 # Calculate face distances
                 face_distances = face_recognition.face_distance(
                     self.known_face_encodings, 
                     face_encoding
                 )
-                
+            name = "Unknown"
+            similarity = 0.0
+            person_id = None
+            
+            if len(self.known_face_encodings) > 0:
                 if len(face_distances) > 0:
                     best_match_index = np.argmin(face_distances)
                     
@@ -200,6 +220,10 @@ class WebcamDetection:
         print("Webcam Face Detection & Recognition")
         print("=" * 50)
         
+        # Per-stage latency histograms (and /control for headless runs)
+        start_metrics_server()
+        control = install_control_signals()
+        
         # Load known faces
         if not self.load_known_faces():
             print("⚠️  Warning: No known faces loaded. Will only detect faces.")
@@ -210,27 +234,43 @@ class WebcamDetection:
             return
         
         print("\n✅ System ready!")
-        print("Press 'q' to quit")
-        print("Press 'r' to reload known faces")
+        if self.headless:
+            print("Headless: stop with SIGTERM or POST /control/stop, reload with SIGHUP or POST /control/reload")
+        else:
+            print("Press 'q' to quit")
+            print("Press 'r' to reload known faces")
         print("=" * 50)
         
         try:
-            while True:
+            while not control.stopping:
+                read_start = time.perf_counter()
                 ret, frame = self.video_capture.read()
+                capture_time = time.monotonic()
                 
                 if not ret:
                     print("❌ Failed to grab frame")
                     break
+                observe('decode', CAMERA_ID, time.perf_counter() - read_start)
                 
-                # Process every Nth frame
-                if self.frame_count % PROCESS_EVERY_N_FRAMES == 0:
+                # Reload requested by SIGHUP or /control/reload
+                if control.take_reload():
+                    print("\n🔄 Reloading known faces...")
+                    self.load_known_faces()
+                
+                # Analyse frames at the target rate based on capture time
+                if self.sampler.should_process(capture_time):
                     face_locations, face_names, face_similarities = self.process_frame(frame)
                     
                     # Draw results
-                    frame = self.draw_results(frame, face_locations, face_names, face_similarities)
+                    if not self.headless:
+                        frame = self.draw_results(frame, face_locations, face_names, face_similarities)
                 
                 self.frame_count += 1
                 
+                # Headless: no window or key polling between analyses
+                if self.headless:
+                    continue
+                
                 # Display frame
                 cv2.imshow('Webcam Face Detection', frame)
                 
@@ -251,7 +291,8 @@ class WebcamDetection:
             # Cleanup
             if self.video_capture:
                 self.video_capture.release()
-            cv2.destroyAllWindows()
+            if not self.headless:
+                cv2.destroyAllWindows()
             print("✅ Camera released")
 
 
@@ -15,10 +15,21 @@ import sys
 import os
 from pathlib import Path
 
+from frame_sampler import FrameSampler
+
 # Add yolov8-person-detector to path
 yolo_path = Path(__file__).parent.parent / 'yolov8-person-detector'
 sys.path.insert(0, str(yolo_path))
 
+from embedders import encoding_version, get_embedder
+from face_quality import select_faces
+from face_stage import find_faces_in_frame
+from frame_context import FrameContext
+from gallery import best_matches
+from metrics import observe, start_metrics_server, timed
+from preview_server import preview_channel, start_preview_server
+from run_control import headless_requested, install_control_signals
+
 try:
     from ultralytics import YOLO
     YOLO_AVAILABLE = True
@@ -31,10 +42,11 @@ API_URL = 'http://localhost:3000'
 CAMERA_ID = 'yolo_surveillance'
 CAMERA_NAME = 'Main Entrance Camera'  # Name of the camera
 CAMERA_LOCATION = 'Building A - Main Entrance'  # Physical location of the camera
-YOLO_MODEL_PATH = str(yolo_path / 'yolov8n.pt')
+YOLO_MODEL = 'yolov8n.pt'  # Options: yolov8n.pt, yolov8n-pose.pt (keypoints locate faces without a face detector pass)
+YOLO_MODEL_PATH = str(yolo_path / YOLO_MODEL)
 CONFIDENCE_THRESHOLD = 0.40  # Lowered for better detection (was 0.45)
 YOLO_CONFIDENCE = 0.5
-PROCESS_EVERY_N_FRAMES = 2
+TARGET_ANALYSIS_FPS = 15  # Analyses per second, independent of the camera frame rate
 CHECK_DATABASE_INTERVAL = 30
 MATCH_COOLDOWN = 10
 
@@ -46,9 +58,14 @@ class YOLOIntegratedSurveillance:
         self.known_face_names = []
         self.known_face_ids = []
         self.frame_count = 0
+        self.sampler = FrameSampler(TARGET_ANALYSIS_FPS)
+        self.frame_context = FrameContext()
+        self.embedder = get_embedder()
         self.last_match_time = {}
         self.last_database_check = 0
         self.running = False
+        self.headless = headless_requested()  # no drawing or GUI calls (server processes)
+        self.preview = preview_channel(CAMERA_ID)
         
     def initialize_yolo(self):
         """Initialize YOLOv8 model"""
@@ -88,7 +105,10 @@ class YOLOIntegratedSurveillance:
                     if person.get('faceEncodings') and len(person['faceEncodings']) > 0:
                         for encoding_data in person['faceEncodings']:
                             encoding = encoding_data.get('encoding')
-                            if encoding and len(encoding) == 128:
+                            # Only vectors from the same embedder are comparable
+                            if encoding_version(encoding_data) != self.embedder.version:
+                                continue
+                            if encoding and len(encoding) == self.embedder.size:
                                 self.known_face_encodings.append(np.array(encoding))
                                 self.known_face_names.append(person['name'])
                                 self.known_face_ids.append(str(person['_id']))
@@ -136,22 +156,22 @@ class YOLOIntegratedSurveillance:
             return []
         
         try:
-            results = self.yolo_model(frame, conf=YOLO_CONFIDENCE, classes=[0], verbose=False)
+            with timed('yolo', CAMERA_ID):
+                results = self.yolo_model(frame, conf=YOLO_CONFIDENCE, classes=[0], verbose=False)
             
             detections = []
             for result in results:
                 boxes = result.boxes
-                for box in boxes:
+                # Pose models also return 17 COCO keypoints per person
+                keypoints = result.keypoints.data.cpu().numpy() if result.keypoints is not None else None
+                for index, box in enumerate(boxes):
                     x1, y1, x2, y2 = map(int, box.xyxy[0])
                     conf = float(box.conf[0])
                     
-                    # Crop person region
-                    cropped = frame[y1:y2, x1:x2]
-                    
                     detections.append({
                         'bbox': (x1, y1, x2, y2),
                         'confidence': conf,
-                        'cropped': cropped
+                        'keypoints': keypoints[index] if keypoints is not None else None
                     })
             
             return detections
@@ -159,60 +179,51 @@ class YOLOIntegratedSurveillance:
             print(f"❌ YOLO detection error: {e}")
             return []
     
-    def detect_faces_in_person(self, person_image):
-        """Detect and match faces in person crop"""
+    def detect_faces_in_persons(self, frame, bboxes, keypoints=None):
+        """
+        Detect and match the faces of all detected persons (frame: FrameContext or BGR image)
+        
+        Pose keypoints (one entry per box, may be None) give face boxes directly.
+        Returns one (name, similarity, person_id) per box: the best match among the
+        person's faces, or (None, 0.0, None)
+        """
+        results = [(None, 0.0, None)] * len(bboxes)
+        if len(self.known_face_encodings) == 0:
+            return results
+        
         try:
-            # Resize if too large
-            if person_image.shape[0] > 500:
-                scale = 500 / person_image.shape[0]
-                person_image = cv2.resize(person_image, None, fx=scale, fy=scale)
-            
-            rgb_image = cv2.cvtColor(person_image, cv2.COLOR_BGR2RGB)
+            # Search each head area once; every face belongs to exactly one person
+            with timed('face_detection', CAMERA_ID):
+                faces = find_faces_in_frame(frame, bboxes, keypoints=keypoints)
             
-            # Find faces
-            face_locations = face_recognition.face_locations(rgb_image, model='hog')
-            
-            if len(face_locations) == 0:
-                return None, 0.0, None
+            # Skip tiny, blurred, badly exposed or profile faces before encoding
+            faces = select_faces(faces)
+            if not faces:
+                return results
             
             # Get face encodings
-            face_encodings = face_recognition.face_encodings(rgb_image, face_locations)
-            
-            if len(face_encodings) == 0:
-                return None, 0.0, None
-            
-            # Match against known faces
-            face_encoding = face_encodings[0]
-            
-            if len(self.known_face_encodings) == 0:
-                return None, 0.0, None
-            
-            matches = face_recognition.compare_faces(
-                self.known_face_encodings,
-                face_encoding,
-                tolerance=CONFIDENCE_THRESHOLD
-            )
+            with timed('encoding', CAMERA_ID):
+                face_encodings = [self.embedder.embed(face['rgb'], [face['location']], landmarks=[face.get('landmarks')])
+                                  for face in faces]
+            faces = [face for face, encodings in zip(faces, face_encodings) if len(encodings)]
+            face_encodings = [encodings[0] for encodings in face_encodings if len(encodings)]
+            if not face_encodings:
+                return results
             
-            face_distances = face_recognition.face_distance(
-                self.known_face_encodings,
-                face_encoding
-            )
+            # Match all faces against known faces in one lookup
+            with timed('matching', CAMERA_ID):
+                indices, distances = best_matches(self.known_face_encodings, face_encodings)
             
-            if len(face_distances) > 0:
-                best_match_index = np.argmin(face_distances)
-                
-                if matches[best_match_index]:
-                    name = self.known_face_names[best_match_index]
-                    person_id = self.known_face_ids[best_match_index]
-                    similarity = 1.0 - face_distances[best_match_index]
-                    
-                    return name, similarity, person_id
+            for face, index, distance in zip(faces, indices, distances):
+                similarity = 1.0 - distance
+                if distance <= CONFIDENCE_THRESHOLD and similarity > results[face['owner']][1]:
+                    results[face['owner']] = (self.known_face_names[index], similarity, self.known_face_ids[index])
             
-            return None, 0.0, None
+            return results
             
         except Exception as e:
             print(f"❌ Face detection error: {e}")
-            return None, 0.0, None
+            return results
     
     def send_detection_alert(self, person_id, person_name, similarity, bbox):
         """Send detection alert to API"""
@@ -237,7 +248,8 @@ class YOLOIntegratedSurveillance:
                 }
             }
             
-            response = requests.post(f'{API_URL}/api/recognize', json=data, timeout=5)
+            with timed('dispatch', CAMERA_ID):
+                response = requests.post(f'{API_URL}/api/recognize', json=data, timeout=5)
             
             if response.status_code == 200:
                 print(f"🚨 ALERT: {person_name} detected! (confidence: {similarity:.2%})")
@@ -290,6 +302,13 @@ class YOLOIntegratedSurveillance:
         print(f"Face Confidence: {CONFIDENCE_THRESHOLD}")
         print("=" * 70)
         
+        # Per-stage latency histograms (and /control for headless runs)
+        start_metrics_server()
+        control = install_control_signals()
+        
+        # Annotated MJPEG preview, rendered only while somebody watches
+        start_preview_server()
+        
         # Initialize YOLO
         yolo_enabled = self.initialize_yolo()
         if not yolo_enabled:
@@ -306,60 +325,85 @@ class YOLOIntegratedSurveillance:
         
         print("\n✅ SURVEILLANCE ACTIVE")
         print("=" * 70)
-        print("Controls: 'q' - Quit | 'r' - Reload | 's' - Show/Hide")
+        if self.headless:
+            print("Headless: no window; stop with SIGTERM or POST /control/stop, reload with SIGHUP or POST /control/reload")
+        else:
+            print("Controls: 'q' - Quit | 'r' - Reload | 's' - Show/Hide")
         print("=" * 70)
         
         self.running = True
-        show_window = True
+        show_window = not self.headless
         fps_start = time.time()
         fps_counter = 0
         fps = 0
         
         try:
-            while self.running:
+            while self.running and not control.stopping:
+                read_start = time.perf_counter()
                 ret, frame = self.video_capture.read()
+                capture_time = time.monotonic()
                 
                 if not ret:
                     print("❌ Failed to grab frame")
-                    time.sleep(0.1)
+                    control.wait(0.1)
                     continue
+                observe('decode', CAMERA_ID, time.perf_counter() - read_start)
                 
-                # Check database reload
-                if time.time() - self.last_database_check > CHECK_DATABASE_INTERVAL:
+                # Check database reload (periodic, or requested by SIGHUP / /control/reload)
+                if control.take_reload():
+                    print("\n🔄 Reloading persons...")
+                    self.load_persons_from_api()
+                elif time.time() - self.last_database_check > CHECK_DATABASE_INTERVAL:
                     self.load_persons_from_api()
                 
-                # Process frame
-                if self.frame_count % PROCESS_EVERY_N_FRAMES == 0:
+                # Process frame at the target analysis rate
+                if self.sampler.should_process(capture_time):
+                    # Annotate only for the window or a preview viewer
+                    publish_preview = self.preview.wants_frame()
+                    render = show_window or publish_preview
+                    
+                    # Detections share one colour conversion and downscale of the frame
+                    self.frame_context.update(frame)
+                    
                     if yolo_enabled:
                         # Use YOLO for person detection
                         detections = self.detect_persons_yolo(frame)
                         
                         # Match faces in detected persons
-                        matches = []
-                        for detection in detections:
-                            name, similarity, person_id = self.detect_faces_in_person(detection['cropped'])
-                            matches.append((name, similarity, person_id))
-                            
+                        matches = self.detect_faces_in_persons(
+                            self.frame_context,
+                            [detection['bbox'] for detection in detections],
+                            [detection['keypoints'] for detection in detections]
+                        )
+                        for detection, (name, similarity, person_id) in zip(detections, matches):
                             # Send alert if matched
                             if name and similarity >= CONFIDENCE_THRESHOLD:
                                 self.send_detection_alert(person_id, name, similarity, detection['bbox'])
                         
                         # Draw detections
-                        if show_window:
+                        if render:
                             frame = self.draw_detections(frame, detections, matches)
                     else:
                         # Fallback to basic face detection
-                        small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-                        rgb_small = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-                        face_locations = face_recognition.face_locations(rgb_small)
+                        with timed('resize', CAMERA_ID):
+                            rgb_small = self.frame_context.rgb(2)  # quarter resolution
+                        with timed('face_detection', CAMERA_ID):
+                            face_locations = face_recognition.face_locations(rgb_small)
                         
-                        if show_window and len(face_locations) > 0:
+                        if render and len(face_locations) > 0:
                             for (top, right, bottom, left) in face_locations:
                                 top, right, bottom, left = top*4, right*4, bottom*4, left*4
                                 cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
+                    
+                    if publish_preview:
+                        self.preview.publish(frame)
                 
                 self.frame_count += 1
                 
+                # Headless: no FPS overlay, window or key polling between analyses
+                if self.headless:
+                    continue
+                
                 # Calculate FPS
                 fps_counter += 1
                 if fps_counter >= 30:
@@ -399,7 +443,8 @@ class YOLOIntegratedSurveillance:
         self.running = False
         if self.video_capture:
             self.video_capture.release()
-        cv2.destroyAllWindows()
+        if not self.headless:
+            cv2.destroyAllWindows()
         print("✅ Surveillance stopped")
 
 
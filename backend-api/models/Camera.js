@@ -46,6 +46,18 @@ const cameraSchema = new mongoose.Schema({
     type: Number,
     default: 30
   },
+  // Share of surveillance compute this camera gets relative to others
+  importance: {
+    type: String,
+    enum: ['low', 'normal', 'high', 'critical'],
+    default: 'normal'
+  },
+  // Target analyses per second for surveillance (unset = node default or shared budget;
+  // with a node budget it is capped at the camera's importance-weighted share)
+  analysisFps: {
+    type: Number,
+    min: 0
+  },
   description: {
     type: String,
     trim: true
@@ -58,6 +70,24 @@ const cameraSchema = new mongoose.Schema({
     type: Date,
     default: Date.now
   },
+  // Stream health reported by the surveillance workers
+  online: {
+    type: Boolean,
+    default: false
+  },
+  health: {
+    uptimeSeconds: Number,
+    fps: Number,
+    frames: Number,
+    decodeErrors: Number,
+    droppedFrames: Number,
+    reconnects: Number,
+    queueDepth: Number,
+    qualityLevel: Number,
+    cacheHitRate: Number,
+    encoderMsSaved: Number,
+    lastFrameAt: Date
+  },
   createdBy: {
     type: mongoose.Schema.Types.ObjectId,
     ref: 'User'
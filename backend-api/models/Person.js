@@ -47,6 +47,11 @@ const personSchema = new mongoose.Schema({
       type: [Number],
       required: true
     },
+    // Embedder that produced the vector; only vectors of the same version are compared
+    encoderVersion: {
+      type: String,
+      default: 'dlib-v1'
+    },
     uploadedAt: {
       type: Date,
       default: Date.now
@@ -54,6 +54,19 @@ const reportSchema = new mongoose.Schema({
       y2: Number
     }
   },
+  // Pipeline latency reported by the surveillance worker plus time spent here (milliseconds)
+  latency: {
+    capturedAt: Date,
+    stagesMs: {
+      type: Map,
+      of: Number
+    },
+    captureToDispatchMs: Number,
+    backendMs: Number,
+    captureToReportMs: Number,
+    sloMs: Number,
+    withinSlo: Boolean
+  },
   screenshot: {
     url: String,
     uploadedAt: Date
@@ -105,5 +118,6 @@ reportSchema.index({ person: 1, createdAt: -1 });
 reportSchema.index({ 'detectionInfo.cameraId': 1, 'detectionInfo.timestamp': -1 });
 reportSchema.index({ verificationStatus: 1 });
 reportSchema.index({ createdAt: -1 });
+reportSchema.index({ 'latency.withinSlo': 1, createdAt: -1 });
 
 module.exports = mongoose.model('Report', reportSchema);
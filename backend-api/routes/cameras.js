@@ -211,10 +211,73 @@ router.delete('/:id', authenticate, authorize(['admin']), async (req, res) => {
   }
 });
 
+// Bulk heartbeat: one request carries the status of every camera on a surveillance node
+router.patch('/status/bulk', async (req, res) => {
+  try {
+    const { cameras } = req.body;
+    
+    if (!Array.isArray(cameras) || cameras.length === 0) {
+      return res.status(400).json({
+        error: 'Array of camera status entries is required'
+      });
+    }
+    
+    const operations = cameras
+      .filter(entry => entry && entry.cameraId)
+      .map(entry => {
+        const update = {};
+        
+        if (entry.status) {
+          update.status = entry.status;
+        }
+        if (typeof entry.online === 'boolean') {
+          update.online = entry.online;
+        }
+        if (entry.health) {
+          update.health = entry.health;
+        }
+        if (entry.lastOnline) {
+          update.lastOnline = new Date(entry.lastOnline);
+        } else if (entry.online !== false) {
+          update.lastOnline = new Date();
+        }
+        update.updatedAt = new Date();
+        
+        return {
+          updateOne: {
+            filter: { cameraId: entry.cameraId },
+            update: { $set: update }
+          }
+        };
+      });
+    
+    if (operations.length === 0) {
+      return res.status(400).json({
+        error: 'Each entry requires a cameraId'
+      });
+    }
+    
+    const result = await Camera.bulkWrite(operations, { ordered: false });
+    
+    res.json({
+      message: 'Camera statuses updated',
+      total: operations.length,
+      matched: result.matchedCount,
+      modified: result.modifiedCount
+    });
+    
+  } catch (error) {
+    console.error('Bulk camera status error:', error);
+    res.status(500).json({
+      error: error.message || 'Error updating camera statuses'
+    });
+  }
+});
+
 // Update camera status (for heartbeat/monitoring)
 router.patch('/:id/status', async (req, res) => {
   try {
-    const { status, lastOnline } = req.body;
+    const { status, lastOnline, online, health } = req.body;
     
     let camera;
     
@@ -238,9 +301,18 @@ router.patch('/:id/status', async (req, res) => {
       camera.status = status;
     }
     
+    if (typeof online === 'boolean') {
+      camera.online = online;
+    }
+    
+    if (health) {
+      camera.health = health;
+    }
+    
+    // An offline transition must not bump lastOnline
     if (lastOnline) {
       camera.lastOnline = new Date(lastOnline);
-    } else {
+    } else if (online !== false) {
       camera.lastOnline = new Date();
     }
     
@@ -265,7 +337,7 @@ router.get('/active/list', async (req, res) => {
     const cameras = await Camera.find({
       isActive: true,
       status: 'active'
-    }).select('cameraId name location streamUrl resolution fps');
+    }).select('cameraId name location streamUrl resolution fps analysisFps importance');
     
     res.json({
       cameras,
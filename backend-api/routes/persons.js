@@ -8,6 +8,7 @@ const router = express.Router();
 const Person = require('../models/Person');
 const { authenticate, authorize } = require('../middleware/auth');
 const recognitionRouter = require('./recognition');
+const { DEFAULT_ENCODER_VERSION } = require('../utils/faceUtils');
 
 // Get all persons (no auth required for surveillance system)
 router.get('/', async (req, res) => {
@@ -180,7 +181,7 @@ router.delete('/:id', authenticate, authorize(['admin']), async (req, res) => {
 // Add face encoding to person
 router.post('/:id/encodings', authenticate, authorize(['admin', 'operator']), async (req, res) => {
   try {
-    const { encoding, imageUrl } = req.body;
+    const { encoding, imageUrl, encoderVersion } = req.body;
     
     if (!encoding || !Array.isArray(encoding)) {
       return res.status(400).json({
@@ -199,6 +200,7 @@ router.post('/:id/encodings', authenticate, authorize(['admin', 'operator']), as
     person.faceEncodings.push({
       encoding,
       imageUrl,
+      encoderVersion: encoderVersion || DEFAULT_ENCODER_VERSION,
       uploadedAt: new Date()
     });
     
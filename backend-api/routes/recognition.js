@@ -9,12 +9,13 @@ const Person = require('../models/Person');
 const Report = require('../models/Report');
 const Camera = require('../models/Camera');
 const { sendNotification } = require('../services/firebase');
-const { calculateSimilarity } = require('../utils/faceUtils');
+const { calculateSimilarity, isValidEncoding, encoderVersionOf, DEFAULT_ENCODER_VERSION } = require('../utils/faceUtils');
 
 // In-memory cache for person encodings (refreshed periodically)
 let personsCache = null;
 let cacheTimestamp = 0;
 const CACHE_TTL = 30000; // 30 seconds cache
+const ALERT_LATENCY_SLO_MS = parseFloat(process.env.ALERT_LATENCY_SLO_MS) || 2000; // capture to stored report
 
 // Function to get cached persons or fetch from database
 async function getCachedPersons() {
@@ -45,15 +46,36 @@ function invalidateCache() {
   cacheTimestamp = 0;
 }
 
+// Capture-to-report latency from the worker's timings plus this request's processing time
+function reportLatency(timings, receivedAt) {
+  if (!timings || typeof timings.captureToDispatchMs !== 'number') {
+    return undefined;
+  }
+  
+  const backendMs = Date.now() - receivedAt;
+  const captureToReportMs = timings.captureToDispatchMs + backendMs;
+  return {
+    capturedAt: timings.capturedAt ? new Date(timings.capturedAt) : undefined,
+    stagesMs: timings.stagesMs || {},
+    captureToDispatchMs: timings.captureToDispatchMs,
+    backendMs,
+    captureToReportMs,
+    sloMs: ALERT_LATENCY_SLO_MS,
+    withinSlo: captureToReportMs <= ALERT_LATENCY_SLO_MS
+  };
+}
+
 // Face recognition endpoint
 router.post('/', async (req, res) => {
+  const receivedAt = Date.now();
   try {
-    const { encoding, metadata } = req.body;
+    const { encoding, metadata, timings } = req.body;
+    const encoderVersion = req.body.encoderVersion || DEFAULT_ENCODER_VERSION;
     
     // Validate input
-    if (!encoding || !Array.isArray(encoding) || encoding.length !== 128) {
+    if (!isValidEncoding(encoding)) {
       return res.status(400).json({
-        error: 'Valid face encoding (128-dimensional vector) is required'
+        error: 'Valid face encoding vector is required'
       });
     }
     
@@ -86,6 +108,9 @@ router.post('/', async (req, res) => {
       if (!person.faceEncodings || person.faceEncodings.length === 0) continue;
       
       for (const storedEncoding of person.faceEncodings) {
+        // Vectors from different embedders are not comparable
+        if (encoderVersionOf(storedEncoding) !== encoderVersion) continue;
+        
         const similarity = calculateSimilarity(encoding, storedEncoding.encoding);
         
         // Early exit if perfect match found
@@ -142,6 +167,14 @@ router.post('/', async (req, res) => {
         reportData.camera = camera._id;
       }
       
+      const latency = reportLatency(timings, receivedAt);
+      if (latency) {
+        reportData.latency = latency;
+        if (!latency.withinSlo) {
+          console.warn(`⏰ Report for ${metadata?.camera_id || 'unknown camera'} ${latency.captureToReportMs.toFixed(0)} ms after capture (SLO ${ALERT_LATENCY_SLO_MS} ms)`);
+        }
+      }
+      
       const report = new Report(reportData);
       
       await report.save();
@@ -231,8 +264,9 @@ router.post('/batch', async (req, res) => {
     for (const item of encodings) {
       // Process each encoding (simplified version)
       const { encoding, metadata } = item;
+      const encoderVersion = item.encoderVersion || DEFAULT_ENCODER_VERSION;
       
-      if (!encoding || !Array.isArray(encoding) || encoding.length !== 128) {
+      if (!isValidEncoding(encoding)) {
         results.push({
           match_found: false,
           error: 'Invalid encoding'
@@ -253,6 +287,8 @@ router.post('/batch', async (req, res) => {
       
       for (const person of persons) {
         for (const storedEncoding of person.faceEncodings) {
+          if (encoderVersionOf(storedEncoding) !== encoderVersion) continue;
+          
           const similarity = calculateSimilarity(encoding, storedEncoding.encoding);
           
           if (similarity > bestSimilarity && similarity >= threshold) {
@@ -198,7 +198,8 @@ router.get('/stats/summary', authenticate, async (req, res) => {
       confirmedReports,
       falsePositives,
       pendingReports,
-      reportsPerCamera
+      reportsPerCamera,
+      latencyPerCamera
     ] = await Promise.all([
       Report.countDocuments(dateFilter),
       Report.countDocuments({ ...dateFilter, verificationStatus: 'confirmed' }),
@@ -208,6 +209,20 @@ router.get('/stats/summary', authenticate, async (req, res) => {
         { $match: dateFilter },
         { $group: { _id: '$detectionInfo.cameraId', count: { $sum: 1 } } },
         { $sort: { count: -1 } }
+      ]),
+      // Capture-to-report latency of reports from traced workers
+      Report.aggregate([
+        { $match: { ...dateFilter, 'latency.captureToReportMs': { $exists: true } } },
+        {
+          $group: {
+            _id: '$detectionInfo.cameraId',
+            reports: { $sum: 1 },
+            avgCaptureToReportMs: { $avg: '$latency.captureToReportMs' },
+            maxCaptureToReportMs: { $max: '$latency.captureToReportMs' },
+            withinSlo: { $sum: { $cond: ['$latency.withinSlo', 1, 0] } }
+          }
+        },
+        { $sort: { avgCaptureToReportMs: -1 } }
       ])
     ]);
     
@@ -216,7 +231,8 @@ router.get('/stats/summary', authenticate, async (req, res) => {
       confirmedReports,
       falsePositives,
       pendingReports,
-      reportsPerCamera
+      reportsPerCamera,
+      latencyPerCamera
     });
     
   } catch (error) {
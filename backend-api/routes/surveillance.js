@@ -26,8 +26,8 @@ router.post('/start', authenticate, (req, res) => {
         // Path to surveillance script
         const scriptPath = path.join(__dirname, '../../ai-module/yolo_integrated_surveillance.py');
         
-        // Start surveillance process
-        surveillanceProcess = spawn('python', [scriptPath], {
+        // Start surveillance process headless: no windows on a server, SIGTERM stops it cleanly
+        surveillanceProcess = spawn('python', [scriptPath, '--headless'], {
             detached: false,
             stdio: 'pipe'
         });
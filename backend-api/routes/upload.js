@@ -11,6 +11,7 @@ const fs = require('fs');
 const { spawn } = require('child_process');
 const Person = require('../models/Person');
 const { authenticate } = require('../middleware/auth');
+const { DEFAULT_ENCODER_VERSION } = require('../utils/faceUtils');
 
 // Configure multer for file uploads - use memory storage for cloud deployment
 const storage = multer.memoryStorage(); // Store in memory instead of disk
@@ -153,6 +154,7 @@ router.post('/person/:id/add-encoding', authenticate, upload.single('photo'), as
     // Add encoding to person
     person.faceEncodings.push({
       encoding: result.encoding,
+      encoderVersion: result.encoderVersion || DEFAULT_ENCODER_VERSION,
       imageUrl: `/uploads/${req.file.filename}`,
       uploadedAt: new Date()
     });
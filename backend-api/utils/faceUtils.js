@@ -3,6 +3,14 @@
  * Helper functions for face encoding comparison
  */
 
+// Version of stored encodings that predate encoder version tags
+const DEFAULT_ENCODER_VERSION = 'dlib-v1';
+
+/**
+ * Embedder version of a stored face encoding entry
+ */
+const encoderVersionOf = (storedEncoding) => storedEncoding.encoderVersion || DEFAULT_ENCODER_VERSION;
+
 /**
  * Calculate Euclidean distance between two vectors (optimized)
  */
@@ -168,7 +176,8 @@ const isValidEncoding = (encoding) => {
     return false;
   }
   
-  if (encoding.length !== 128) {
+  // Length depends on the embedder (dlib: 128)
+  if (encoding.length === 0) {
     return false;
   }
   
@@ -177,6 +186,8 @@ const isValidEncoding = (encoding) => {
 };
 
 module.exports = {
+  DEFAULT_ENCODER_VERSION,
+  encoderVersionOf,
   euclideanDistance,
   cosineSimilarity,
   calculateSimilarity,
@@ -12,6 +12,8 @@ import threading
 from queue import Queue
 from datetime import datetime
 
+from replay_source import open_capture
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -57,6 +59,9 @@ class CameraService:
         """
         Initialize all camera sources
         
+        Sources are device indexes, stream URLs or replay: sources
+        (e.g. "replay:/data/lobby.mp4?mode=realtime&loop=1")
+        
         Returns:
             bool: True if at least one camera initialized successfully
         """
@@ -66,7 +71,7 @@ class CameraService:
         for idx, source in enumerate(camera_sources):
             camera_id = f"camera_{idx}"
             try:
-                cap = cv2.VideoCapture(source)
+                cap = open_capture(source)
                 
                 if not cap.isOpened():
                     logger.error(f"Failed to open camera source: {source}")
@@ -102,18 +107,23 @@ class CameraService:
         
         while self.running:
             try:
+                read_start = time.perf_counter()
                 ret, frame = cap.read()
+                read_seconds = time.perf_counter() - read_start
+                captured_at = time.monotonic()
                 
                 if not ret:
                     logger.warning(f"Failed to read frame from {camera_id}")
                     time.sleep(0.1)
                     continue
                 
-                # Add timestamp to frame metadata
+                # Add timestamps to frame metadata (captured_at is monotonic, for latency tracing)
                 frame_data = {
                     'frame': frame,
                     'timestamp': datetime.now().isoformat(),
-                    'camera_id': camera_id
+                    'captured_at': captured_at,
+                    'camera_id': camera_id,
+                    'read_seconds': read_seconds
                 }
                 
                 # Add to queue (non-blocking)
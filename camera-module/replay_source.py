@@ -0,0 +1,241 @@
+"""
+Replay Source - Video Files and Image Sequences as Cameras
+Plays recorded footage through the cv2.VideoCapture interface so the whole
+pipeline can be load-tested and compared on identical input without devices
+"""
+
+import cv2
+import glob
+import logging
+import os
+import threading
+import time
+from typing import List, Optional, Union
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+REPLAY_SCHEME = 'replay:'  # e.g. replay:/data/lobby.mp4?mode=realtime&loop=1
+REPLAY_MODES = ('realtime', 'fast', 'fixed')
+DEFAULT_FPS = 25.0  # pacing for image sequences and videos without a frame rate
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class ReplayCapture:
+    """
+    cv2.VideoCapture stand-in that replays a video file or an image sequence
+
+    Modes:
+        realtime: frames come at the source frame rate, like a live camera
+        fast: frames come as fast as they can be decoded
+        fixed: frames come at a given fps
+
+    Paced modes behave like a buffered stream: read() waits for the next frame
+    to be due, while grab() only skips frames that are already due, so frame
+    dropping in the consumer works as it does on a network stream.
+    """
+
+    def __init__(self, source: str, mode: str = 'realtime', fps: Optional[float] = None,
+                 loop: bool = True, start: int = 0):
+        """
+        Args:
+            source: Video file, image directory or glob pattern of images
+            mode: 'realtime', 'fast' or 'fixed'
+            fps: Frame rate for 'fixed' mode (overrides the source rate in 'realtime')
+            loop: Start over at the end instead of reporting end of stream
+            start: First frame to play (offsets copies of the same clip)
+        """
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode '{mode}' (use one of {', '.join(REPLAY_MODES)})")
+        if mode == 'fixed' and not fps:
+            raise ValueError("Replay mode 'fixed' needs an fps")
+
+        self.source = source
+        self.mode = mode
+        self.loop = loop
+        self.images: List[str] = self._image_files(source)
+        self.video: Optional[cv2.VideoCapture] = None
+
+        if not self.images:
+            self.video = cv2.VideoCapture(source)
+            if not self.video.isOpened():
+                logger.error(f"Replay source not found or unreadable: {source}")
+                self.video.release()
+                self.video = None
+
+        source_fps = self.video.get(cv2.CAP_PROP_FPS) if self.video is not None else 0
+        self.fps = float(fps or source_fps or DEFAULT_FPS)
+        self.frame_count = len(self.images) if self.images else (
+            int(self.video.get(cv2.CAP_PROP_FRAME_COUNT)) if self.video is not None else 0)
+        self.width, self.height = self._frame_size()
+
+        self.position = 0  # index of the next frame within the source
+        self.delivered = 0  # frames handed out or skipped since start (drives pacing)
+        self.started_at = None
+        self._lock = threading.Lock()
+        if start:
+            self._seek(start % self.frame_count if self.frame_count else 0)
+
+    @staticmethod
+    def _image_files(source: str) -> List[str]:
+        if os.path.isdir(source):
+            return sorted(
+                os.path.join(source, name) for name in os.listdir(source)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        if any(char in source for char in '*?['):
+            return sorted(path for path in glob.glob(source) if path.lower().endswith(IMAGE_EXTENSIONS))
+        return []
+
+    def _frame_size(self):
+        if self.video is not None:
+            return int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if self.images:
+            first = cv2.imread(self.images[0])
+            if first is not None:
+                return first.shape[1], first.shape[0]
+        return 0, 0
+
+    def _seek(self, position: int):
+        self.position = position
+        if self.video is not None:
+            self.video.set(cv2.CAP_PROP_POS_FRAMES, position)
+
+    def _rewind(self) -> bool:
+        """Back to the first frame if looping; False at the end of a non-looping replay"""
+        if not self.loop:
+            return False
+        self._seek(0)
+        return True
+
+    def _wait_until_due(self):
+        if self.mode == 'fast':
+            return
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        delay = self.started_at + self.delivered / self.fps - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _next_is_due(self) -> bool:
+        if self.mode == 'fast':
+            return True
+        return self.started_at is not None and self.started_at + self.delivered / self.fps <= time.monotonic()
+
+    def _advance(self, decode: bool):
+        """Step past the next frame, decoding it if asked; returns (ok, frame)"""
+        for _ in range(2):  # a second try after rewinding at the end
+            if self.images:
+                if self.position < len(self.images):
+                    frame = cv2.imread(self.images[self.position]) if decode else None
+                    self.position += 1
+                    if frame is not None or not decode:
+                        return True, frame
+                    logger.warning(f"Unreadable image in replay: {self.images[self.position - 1]}")
+                    return False, None
+            elif self.video is not None:
+                ok = self.video.grab()
+                if ok:
+                    self.position += 1
+                    if not decode:
+                        return True, None
+                    ok, frame = self.video.retrieve()
+                    return ok, frame if ok else None
+
+            if not self._rewind():
+                return False, None
+        return False, None
+
+    def isOpened(self) -> bool:
+        return bool(self.images) or self.video is not None
+
+    def read(self):
+        """Next frame at the replay pace, as (ok, frame)"""
+        with self._lock:
+            if not self.isOpened():
+                return False, None
+            self._wait_until_due()
+            ok, frame = self._advance(decode=True)
+            if ok:
+                self.delivered += 1
+            return ok, frame
+
+    def grab(self) -> bool:
+        """Skip one frame that is already due (never waits)"""
+        with self._lock:
+            if not self.isOpened() or not self._next_is_due():
+                return False
+            ok, _ = self._advance(decode=False)
+            if ok:
+                self.delivered += 1
+            return ok
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.position)
+        return 0.0
+
+    def set(self, prop: int, value: float) -> bool:
+        # Resolution and rate come from the recording and the replay mode
+        return False
+
+    def release(self):
+        with self._lock:
+            if self.video is not None:
+                self.video.release()
+                self.video = None
+            self.images = []
+
+
+def parse_replay_source(source: str) -> Optional[dict]:
+    """
+    Split a replay source string into ReplayCapture arguments
+
+    Format: replay:<path>[?mode=realtime|fast|fixed][&fps=N][&loop=0|1][&start=N]
+
+    Returns:
+        Keyword arguments for ReplayCapture, or None if source is not a replay source
+    """
+    if not isinstance(source, str) or not source.startswith(REPLAY_SCHEME):
+        return None
+
+    path, _, query = source[len(REPLAY_SCHEME):].partition('?')
+    if path.startswith('//'):
+        path = path[2:]  # replay:///abs/path and replay://relative/path
+    options = {key: values[-1] for key, values in parse_qs(query).items()}
+
+    return {
+        'source': path,
+        'mode': options.get('mode', 'realtime'),
+        'fps': float(options['fps']) if options.get('fps') else None,
+        'loop': options.get('loop', '1').lower() not in ('0', 'false', 'no'),
+        'start': int(options.get('start', 0))
+    }
+
+
+def open_capture(source: Union[int, str]):
+    """
+    Open a camera source: replay: sources become a ReplayCapture, anything else
+    (device index, file, RTSP/HTTP URL) goes to cv2.VideoCapture
+    """
+    replay = parse_replay_source(source)
+    if replay is None:
+        return cv2.VideoCapture(source)
+
+    try:
+        capture = ReplayCapture(**replay)
+    except ValueError as e:
+        logger.error(f"Invalid replay source {source}: {e}")
+        return cv2.VideoCapture()  # Not opened; callers handle it like an unreachable camera
+
+    logger.info(f"Replaying {replay['source']} ({replay['mode']}, {capture.fps:g} fps, loop={replay['loop']})")
+    return capture
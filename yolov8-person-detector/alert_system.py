@@ -107,51 +107,79 @@ class AlertSystem:
         """Clear all cooldowns"""
         self.last_alert_time.clear()
     
-    def draw_alert_banner(self, frame, person_name, confidence, camera_name=None, camera_location=None):
+    def add_alert_banner(self, annotations, width, person_name, confidence, camera_name=None,
+                         camera_location=None, top=0):
         """
-        Draw alert banner on frame
+        Queue an alert banner on an Annotations batch
         
         Args:
-            frame: Input frame
+            annotations: annotation.Annotations collecting the frame's overlays
+            width: Frame width
             person_name: Name of detected person
             confidence: Confidence score
             camera_name: Name of the camera (optional)
             camera_location: Location of the camera (optional)
+            top: First row of the banner (banners stack downwards)
             
         Returns:
-            Frame with alert banner
+            Banner height in pixels
         """
-        import cv2
-        
-        height, width = frame.shape[:2]
-        
         # Calculate banner height based on content
         banner_height = 110 if (camera_name or camera_location) else 80
         
-        # Create semi-transparent red overlay at top
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (0, 0), (width, banner_height), (0, 0, 255), -1)
-        frame = cv2.addWeighted(overlay, 0.4, frame, 0.6, 0)
+        # Semi-transparent red band, blended over the banner rows only
+        annotations.banner((0, top, width, top + banner_height), (0, 0, 255))
         
         # Alert text
-        alert_text = f"ALERT: {person_name} DETECTED!"
-        confidence_text = f"Confidence: {confidence:.1%}"
-        
-        # Draw text
-        cv2.putText(frame, alert_text, (20, 35),
-                   cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3)
-        cv2.putText(frame, confidence_text, (20, 65),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        annotations.text(f"ALERT: {person_name} DETECTED!", (20, top + 35), 1.2, (255, 255, 255), 3)
+        annotations.text(f"Confidence: {confidence:.1%}", (20, top + 65), 0.7, (255, 255, 255), 2)
         
         # Add camera info if provided
-        y_offset = 90
+        y_offset = top + 90
         if camera_name:
-            camera_text = f"Camera: {camera_name}"
-            cv2.putText(frame, camera_text, (20, y_offset),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            annotations.text(f"Camera: {camera_name}", (20, y_offset), 0.6, (255, 255, 255), 2)
         if camera_location:
-            location_text = f"Location: {camera_location}"
-            cv2.putText(frame, location_text, (width - 500, y_offset),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            annotations.text(f"Location: {camera_location}", (width - 500, y_offset), 0.6, (255, 255, 255), 2)
+        
+        return banner_height
+    
+    def draw_alert_banners(self, frame, alerts, camera_name=None, camera_location=None, annotations=None):
+        """
+        Draw stacked banners for several alerts in one pass (in place, the frame is not copied)
         
+        Args:
+            frame: Input frame
+            alerts: Iterable of (person_name, confidence)
+            camera_name: Name of the camera (optional)
+            camera_location: Location of the camera (optional)
+            annotations: Optional Annotations batch to add to instead of drawing now
+            
+        Returns:
+            The same frame with the banners
+        """
+        from annotation import Annotations
+        
+        batch = annotations if annotations is not None else Annotations()
+        top = 0
+        for person_name, confidence in alerts:
+            top += self.add_alert_banner(batch, frame.shape[1], person_name, confidence,
+                                         camera_name, camera_location, top)
+        if annotations is None:
+            batch.render(frame)
         return frame
+    
+    def draw_alert_banner(self, frame, person_name, confidence, camera_name=None, camera_location=None):
+        """
+        Draw alert banner on frame (in place, the frame is not copied)
+        
+        Args:
+            frame: Input frame
+            person_name: Name of detected person
+            confidence: Confidence score
+            camera_name: Name of the camera (optional)
+            camera_location: Location of the camera (optional)
+            
+        Returns:
+            The same frame with the alert banner
+        """
+        return self.draw_alert_banners(frame, [(person_name, confidence)], camera_name, camera_location)
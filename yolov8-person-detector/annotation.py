@@ -0,0 +1,119 @@
+"""
+Annotation Renderer
+Draws banners, boxes and text onto frames in place: translucent banners are
+blended over their own region only, all overlays of a frame are drawn in one
+pass, and text is rasterised once per distinct string and reused
+"""
+import functools
+
+import cv2
+import numpy as np
+
+
+# Annotation Settings
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+TEXT_CACHE_SIZE = 512  # distinct (text, scale, thickness) rasters kept
+BANNER_ALPHA = 0.4  # opacity of translucent banners
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def text_raster(text, scale, thickness, color):
+    """
+    Rendered text, computed once per distinct string and colour
+
+    Returns:
+        Tuple (keep, ink, ascent, pad): per-pixel background weight (255 - coverage)
+        and premultiplied text colour as uint8 BGR images, and the position of the
+        cv2.putText origin inside them
+    """
+    (width, height), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+    pad = thickness + 1  # strokes reach slightly past the measured box
+    canvas = np.zeros((height + baseline + 2 * pad, width + 2 * pad), dtype=np.uint8)
+    cv2.putText(canvas, text, (pad, height + pad), FONT, scale, 255, thickness)
+
+    coverage = cv2.merge([canvas] * 3)
+    ink = cv2.multiply(coverage, np.full_like(coverage, color), scale=1 / 255)
+    keep = cv2.subtract(np.full_like(coverage, 255), coverage)
+    keep.flags.writeable = ink.flags.writeable = False  # shared by every caller
+    return keep, ink, height + pad, pad
+
+
+@functools.lru_cache(maxsize=32)
+def _solid(height, width, color):
+    fill = np.empty((height, width, 3), dtype=np.uint8)
+    fill[:] = color
+    fill.flags.writeable = False
+    return fill
+
+
+def _clip(frame, x1, y1, x2, y2):
+    height, width = frame.shape[:2]
+    return max(x1, 0), max(y1, 0), min(x2, width), min(y2, height)
+
+
+def blend_rect(frame, rect, color, alpha=BANNER_ALPHA):
+    """Blend a solid colour over one (x1, y1, x2, y2) region of the frame, in place"""
+    x1, y1, x2, y2 = _clip(frame, *rect)
+    if x1 >= x2 or y1 >= y2:
+        return
+    region = frame[y1:y2, x1:x2]
+    cv2.addWeighted(_solid(y2 - y1, x2 - x1, tuple(color)), alpha, region, 1 - alpha, 0, dst=region)
+
+
+def draw_text(frame, text, origin, scale, color, thickness=1):
+    """cv2.putText from a cached raster: origin is the bottom-left of the text, drawn in place"""
+    keep, ink, ascent, pad = text_raster(text, scale, thickness, tuple(color))
+    left, top = origin[0] - pad, origin[1] - ascent
+    x1, y1, x2, y2 = _clip(frame, left, top, left + keep.shape[1], top + keep.shape[0])
+    if x1 >= x2 or y1 >= y2:
+        return
+    region = frame[y1:y2, x1:x2]
+    window = (slice(y1 - top, y2 - top), slice(x1 - left, x2 - left))
+    # region = region * (1 - coverage) + color * coverage
+    cv2.multiply(region, keep[window], dst=region, scale=1 / 255)
+    cv2.add(region, ink[window], dst=region)
+
+
+class Annotations:
+    """
+    Overlays collected for one frame and drawn in a single pass
+
+    Blended regions go first (touching regions of the same colour are blended
+    as one), then boxes, then text, so text stays readable over banners.
+    """
+
+    def __init__(self):
+        self.blends = []
+        self.boxes = []
+        self.texts = []
+
+    def banner(self, rect, color, alpha=BANNER_ALPHA):
+        self.blends.append((tuple(rect), tuple(color), alpha))
+
+    def box(self, bbox, color, thickness=2):
+        self.boxes.append((tuple(bbox), tuple(color), thickness))
+
+    def text(self, text, origin, scale, color, thickness=1):
+        self.texts.append((text, tuple(origin), scale, tuple(color), thickness))
+
+    def _merged_blends(self):
+        """Stacked banners (same columns, colour and alpha, touching rows) become one region"""
+        merged = []
+        for (x1, y1, x2, y2), color, alpha in sorted(self.blends, key=lambda blend: (blend[0][0], blend[0][1])):
+            if merged:
+                (mx1, my1, mx2, my2), mcolor, malpha = merged[-1]
+                if (mx1, mx2, mcolor, malpha) == (x1, x2, color, alpha) and y1 <= my2:
+                    merged[-1] = ((mx1, my1, mx2, max(my2, y2)), color, alpha)
+                    continue
+            merged.append(((x1, y1, x2, y2), color, alpha))
+        return merged
+
+    def render(self, frame):
+        """Draw everything onto the frame in place; returns the frame"""
+        for rect, color, alpha in self._merged_blends():
+            blend_rect(frame, rect, color, alpha)
+        for (x1, y1, x2, y2), color, thickness in self.boxes:
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness)
+        for text, origin, scale, color, thickness in self.texts:
+            draw_text(frame, text, origin, scale, color, thickness)
+        return frame
@@ -0,0 +1,117 @@
+"""
+Frame Context Benchmark
+Compares per-detection colour conversion/resizing and full-frame copies with
+the shared FrameContext path on synthetic frames (no camera or models needed)
+"""
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from face_stage import MAX_REGION_SIZE, head_region, search_plan
+from frame_context import FrameContext
+
+
+# Benchmark Settings
+FRAME_SIZE = (1280, 720)
+ANALYSIS_WIDTH = 640
+PERSONS_PER_FRAME = 6
+FRAMES = 300
+
+
+def synthetic_frames(count, size, persons, seed=0):
+    """Noise frames with random person boxes (tall, like standing people)"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    base = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    scale = ANALYSIS_WIDTH / width
+
+    boxes = []
+    for _ in range(persons):
+        box_height = int(rng.integers(height // 4, height * 3 // 4))
+        box_width = box_height // 2
+        x1 = int(rng.integers(0, width - box_width))
+        y1 = int(rng.integers(0, height - box_height))
+        boxes.append((x1, y1, x1 + box_width, y1 + box_height))
+    analysis_boxes = [tuple(int(v * scale) for v in box) for box in boxes]
+
+    for i in range(count):
+        yield np.roll(base, i, axis=1), analysis_boxes
+
+
+def draw(frame, boxes):
+    for x1, y1, x2, y2 in boxes:
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 165, 255), 2)
+        cv2.putText(frame, "Person", (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    return frame
+
+
+def per_detection_path(frame, boxes, _context):
+    """Previous behaviour: resize per frame, convert/resize per crop, copy to draw"""
+    height, width = frame.shape[:2]
+    frame = cv2.resize(frame, (ANALYSIS_WIDTH, int(height * ANALYSIS_WIDTH / width)))
+    for box in boxes:
+        x1, y1, x2, y2 = head_region(box, frame.shape)
+        region = frame[y1:y2, x1:x2]
+        scale = min(1.0, MAX_REGION_SIZE / max(region.shape[:2]))
+        if scale < 1.0:
+            region = cv2.resize(region, (int(region.shape[1] * scale), int(region.shape[0] * scale)),
+                                interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(region, cv2.COLOR_BGR2RGB)
+    return draw(frame.copy(), boxes)
+
+
+def frame_context_path(frame, boxes, context):
+    """FrameContext: one resize/conversion per frame into reused buffers, views per crop"""
+    frame = context.update(frame, ANALYSIS_WIDTH)
+    for box in boxes:
+        region = head_region(box, frame.shape)
+        context.region(region, search_plan(region)[0])
+    return draw(frame, boxes)
+
+
+def run(path, frames, size, persons):
+    """Milliseconds and newly allocated bytes per frame"""
+    context = FrameContext()
+    workload = list(synthetic_frames(frames, size, persons))
+
+    # Warm up buffers before measuring
+    path(*workload[0], context)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    allocated = 0
+    for frame, boxes in workload:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        path(frame, boxes, context)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+
+    return {
+        'ms_per_frame': round(elapsed * 1000 / frames, 3),
+        'bytes_per_frame': allocated // frames
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-frame image preparation')
+    parser.add_argument('--frames', type=int, default=FRAMES)
+    parser.add_argument('--persons', type=int, default=PERSONS_PER_FRAME)
+    args = parser.parse_args()
+
+    print(f"{args.frames} frames of {FRAME_SIZE[0]}x{FRAME_SIZE[1]}, {args.persons} persons each\n")
+    results = {
+        'per-detection': run(per_detection_path, args.frames, FRAME_SIZE, args.persons),
+        'frame context': run(frame_context_path, args.frames, FRAME_SIZE, args.persons),
+    }
+    for name, result in results.items():
+        print(f"{name:>14}: {result['ms_per_frame']:7.3f} ms/frame, "
+              f"{result['bytes_per_frame'] / 1024:8.1f} KiB allocated/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Pipeline Benchmark
+Times person detection, the face stages, FaceMatcher.match_face and gallery
+lookups on bundled or synthetic frames and synthetic 128-d galleries, fully
+offline, and writes the results as JSON for comparison between commits
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from embedders import get_embedder
+from face_detectors import FACE_DETECTOR
+from face_quality import select_faces
+from face_stage import find_faces_in_frame
+from frame_context import FrameContext
+from gallery import best_matches
+
+
+# Benchmark Settings
+FRAME_SIZE = (1280, 720)
+SAMPLE_DIR = Path(__file__).parent / 'database' / 'persons'  # bundled enrollment photos
+SAMPLE_WIDTHS = (480, 240, 120)  # pasted photo widths: near, mid-distance and far persons
+GALLERY_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+MATCHER_GALLERY_SIZES = (1_000, 10_000, 100_000)  # FaceMatcher converts its list per call; pass 1000000 to include it
+QUERY_BATCH = 8  # faces per gallery lookup in the batched case
+EMBEDDING_SIZE = 128
+YOLO_MODEL = 'yolov8n.pt'
+REPEAT = 20
+WARMUP = 2
+OUTPUT = 'benchmark_results.json'
+REGRESSION_RATIO = 1.2  # --compare flags benchmarks this much slower than the baseline
+
+
+def measure(function, repeat=REPEAT, warmup=WARMUP):
+    """Milliseconds per call: mean, p50, p95 and min over `repeat` timed calls"""
+    for _ in range(warmup):
+        function()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples = np.array(samples)
+    return {
+        'mean': round(float(samples.mean()), 4),
+        'p50': round(float(np.percentile(samples, 50)), 4),
+        'p95': round(float(np.percentile(samples, 95)), 4),
+        'min': round(float(samples.min()), 4),
+        'runs': repeat
+    }
+
+
+def sample_scene(size=FRAME_SIZE, seed=0):
+    """
+    One frame with the bundled photos pasted at several distances
+
+    Returns:
+        Tuple (frame, person boxes, source) - source is 'bundled', or 'synthetic'
+        (noise with random boxes) when no sample photos are available
+    """
+    rng = np.random.default_rng(seed)
+    width, height = size
+    frame = rng.integers(60, 190, (height, width, 3), dtype=np.uint8)
+
+    photos = [cv2.imread(str(path)) for path in sorted(SAMPLE_DIR.glob('*.jpg'))]
+    photos = [photo for photo in photos if photo is not None]
+
+    boxes = []
+    if photos:
+        x = 0
+        for index, target_width in enumerate(sorted(SAMPLE_WIDTHS * 2)):
+            photo = photos[index % len(photos)]
+            target_height = int(photo.shape[0] * target_width / photo.shape[1])
+            if x + target_width > width:
+                continue
+            y = height - target_height - int(rng.integers(0, max(1, height - target_height)))
+            frame[y:y + target_height, x:x + target_width] = cv2.resize(photo, (target_width, target_height))
+            boxes.append((x, y, x + target_width, y + target_height))
+            x += target_width + 10
+        return frame, boxes, 'bundled'
+
+    for _ in range(len(SAMPLE_WIDTHS) * 2):
+        box_height = int(rng.integers(height // 4, height * 3 // 4))
+        x1 = int(rng.integers(0, width - box_height // 2))
+        y1 = int(rng.integers(0, height - box_height))
+        boxes.append((x1, y1, x1 + box_height // 2, y1 + box_height))
+    return frame, boxes, 'synthetic'
+
+
+def load_frames(directory):
+    """BGR frames from an image directory (whole-frame boxes until a detector finds persons)"""
+    frames = []
+    for path in sorted(Path(directory).iterdir()):
+        frame = cv2.imread(str(path))
+        if frame is not None:
+            frames.append((frame, [(0, 0, frame.shape[1], frame.shape[0])]))
+    return frames
+
+
+def synthetic_gallery(size, seed=1):
+    """(size, 128) float64 gallery shaped like dlib encodings (values around +-0.1)"""
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((size, EMBEDDING_SIZE)) * 0.1
+
+
+class BenchmarkRun:
+    """Collects results and skipped benchmarks"""
+
+    def __init__(self, repeat=REPEAT):
+        self.repeat = repeat
+        self.results = []
+        self.skipped = []
+
+    def add(self, name, function, repeat=None, **params):
+        timing = measure(function, repeat or self.repeat)
+        self.results.append({'name': name, 'params': params, 'ms': timing})
+        label = ', '.join(f"{key}={value}" for key, value in params.items())
+        print(f"  {name:<32} {label:<28} {timing['mean']:10.3f} ms  (p95 {timing['p95']:.3f})")
+
+    def skip(self, name, reason):
+        self.skipped.append({'name': name, 'reason': reason})
+        print(f"  {name:<32} skipped: {reason}")
+
+
+def bench_person_detector(run, frames, model):
+    if not os.path.exists(model):
+        # The ultralytics loader would try to download it
+        run.skip('person_detector.detect_persons', f"model {model} not found (offline run)")
+        return frames
+    try:
+        from person_detector import PersonDetector
+    except ImportError as e:
+        run.skip('person_detector.detect_persons', f"ultralytics not installed ({e})")
+        return frames
+
+    detector = PersonDetector(model_name=model)
+    frame = frames[0][0]
+    run.add('person_detector.detect_persons', lambda: detector.detect_persons(frame),
+            width=frame.shape[1], height=frame.shape[0])
+
+    # Real person boxes for the face stages where the detector finds any
+    detected = []
+    for frame, boxes in frames:
+        found = [detection['bbox'] for detection in detector.detect_persons(frame)]
+        detected.append((frame, found or boxes))
+    return detected
+
+
+def bench_face_stages(run, frames):
+    context = FrameContext()
+    frame, boxes = frames[0]
+
+    def search():
+        context.update(frame)
+        return find_faces_in_frame(context, boxes)
+
+    run.add('face_stage.find_faces_in_frame', search, persons=len(boxes), detector=FACE_DETECTOR)
+
+    faces = search()
+    run.add('face_quality.select_faces', lambda: select_faces([dict(face) for face in faces]), faces=len(faces))
+
+    selected = select_faces([dict(face) for face in faces]) or faces
+    embedder = get_embedder()
+    if not selected:
+        run.skip('embedder.embed', 'no face found in the benchmark frame')
+        return
+    face = selected[0]
+    run.add('embedder.embed', lambda: embedder.embed(face['rgb'], [face['location']], landmarks=[face.get('landmarks')]),
+            version=embedder.version)
+
+
+def bench_face_matcher(run, frames, sizes, gallery):
+    from face_matcher import FaceMatcher
+
+    # An unreachable API makes the matcher fall back to the bundled local photos
+    matcher = FaceMatcher(database_path=str(SAMPLE_DIR), api_url='http://127.0.0.1:9')
+    bundled = list(matcher.known_face_encodings)
+    frame, boxes = frames[0]
+    box = max(boxes, key=lambda b: (b[2] - b[0]) * (b[3] - b[1]))
+
+    for size in sizes:
+        matcher.known_face_encodings = bundled + list(gallery[:size])
+        matcher.known_face_names = [f"person {i}" for i in range(len(matcher.known_face_encodings))]
+        run.add('face_matcher.match_face', lambda: matcher.match_face(frame, bbox=box),
+                repeat=max(3, run.repeat // 4), gallery=size)
+
+
+def bench_gallery(run, sizes, gallery):
+    queries = synthetic_gallery(QUERY_BATCH, seed=2)
+    for size in sizes:
+        known = gallery[:size]
+        run.add('gallery.best_matches', lambda: best_matches(known, queries[:1]), gallery=size, queries=1)
+        run.add('gallery.best_matches', lambda: best_matches(known, queries), gallery=size, queries=QUERY_BATCH)
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def compare(results, baseline_path):
+    """Print the change against a previous results file; returns the number of regressions"""
+    with open(baseline_path) as f:
+        baseline = {
+            (entry['name'], json.dumps(entry['params'], sort_keys=True)): entry['ms']['p50']
+            for entry in json.load(f)['results']
+        }
+
+    regressions = 0
+    print(f"\nAgainst {baseline_path} (p50):")
+    for entry in results:
+        before = baseline.get((entry['name'], json.dumps(entry['params'], sort_keys=True)))
+        if not before:
+            continue
+        ratio = entry['ms']['p50'] / before
+        flag = '  ⚠️  slower' if ratio >= REGRESSION_RATIO else ''
+        regressions += bool(flag)
+        print(f"  {entry['name']:<32} {json.dumps(entry['params']):<40} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the detection and recognition pipeline')
+    parser.add_argument('--frames', help='Directory of sample frames (default: bundled photos in a synthetic scene)')
+    parser.add_argument('--gallery-sizes', type=int, nargs='+', default=list(GALLERY_SIZES))
+    parser.add_argument('--matcher-gallery-sizes', type=int, nargs='+', default=list(MATCHER_GALLERY_SIZES))
+    parser.add_argument('--model', default=YOLO_MODEL, help='YOLO weights (skipped when not present locally)')
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--output', default=OUTPUT)
+    parser.add_argument('--compare', help='Previous results JSON to compare against')
+    args = parser.parse_args()
+
+    if args.frames:
+        frames, source = load_frames(args.frames), args.frames
+        if not frames:
+            parser.error(f"no readable images in {args.frames}")
+    else:
+        frame, boxes, source = sample_scene()
+        frames = [(frame, boxes)]
+
+    run = BenchmarkRun(args.repeat)
+    gallery = synthetic_gallery(max(args.gallery_sizes + args.matcher_gallery_sizes))
+
+    print(f"Benchmarking on {source} frames, galleries up to {len(gallery):,} encodings\n")
+    frames = bench_person_detector(run, frames, args.model)
+    bench_face_stages(run, frames)
+    bench_face_matcher(run, frames, args.matcher_gallery_sizes, gallery)
+    bench_gallery(run, args.gallery_sizes, gallery)
+
+    report = {
+        'environment': environment(),
+        'settings': {'frames': source, 'repeat': args.repeat, 'face_detector': FACE_DETECTOR,
+                     'encoder_version': get_embedder().version},
+        'results': run.results,
+        'skipped': run.skipped
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare and compare(run.results, args.compare):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Face Embedders
+Versioned face embedding models behind one interface. dlib's ResNet (through
+face_recognition) is the default; ONNX Runtime models such as MobileFaceNet
+are a faster CPU option. Every vector is tagged with the embedder version so
+galleries only compare vectors produced by the same model.
+"""
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+# Embedder Settings
+ENCODER_VERSION = 'dlib-v1'  # Options: dlib-v1, mobilefacenet-v1
+LEGACY_ENCODER_VERSION = 'dlib-v1'  # version of gallery vectors stored before versions were tagged
+MOBILEFACENET_MODEL_PATH = str(Path(__file__).parent / 'models' / 'mobilefacenet.onnx')
+ONNX_THREADS = 1  # intra-op threads per session; encoding already runs one process per core
+# ONNX vectors are L2-normalised, then scaled so that same-person euclidean distances
+# land where dlib's do (~0.6 threshold) and existing match thresholds keep working
+ONNX_DISTANCE_SCALE = 0.55
+
+# ArcFace 112x112 alignment template: eye centres and nose tip
+ALIGNMENT_TEMPLATE = np.array([[38.2946, 51.6963], [73.5318, 51.5014], [56.0252, 71.7366]], dtype=np.float32)
+
+
+def encoding_version(enc_data):
+    """Embedder version of a stored faceEncodings entry (untagged entries are legacy dlib)"""
+    return enc_data.get('encoderVersion') or LEGACY_ENCODER_VERSION
+
+
+class FaceEmbedder:
+    """Base class for face embedders"""
+
+    version = 'base'
+    size = 0
+
+    def embed(self, rgb_image, locations, num_jitters=1, landmarks=None):
+        """
+        Embed faces of an RGB image
+
+        Args:
+            rgb_image: RGB image (numpy array)
+            locations: Face boxes (top, right, bottom, left) in that image
+            num_jitters: Re-sampling passes, for embedders that support it
+            landmarks: Optional eye and nose points per location (None entries
+                allowed), for embedders that align on them
+
+        Returns:
+            (len(locations), size) array
+        """
+        raise NotImplementedError
+
+
+class DlibEmbedder(FaceEmbedder):
+    """dlib ResNet through face_recognition (the original encodings)"""
+
+    version = 'dlib-v1'
+    size = 128
+
+    def embed(self, rgb_image, locations, num_jitters=1, landmarks=None):
+        import face_recognition
+
+        # dlib only takes contiguous images; frame context regions are views
+        encodings = face_recognition.face_encodings(np.ascontiguousarray(rgb_image), locations,
+                                                    num_jitters=num_jitters)
+        return np.array(encodings).reshape(-1, self.size)
+
+
+class OnnxEmbedder(FaceEmbedder):
+    """ArcFace-style ONNX model (112x112 aligned RGB input) run with ONNX Runtime"""
+
+    def __init__(self, model_path, version, distance_scale=ONNX_DISTANCE_SCALE):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("onnxruntime is not installed (pip install onnxruntime)")
+        if not Path(model_path).exists():
+            raise FileNotFoundError(f"Embedding model not found at {model_path}")
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = ONNX_THREADS
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.batched = not isinstance(self.session.get_inputs()[0].shape[0], int)
+        self.size = int(self.session.get_outputs()[0].shape[-1])
+        self.version = version
+        self.distance_scale = distance_scale
+        self._lock = threading.Lock()
+
+    def _align(self, rgb_image, location, landmarks=None):
+        """112x112 face aligned on eyes and nose, or a plain box crop without landmarks"""
+        top, right, bottom, left = location
+        if landmarks is None:
+            import face_recognition
+
+            found = face_recognition.face_landmarks(np.ascontiguousarray(rgb_image), [location], model='small')
+            landmarks = found[0] if found else None
+
+        if landmarks and landmarks.get('left_eye') and landmarks.get('right_eye') and landmarks.get('nose_tip'):
+            eyes = sorted([np.mean(landmarks['left_eye'], axis=0), np.mean(landmarks['right_eye'], axis=0)],
+                          key=lambda point: point[0])
+            points = np.array(eyes + [np.mean(landmarks['nose_tip'], axis=0)], dtype=np.float32)
+            matrix, _ = cv2.estimateAffinePartial2D(points, ALIGNMENT_TEMPLATE)
+            if matrix is not None:
+                return cv2.warpAffine(rgb_image, matrix, (112, 112), borderMode=cv2.BORDER_REPLICATE)
+
+        face = rgb_image[max(0, top):bottom, max(0, left):right]
+        return cv2.resize(face, (112, 112))
+
+    def embed(self, rgb_image, locations, num_jitters=1, landmarks=None):
+        if not locations:
+            return np.empty((0, self.size))
+
+        landmarks = landmarks or [None] * len(locations)
+        faces = np.stack([self._align(rgb_image, location, points)
+                          for location, points in zip(locations, landmarks)]).astype(np.float32)
+        blob = ((faces - 127.5) / 127.5).transpose(0, 3, 1, 2)
+
+        # Sessions are thread-safe, but one run at a time keeps ONNX_THREADS meaningful
+        with self._lock:
+            if self.batched:
+                vectors = self.session.run(None, {self.input_name: blob})[0]
+            else:
+                vectors = np.concatenate([self.session.run(None, {self.input_name: face[None]})[0] for face in blob])
+
+        vectors = vectors.reshape(len(locations), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-10) * self.distance_scale
+
+
+EMBEDDERS = {
+    'dlib-v1': DlibEmbedder,
+    'mobilefacenet-v1': lambda: OnnxEmbedder(MOBILEFACENET_MODEL_PATH, 'mobilefacenet-v1'),
+}
+
+_embedders = {}
+_embedders_lock = threading.Lock()
+
+
+def get_embedder(version=None):
+    """Shared embedder for the configured (or given) version, falling back to dlib if it cannot be created"""
+    version = version or ENCODER_VERSION
+    with _embedders_lock:
+        if version not in _embedders:
+            try:
+                _embedders[version] = EMBEDDERS[version]()
+            except Exception as e:
+                print(f"⚠️  Face embedder '{version}' unavailable ({e}), using {LEGACY_ENCODER_VERSION}")
+                _embedders[version] = _embedders.get(LEGACY_ENCODER_VERSION) or DlibEmbedder()
+                _embedders.setdefault(LEGACY_ENCODER_VERSION, _embedders[version])
+        return _embedders[version]
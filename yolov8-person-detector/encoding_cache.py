@@ -0,0 +1,200 @@
+"""
+Face Encoding Cache
+Small LRU cache keyed on a perceptual hash of the face crop and the camera,
+so a face that has not changed meaningfully reuses its previous encoding
+and match result instead of being encoded again
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+# Cache Settings
+CACHE_SIZE = 64  # entries per camera
+CACHE_TTL = 5.0  # seconds an entry stays valid
+HASH_SIZE = 8  # difference hash grid (HASH_SIZE x HASH_SIZE bits)
+HASH_THUMBNAIL = 32  # face boxes are normalised to this square before hashing
+HASH_BLUR = 1.0  # Gaussian sigma (thumbnail pixels) removing pixel-level detail
+SHIFT_STEPS = 3  # lookups also hash the box moved by up to this many thumbnail pixels (~9%) each way
+# Differing bits (of 64) still treated as the same face. Calibrated on the
+# database/persons faces with boxes shifted 3-5 px: the same face stays within
+# 7 bits at 60-200 px (13 at 40 px), different persons are 15 or more apart.
+MAX_HASH_DISTANCE = 10
+
+
+def _window_hashes(rgb_image, location, steps):
+    """
+    Difference hashes of the face box moved by -steps..steps thumbnail pixels
+
+    The box plus a margin of `steps` thumbnail pixels is scaled once so the box
+    becomes a HASH_THUMBNAIL square and blurred; every shifted box is then a
+    window of that image. Parts outside the frame repeat the edge pixels.
+    """
+    top, right, bottom, left = location
+    if bottom <= top or right <= left:
+        return None
+    margin_y = (bottom - top) * steps / HASH_THUMBNAIL
+    margin_x = (right - left) * steps / HASH_THUMBNAIL
+    y1, y2 = int(round(top - margin_y)), int(round(bottom + margin_y))
+    x1, x2 = int(round(left - margin_x)), int(round(right + margin_x))
+
+    height, width = rgb_image.shape[:2]
+    area = rgb_image[max(0, y1):min(height, y2), max(0, x1):min(width, x2)]
+    if area.size == 0:
+        return None
+    gray = cv2.cvtColor(area, cv2.COLOR_RGB2GRAY)
+    gray = cv2.copyMakeBorder(gray, max(0, -y1), max(0, y2 - height), max(0, -x1), max(0, x2 - width),
+                              cv2.BORDER_REPLICATE)
+
+    side = HASH_THUMBNAIL + 2 * steps
+    thumbnail = cv2.resize(gray, (side, side), interpolation=cv2.INTER_AREA)
+    thumbnail = cv2.GaussianBlur(thumbnail, (0, 0), HASH_BLUR)
+
+    offsets = sorted(((dy, dx) for dy in range(-steps, steps + 1) for dx in range(-steps, steps + 1)),
+                     key=lambda offset: abs(offset[0]) + abs(offset[1]))
+    hashes = []
+    for dy, dx in offsets:
+        window = thumbnail[steps + dy:steps + dy + HASH_THUMBNAIL, steps + dx:steps + dx + HASH_THUMBNAIL]
+        small = cv2.resize(window, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        hashes.append(int(np.packbits(bits).view('>u8')[0]))
+    return tuple(hashes)
+
+
+def face_hash(rgb_image, location):
+    """
+    64-bit difference hash of a face crop
+
+    The face box is normalised to a fixed-size, slightly blurred thumbnail and
+    reduced to a gradient grid, so the hash does not depend on the face size
+    and ignores pixel noise.
+    """
+    hashes = _window_hashes(rgb_image, location, SHIFT_STEPS)
+    return hashes[0] if hashes else None
+
+
+def face_hashes(rgb_image, location):
+    """
+    Hashes of a face box and of the box moved around it, for cache lookups
+
+    Detector boxes of the same face jitter by a few pixels from frame to frame,
+    which moves every grid cell and flips many bits. Comparing each of these
+    shifted hashes with the stored (unshifted) hash finds the cached face anyway.
+
+    Returns:
+        Tuple of hashes, the unshifted one first, or None for an empty box
+    """
+    return _window_hashes(rgb_image, location, SHIFT_STEPS)
+
+
+def hash_distances(cached_keys, keys):
+    """Smallest Hamming distance of each cached hash to any of the lookup hashes"""
+    xor = np.array(cached_keys, dtype=np.uint64)[:, None] ^ np.array(keys, dtype=np.uint64)[None, :]
+    bits = np.unpackbits(xor.view(np.uint8), axis=1).reshape(len(cached_keys), len(keys), 64)
+    return bits.sum(axis=2).min(axis=1)
+
+
+class EncodingCache:
+    """Per-camera LRU of face hash -> (encoding, match result)"""
+
+    def __init__(self, size=CACHE_SIZE, ttl=CACHE_TTL, max_distance=MAX_HASH_DISTANCE):
+        self.size = size
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.entries = {}  # camera_id -> OrderedDict(hash -> entry)
+        self.counters = {}  # camera_id -> {'hits', 'misses', 'saved_ms'}
+        self.encode_ms = 0.0  # moving average cost of one encoding
+        self.lock = threading.Lock()
+
+    def _counters(self, camera_id):
+        return self.counters.setdefault(camera_id, {'hits': 0, 'misses': 0, 'saved_ms': 0.0})
+
+    def get(self, camera_id, key, gallery_version, now=None):
+        """
+        Look up a face by hash
+
+        Args:
+            key: face_hash of the face, or the tuple from face_hashes to also
+                find it when its box moved a little since it was cached
+
+        Returns:
+            (encoding, match) of a near-identical face seen recently; match is None
+            if the gallery changed since it was computed. None on a miss.
+        """
+        if key is None:
+            return None
+        if now is None:
+            now = time.monotonic()
+        keys = key if isinstance(key, tuple) else (key,)
+
+        with self.lock:
+            camera_entries = self.entries.get(camera_id)
+            counters = self._counters(camera_id)
+
+            if camera_entries:
+                for cached_key, entry in list(camera_entries.items()):
+                    if now - entry['time'] > self.ttl:
+                        del camera_entries[cached_key]
+
+            if camera_entries:
+                cached_keys = list(camera_entries)
+                distances = hash_distances(cached_keys, keys)
+                nearest = int(np.argmin(distances))
+                if distances[nearest] <= self.max_distance:
+                    cached_key = cached_keys[nearest]
+                    entry = camera_entries[cached_key]
+                    camera_entries.move_to_end(cached_key)
+                    counters['hits'] += 1
+                    counters['saved_ms'] += self.encode_ms
+                    match = entry['match'] if entry['gallery_version'] == gallery_version else None
+                    return entry['encoding'], match
+
+            counters['misses'] += 1
+            return None
+
+    def put(self, camera_id, key, encoding, match, gallery_version, encode_ms=None, now=None):
+        """Store the encoding and match result for a face hash (the unshifted one of a face_hashes tuple)"""
+        if key is None:
+            return
+        if now is None:
+            now = time.monotonic()
+        if isinstance(key, tuple):
+            key = key[0]
+
+        with self.lock:
+            if encode_ms is not None:
+                self.encode_ms = encode_ms if self.encode_ms == 0 else self.encode_ms * 0.9 + encode_ms * 0.1
+
+            camera_entries = self.entries.setdefault(camera_id, OrderedDict())
+            camera_entries[key] = {
+                'encoding': encoding,
+                'match': match,
+                'gallery_version': gallery_version,
+                'time': now
+            }
+            camera_entries.move_to_end(key)
+            while len(camera_entries) > self.size:
+                camera_entries.popitem(last=False)
+
+    def stats(self, camera_id=None):
+        """Hit rate and saved encoder milliseconds, for one camera or all"""
+        with self.lock:
+            if camera_id is not None:
+                selected = [self.counters.get(camera_id, {'hits': 0, 'misses': 0, 'saved_ms': 0.0})]
+            else:
+                selected = list(self.counters.values())
+
+            hits = sum(c['hits'] for c in selected)
+            misses = sum(c['misses'] for c in selected)
+            saved_ms = sum(c['saved_ms'] for c in selected)
+
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            'saved_ms': round(saved_ms, 1)
+        }
@@ -0,0 +1,213 @@
+"""
+Face Encoding Stage
+Runs the configured face embedder either in the calling thread or in a
+pool of worker processes, so encoding escapes the GIL and scales with cores.
+Crop batches reach the workers through shared memory.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+from embedders import get_embedder
+
+
+# Encoding Settings
+ENCODING_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # 0 = encode in the calling thread
+NUM_JITTERS = 1
+WORKER_START_TIMEOUT = 120  # seconds for all workers to start and load the model
+# Workers come from a clean server process, never fork() of this one: the camera,
+# HTTP and torch threads of a running worker can hold locks a forked child would
+# inherit and deadlock on. 'spawn' where forkserver is unavailable (Windows, macOS).
+START_METHODS = ('forkserver', 'spawn')
+
+
+def _encode_regions(image_batch, num_jitters, version=None):
+    """Encode faces in a list of (rgb_image, face_locations[, landmarks]) items"""
+    embedder = get_embedder(version)
+
+    results = []
+    for rgb_image, locations, *landmarks in image_batch:
+        if rgb_image is None or not locations:
+            results.append(np.empty((0, embedder.size)))
+            continue
+        results.append(embedder.embed(rgb_image, locations, num_jitters, landmarks[0] if landmarks else None))
+    return results
+
+
+_all_warm = None  # worker side: event the pool sets once every worker is warm
+
+
+def _warm_worker(version=None, warmed=None, all_warm=None):
+    """Pool initializer: load the embedding model once per worker process, then report in"""
+    global _all_warm
+    blank = np.zeros((150, 150, 3), dtype=np.uint8)
+    get_embedder(version).embed(blank, [(0, 150, 150, 0)])
+    _all_warm = all_warm
+    if warmed is not None:
+        warmed.release()
+
+
+def _hold_until_all_warm(timeout):
+    """Start-up task: keeps its worker busy until every worker is warm"""
+    if _all_warm is not None:
+        _all_warm.wait(timeout)
+
+
+def _encode_shared(shm_name, items, num_jitters, version=None):
+    """Worker entry point: encode crops stored in a shared memory block"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        image_batch = [
+            (np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset) if shape else None, locations, landmarks)
+            for offset, shape, locations, landmarks in items
+        ]
+        results = _encode_regions(image_batch, num_jitters, version)
+        # Views into the block must be gone before it can be closed
+        del image_batch
+        return results
+    finally:
+        shm.close()
+
+
+class LocalFaceEncoder:
+    """Encodes in the calling thread (no extra processes)"""
+
+    def __init__(self, num_jitters=NUM_JITTERS, version=None):
+        self.num_jitters = num_jitters
+        self.embedder = get_embedder(version)
+        self.version = self.embedder.version
+
+    def encode(self, image_batch):
+        """
+        Encode every listed face of every image in the batch
+
+        Args:
+            image_batch: List of (rgb_image, face_locations) pairs, optionally with a
+                third item holding landmarks per location (see FaceEmbedder.embed)
+
+        Returns:
+            List with one (M, embedding size) array per input pair
+        """
+        return _encode_regions(image_batch, self.num_jitters, self.version)
+
+    def close(self):
+        pass
+
+
+class FaceEncodingPool:
+    """Encodes crop batches in warm worker processes fed through shared memory"""
+
+    def __init__(self, workers=ENCODING_WORKERS, num_jitters=NUM_JITTERS, version=None):
+        self.workers = workers
+        self.num_jitters = num_jitters
+        # Resolve the version here so a fallback is the same in every worker
+        self.embedder = get_embedder(version)
+        self.version = self.embedder.version
+        context = _pool_context()
+        self.start_method = context.get_start_method()
+        # Shared with the workers at spawn time (locks cannot travel with tasks)
+        self.warmed = context.Semaphore(0)
+        self.all_warm = context.Event()
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_warm_worker,
+                                            initargs=(self.version, self.warmed, self.all_warm))
+
+    def start(self, timeout=None):
+        """
+        Launch and warm every worker now instead of on the first encode, so the
+        model loads before any camera thread depends on the pool
+
+        Raises:
+            TimeoutError if the workers are not up within timeout seconds
+        """
+        # The executor spawns a worker per submit while none is idle; holding the
+        # tasks until all are warm keeps a fast worker from looking idle. Each
+        # worker reports in from its initializer, once its model is loaded.
+        futures = [self.executor.submit(_hold_until_all_warm, timeout) for _ in range(self.workers)]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            for number in range(self.workers):
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                if not self.warmed.acquire(timeout=remaining):
+                    for future in futures:
+                        if future.done() and future.exception():
+                            raise future.exception()  # a worker that failed to start
+                    raise TimeoutError(f"{number} of {self.workers} encoding workers warm after {timeout}s")
+        finally:
+            self.all_warm.set()
+
+        wait(futures, timeout=timeout)
+        print(f"✅ Face encoding pool started with {self.workers} warm workers "
+              f"({self.start_method}, {self.version})")
+        return self
+
+    def encode(self, image_batch):
+        """
+        Encode every listed face of every image in the batch in a worker process
+
+        Args:
+            image_batch: List of (rgb_image, face_locations) pairs, optionally with a
+                third item holding landmarks per location (see FaceEmbedder.embed)
+
+        Returns:
+            List with one (M, embedding size) array per input pair
+        """
+        if not any(item[0] is not None and item[1] for item in image_batch):
+            return [np.empty((0, self.embedder.size)) for _ in image_batch]
+
+        # Pack all crops back to back into one shared block
+        items = []
+        total = 0
+        for rgb_image, locations, *landmarks in image_batch:
+            if rgb_image is None or not locations:
+                items.append((0, None, [], None))
+                continue
+            items.append((total, rgb_image.shape, [tuple(map(int, loc)) for loc in locations],
+                          landmarks[0] if landmarks else None))
+            total += rgb_image.nbytes
+
+        shm = shared_memory.SharedMemory(create=True, size=total)
+        try:
+            for (offset, shape, _, _), (rgb_image, *_) in zip(items, image_batch):
+                if shape:
+                    target = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+                    target[:] = rgb_image
+                    del target
+
+            future = self.executor.submit(_encode_shared, shm.name, items, self.num_jitters, self.version)
+            return future.result()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def close(self):
+        """Shut the worker processes down"""
+        self.executor.shutdown(wait=True)
+
+
+def _pool_context():
+    """Multiprocessing context for the pool: the first available of START_METHODS"""
+    available = multiprocessing.get_all_start_methods()
+    method = next((method for method in START_METHODS if method in available), None)
+    return multiprocessing.get_context(method)
+
+
+def create_face_encoder(workers=ENCODING_WORKERS, num_jitters=NUM_JITTERS, version=None):
+    """
+    Process pool encoder with all workers already warm, or an in-thread encoder
+    when workers is 0. Call it before starting camera threads.
+    """
+    if workers and workers > 0:
+        pool = None
+        try:
+            pool = FaceEncodingPool(workers, num_jitters, version)
+            return pool.start(timeout=WORKER_START_TIMEOUT)
+        except Exception as e:
+            if pool is not None:
+                pool.executor.shutdown(wait=False, cancel_futures=True)
+            print(f"⚠️  Could not start face encoding pool ({e}), encoding in-thread")
+    return LocalFaceEncoder(num_jitters, version)
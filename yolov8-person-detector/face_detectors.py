@@ -0,0 +1,204 @@
+"""
+Face Detector Backends
+Selectable CPU face detectors behind one interface. Every backend returns
+dlib-style (top, right, bottom, left) boxes so face_recognition.face_encodings
+and the existing gallery keep working unchanged.
+"""
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import face_recognition
+import numpy as np
+
+
+# Detector Settings
+FACE_DETECTOR = 'auto'  # Options: auto (choose per region size), hog, yunet, cnn
+YUNET_MODEL_PATH = str(Path(__file__).parent / 'models' / 'face_detection_yunet_2023mar.onnx')
+YUNET_SCORE_THRESHOLD = 0.7
+YUNET_NMS_THRESHOLD = 0.3
+SMALL_REGION_SIZE = 160  # px - regions up to this size go to the small-region backend in auto mode
+AUTO_SMALL_REGION_BACKEND = 'yunet'  # robust on small faces without upsampling
+AUTO_LARGE_REGION_BACKEND = 'hog'
+
+
+class FaceDetector:
+    """Base class for face detector backends"""
+
+    name = 'base'
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self._lock = threading.Lock()
+
+    def detect(self, rgb_image, upsample=0):
+        """
+        Detect faces in an RGB image
+
+        Args:
+            rgb_image: RGB image (numpy array)
+            upsample: Upsampling passes for backends that support it
+
+        Returns:
+            List of (top, right, bottom, left) boxes
+        """
+        start = time.perf_counter()
+        locations = self._detect(rgb_image, upsample)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.calls += 1
+            self.total_time += elapsed
+
+        return locations
+
+    def _detect(self, rgb_image, upsample):
+        raise NotImplementedError
+
+    def stats(self):
+        """Timing summary for this backend"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'total_ms': round(self.total_time * 1000, 1),
+                'avg_ms': round(self.total_time * 1000 / self.calls, 2) if self.calls else 0.0
+            }
+
+
+class HOGFaceDetector(FaceDetector):
+    """dlib HOG detector (the original behaviour)"""
+
+    name = 'hog'
+
+    def _detect(self, rgb_image, upsample):
+        # dlib only takes contiguous images; frame context regions are views
+        rgb_image = np.ascontiguousarray(rgb_image)
+        return face_recognition.face_locations(rgb_image, number_of_times_to_upsample=upsample, model='hog')
+
+
+class CNNFaceDetector(FaceDetector):
+    """dlib CNN (MMOD) detector - most accurate, slowest on CPU"""
+
+    name = 'cnn'
+
+    def _detect(self, rgb_image, upsample):
+        rgb_image = np.ascontiguousarray(rgb_image)
+        return face_recognition.face_locations(rgb_image, number_of_times_to_upsample=upsample, model='cnn')
+
+
+class YuNetFaceDetector(FaceDetector):
+    """OpenCV DNN YuNet detector - fast on CPU and good on small faces"""
+
+    name = 'yunet'
+
+    def __init__(self, model_path=YUNET_MODEL_PATH):
+        super().__init__()
+        if not Path(model_path).exists():
+            raise FileNotFoundError(f"YuNet model not found at {model_path}")
+        if not hasattr(cv2, 'FaceDetectorYN'):
+            raise RuntimeError("OpenCV build has no FaceDetectorYN (needs OpenCV >= 4.5.4)")
+        self.model_path = model_path
+        # FaceDetectorYN keeps per-call input size state, so each thread gets its own
+        self._local = threading.local()
+
+    def _get_net(self, width, height):
+        net = getattr(self._local, 'net', None)
+        if net is None:
+            net = cv2.FaceDetectorYN.create(
+                self.model_path, '', (width, height),
+                YUNET_SCORE_THRESHOLD, YUNET_NMS_THRESHOLD
+            )
+            self._local.net = net
+        else:
+            net.setInputSize((width, height))
+        return net
+
+    def _detect(self, rgb_image, upsample):
+        # YuNet finds faces down to ~10 px on its own; upsampling is not needed
+        height, width = rgb_image.shape[:2]
+        bgr_image = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2BGR)
+        _, faces = self._get_net(width, height).detect(bgr_image)
+
+        if faces is None:
+            return []
+
+        locations = []
+        for face in faces:
+            x, y, w, h = face[:4]
+            # Square the box around its centre to match dlib's face box proportions
+            side = max(w, h)
+            center_x, center_y = x + w / 2, y + h / 2
+            top = max(0, int(center_y - side / 2))
+            left = max(0, int(center_x - side / 2))
+            bottom = min(height, int(center_y + side / 2))
+            right = min(width, int(center_x + side / 2))
+            locations.append((top, right, bottom, left))
+        return locations
+
+
+class AutoFaceDetector(FaceDetector):
+    """Chooses a backend per region size; timing is kept per underlying backend"""
+
+    name = 'auto'
+
+    def __init__(self, small_backend, large_backend, small_region_size=SMALL_REGION_SIZE):
+        super().__init__()
+        self.small_backend = small_backend
+        self.large_backend = large_backend
+        self.small_region_size = small_region_size
+
+    def _detect(self, rgb_image, upsample):
+        if max(rgb_image.shape[:2]) <= self.small_region_size:
+            return self.small_backend.detect(rgb_image, upsample)
+        return self.large_backend.detect(rgb_image, upsample)
+
+
+BACKENDS = {
+    'hog': HOGFaceDetector,
+    'cnn': CNNFaceDetector,
+    'yunet': YuNetFaceDetector,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name):
+    """Shared instance of a backend, falling back to HOG if it cannot be created"""
+    with _backends_lock:
+        if name not in _backends:
+            try:
+                _backends[name] = BACKENDS[name]()
+            except Exception as e:
+                print(f"⚠️  Face detector '{name}' unavailable ({e}), using HOG")
+                _backends[name] = _backends.get('hog') or HOGFaceDetector()
+                _backends.setdefault('hog', _backends[name])
+        return _backends[name]
+
+
+def get_face_detector(name=None):
+    """
+    Face detector for the configured (or given) backend name
+
+    'auto' sends small regions to AUTO_SMALL_REGION_BACKEND and larger ones to
+    AUTO_LARGE_REGION_BACKEND.
+    """
+    name = name or FACE_DETECTOR
+    if name == 'auto':
+        with _backends_lock:
+            detector = _backends.get('auto')
+        if detector is None:
+            detector = AutoFaceDetector(get_backend(AUTO_SMALL_REGION_BACKEND), get_backend(AUTO_LARGE_REGION_BACKEND))
+            with _backends_lock:
+                detector = _backends.setdefault('auto', detector)
+        return detector
+    return get_backend(name)
+
+
+def detector_stats():
+    """Per-backend timing for every backend created so far"""
+    with _backends_lock:
+        backends = {id(backend): backend for name, backend in _backends.items() if name != 'auto'}
+    return {backend.name: backend.stats() for backend in backends.values()}
@@ -8,9 +8,16 @@ import os
 import requests
 from pathlib import Path
 
+from embedders import encoding_version, get_embedder
+from face_quality import select_faces
+from face_stage import find_faces_in_frame
+from gallery import best_matches
+from metrics import timed
+
 
 class FaceMatcher:
-    def __init__(self, database_path='database/persons', tolerance=0.6, api_url='http://localhost:5000'):
+    def __init__(self, database_path='database/persons', tolerance=0.6, api_url='http://localhost:5000',
+                 camera_id='camera_0'):
         """
         Initialize face matcher with database of known faces
         
@@ -18,13 +25,16 @@ class FaceMatcher:
             database_path: Path to folder containing person images (fallback)
             tolerance: Face matching tolerance (lower is stricter, default 0.6)
             api_url: Base URL for the API server
+            camera_id: Camera label for the latency metrics
         """
         self.database_path = Path(database_path)
         self.tolerance = tolerance
         self.api_url = api_url
+        self.camera_id = camera_id
         self.known_face_encodings = []
         self.known_face_names = []
         self.known_face_ids = []  # Store person IDs for reference
+        self.embedder = get_embedder()
         self.load_database()
     
     def load_database(self):
@@ -63,7 +73,10 @@ class FaceMatcher:
                     # Load all face encodings for this person
                     for face_data in face_encodings:
                         encoding = face_data.get('encoding')
-                        if encoding and isinstance(encoding, list) and len(encoding) == 128:
+                        # Vectors from other embedders cannot be compared with ours
+                        if encoding_version(face_data) != self.embedder.version:
+                            continue
+                        if encoding and isinstance(encoding, list) and len(encoding) == self.embedder.size:
                             self.known_face_encodings.append(np.array(encoding))
                             self.known_face_names.append(person_name)
                             self.known_face_ids.append(person_id)
@@ -113,9 +126,9 @@ class FaceMatcher:
                 image = face_recognition.load_image_file(str(image_path))
                 
                 # Get face encodings
-                encodings = face_recognition.face_encodings(image)
+                encodings = self.embedder.embed(image, face_recognition.face_locations(image))
                 
-                if encodings:
+                if len(encodings):
                     # Use first face found in image
                     self.known_face_encodings.append(encodings[0])
                     # Use filename (without extension) as person name
@@ -130,57 +143,73 @@ class FaceMatcher:
         
         print(f"Local database loaded: {len(self.known_face_encodings)} persons")
     
-    def match_face(self, person_image):
+    def match_face(self, person_image, keypoints=None, bbox=None):
         """
         Match a person image against the database
         
         Args:
-            person_image: Cropped person image (numpy array)
+            person_image: Cropped person image (numpy array, BGR or grayscale), or the
+                FrameContext of the whole frame together with bbox
+            keypoints: Optional pose keypoints in image coordinates to locate the head
+            bbox: Person box (x1, y1, x2, y2) when person_image is the whole frame
             
         Returns:
             Tuple of (matched_name, confidence) or (None, 0) if no match
         """
-        if not self.known_face_encodings:
-            return None, 0
-        
-        # Convert BGR to RGB if needed
-        if len(person_image.shape) == 3 and person_image.shape[2] == 3:
-            rgb_image = cv2.cvtColor(person_image, cv2.COLOR_BGR2RGB)
-        else:
-            rgb_image = person_image
-        
-        # Use HOG model for faster detection (faster on CPU, good accuracy)
-        face_locations = face_recognition.face_locations(rgb_image, model='hog', number_of_times_to_upsample=0)
-        
-        if not face_locations:
-            return None, 0
-        
-        # Get face encodings - only for first face to save time
-        face_encodings = face_recognition.face_encodings(rgb_image, face_locations, num_jitters=1)
-        
-        if not face_encodings:
-            return None, 0
-        
-        # Use the first face found
-        face_encoding = face_encodings[0]
+        if isinstance(person_image, np.ndarray) and len(person_image.shape) == 2:
+            person_image = cv2.cvtColor(person_image, cv2.COLOR_GRAY2BGR)
         
-        # Calculate face distances (vectorized operation - much faster)
-        face_distances = face_recognition.face_distance(
-            self.known_face_encodings, 
-            face_encoding
-        )
-        
-        # Find best match using vectorized comparison
-        best_match_index = np.argmin(face_distances)
-        best_distance = face_distances[best_match_index]
+        return self.match_persons(person_image, [bbox], [keypoints] if keypoints is not None else None)[0]
+    
+    def match_persons(self, image, bboxes, keypoints=None):
+        """
+        Match all persons of a frame against the database
         
-        # Check if distance is within tolerance
-        if best_distance <= self.tolerance:
-            name = self.known_face_names[best_match_index]
-            confidence = 1 - best_distance
-            return name, confidence
+        Overlapping head regions are searched once, every face worth encoding is
+        encoded (see FACE_SELECTION in face_quality) and all of them are matched in
+        one gallery lookup.
         
-        return None, 0
+        Args:
+            image: BGR frame or its FrameContext
+            bboxes: Person boxes (x1, y1, x2, y2); None stands for the whole image
+            keypoints: Optional list of pose keypoints, one per box
+            
+        Returns:
+            One (matched_name, confidence) per box, (None, 0) where nothing matched
+        """
+        results = [(None, 0)] * len(bboxes)
+        if not self.known_face_encodings:
+            return results
+        
+        # Search only the head regions, scaled to the face size expected for each box
+        # (persons with pose keypoints get their face box without a search)
+        with timed('face_detection', self.camera_id):
+            faces = find_faces_in_frame(image, bboxes, keypoints=keypoints)
+        
+        # Don't pay for an encoding that cannot match (tiny, blurred, profile faces)
+        faces = select_faces(faces)
+        if not faces:
+            return results
+        
+        with timed('encoding', self.camera_id):
+            face_encodings = [
+                self.embedder.embed(face['rgb'], [face['location']], num_jitters=1, landmarks=[face.get('landmarks')])
+                for face in faces
+            ]
+        owners = [face['owner'] for face, encodings in zip(faces, face_encodings) if len(encodings)]
+        face_encodings = [encodings[0] for encodings in face_encodings if len(encodings)]
+        
+        # Find best matches for all faces at once (vectorized)
+        with timed('matching', self.camera_id):
+            indices, distances = best_matches(self.known_face_encodings, face_encodings)
+        
+        for owner, index, distance in zip(owners, indices, distances):
+            # Keep the person's best face within tolerance
+            confidence = 1 - distance
+            if distance <= self.tolerance and confidence > results[owner][1]:
+                results[owner] = (self.known_face_names[index], confidence)
+        
+        return results
     
     def reload_database(self):
         """Reload the database (useful for adding new persons without restarting)"""
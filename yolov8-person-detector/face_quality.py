@@ -0,0 +1,255 @@
+"""
+Face Quality Gate
+Cheap quality scoring (size, sharpness, yaw, exposure) that runs before
+face_encodings, plus a per-track gate that only spends encoder time on the
+best face seen so far for each person
+"""
+import time
+
+import cv2
+import face_recognition
+import numpy as np
+
+
+# Hard limits - faces outside these never get encoded
+MIN_FACE_SIZE = 40  # px, shorter side of the face box
+MIN_SHARPNESS = 30.0  # Laplacian variance of the face
+MAX_YAW = 0.45  # nose offset from the eye midpoint, relative to the eye distance
+MIN_BRIGHTNESS = 40  # mean grey level
+MAX_BRIGHTNESS = 220
+
+# Values at which a component counts as fully good
+GOOD_FACE_SIZE = 100
+GOOD_SHARPNESS = 150.0
+
+# Gate Settings
+GOOD_QUALITY = 0.6  # faces scoring at least this are encoded immediately
+IMPROVEMENT_MARGIN = 0.1  # re-encode a track only when quality improves by this much
+DEFER_SECONDS = 1.0  # longest wait for a better face before encoding the best acceptable one
+TRACK_IOU = 0.3  # person boxes overlapping at least this much continue a track
+TRACK_TTL = 2.0  # seconds a track survives without being seen
+REENCODE_INTERVAL = 10.0  # seconds after which a track may be encoded again at any quality
+
+# Faces per person crop worth encoding
+FACE_SELECTION = 'all'  # Options: all (every face that passes), best (largest/best-quality face only)
+MAX_FACES_PER_PERSON = 3  # cap for 'all'; crowded crops can hold several faces
+
+
+def assess_face(rgb_image, location, landmarks=None):
+    """
+    Score the quality of one detected face
+
+    Args:
+        rgb_image: RGB image the face was found in
+        location: Face box (top, right, bottom, left) in that image
+        landmarks: Optional eye and nose points in that image (e.g. from pose
+            keypoints); skips the landmark model for the yaw check
+
+    Returns:
+        Dictionary with size, sharpness, yaw, brightness, score (0-1) and passed
+    """
+    top, right, bottom, left = location
+    size = min(bottom - top, right - left)
+    quality = {'size': size, 'sharpness': 0.0, 'yaw': None, 'brightness': 0.0, 'score': 0.0, 'passed': False}
+
+    # Cheapest checks first; stop as soon as a face fails
+    if size < MIN_FACE_SIZE:
+        return quality
+
+    face = rgb_image[max(0, top):bottom, max(0, left):right]
+    if face.size == 0:
+        return quality
+    gray = cv2.cvtColor(face, cv2.COLOR_RGB2GRAY)
+
+    quality['brightness'] = float(gray.mean())
+    if not MIN_BRIGHTNESS <= quality['brightness'] <= MAX_BRIGHTNESS:
+        return quality
+
+    quality['sharpness'] = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    if quality['sharpness'] < MIN_SHARPNESS:
+        return quality
+
+    if landmarks is None:
+        # Landmarks on a contiguous copy of just the face (dlib does not take views)
+        face_box = (0, face.shape[1], face.shape[0], 0)
+        found = face_recognition.face_landmarks(np.ascontiguousarray(face), [face_box], model='small')
+        if not found:
+            return quality
+        landmarks = found[0]
+    yaw = estimate_yaw(landmarks)
+    quality['yaw'] = yaw
+    if yaw is None or abs(yaw) > MAX_YAW:
+        return quality
+
+    # Midpoint of the exposure range scores best
+    exposure_center = (MIN_BRIGHTNESS + MAX_BRIGHTNESS) / 2
+    exposure_score = 1.0 - abs(quality['brightness'] - exposure_center) / (exposure_center - MIN_BRIGHTNESS)
+
+    quality['score'] = float(
+        min(1.0, size / GOOD_FACE_SIZE)
+        * min(1.0, quality['sharpness'] / GOOD_SHARPNESS)
+        * (1.0 - abs(yaw) / MAX_YAW * 0.5)
+        * (0.5 + 0.5 * max(0.0, exposure_score))
+    )
+    quality['passed'] = True
+    return quality
+
+
+def select_faces(faces, mode=None):
+    """
+    Score detected faces and keep the ones worth encoding
+
+    Args:
+        faces: Dicts with 'owner', 'rgb' and 'location' (from find_faces_in_frame)
+        mode: 'all' or 'best' (default: FACE_SELECTION)
+
+    Returns:
+        The passing faces with a 'quality' entry added, best first. 'best' keeps
+        one face per owner, 'all' up to MAX_FACES_PER_PERSON.
+    """
+    mode = mode or FACE_SELECTION
+    limit = 1 if mode == 'best' else MAX_FACES_PER_PERSON
+
+    for face in faces:
+        face['quality'] = assess_face(face['rgb'], face['location'], face.get('landmarks'))
+
+    ranked = sorted((face for face in faces if face['quality']['passed']),
+                    key=lambda face: face['quality']['score'], reverse=True)
+
+    selected = []
+    per_owner = {}
+    for face in ranked:
+        if per_owner.get(face['owner'], 0) < limit:
+            per_owner[face['owner']] = per_owner.get(face['owner'], 0) + 1
+            selected.append(face)
+    return selected
+
+
+def estimate_yaw(landmarks):
+    """
+    Signed head yaw from 5-point landmarks (0 = frontal)
+
+    Args:
+        landmarks: One entry of face_recognition.face_landmarks(..., model='small')
+
+    Returns:
+        Horizontal nose offset from the eye midpoint divided by the eye distance,
+        or None if the landmarks are incomplete
+    """
+    left_eye = landmarks.get('left_eye')
+    right_eye = landmarks.get('right_eye')
+    nose = landmarks.get('nose_tip')
+    if not left_eye or not right_eye or not nose:
+        return None
+
+    left_center = np.mean(left_eye, axis=0)
+    right_center = np.mean(right_eye, axis=0)
+    eye_distance = np.linalg.norm(right_center - left_center)
+    if eye_distance < 1:
+        return None
+
+    eye_mid_x = (left_center[0] + right_center[0]) / 2
+    return float((np.mean(nose, axis=0)[0] - eye_mid_x) / eye_distance)
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x1, y1, x2, y2) boxes"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    intersection = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+class FaceQualityGate:
+    """Tracks persons by box overlap and passes on only their best faces"""
+
+    def __init__(self):
+        self.tracks = []
+        self.deferred = 0
+
+    def _track_for(self, bbox, now, claimed):
+        best, best_iou = None, TRACK_IOU
+        for track in self.tracks:
+            if id(track) in claimed:
+                continue
+            iou = box_iou(track['bbox'], bbox)
+            if iou >= best_iou:
+                best, best_iou = track, iou
+
+        if best is None:
+            best = {'bbox': bbox, 'best_encoded': 0.0, 'encoded_at': None, 'pending': None, 'pending_since': None}
+            self.tracks.append(best)
+
+        # A long-lived track gets a fresh look now and then (e.g. after gallery updates)
+        if best['encoded_at'] is not None and now - best['encoded_at'] >= REENCODE_INTERVAL:
+            best['best_encoded'] = 0.0
+            best['encoded_at'] = None
+
+        best['bbox'] = bbox
+        best['last_seen'] = now
+        claimed.add(id(best))
+        return best
+
+    def select(self, candidates, now=None, detach=None):
+        """
+        Choose which face candidates of a frame to encode
+
+        Args:
+            candidates: Dicts with 'bbox' (person box) and a passing 'quality' (faces
+                kept by select_faces; failing faces never reach the gate),
+                optionally 'track_box' (x1, y1, x2, y2) to track by instead of 'bbox'
+                (e.g. the face box when a person crop holds several faces), plus
+                whatever the caller needs to encode them later
+            now: Current monotonic time
+            detach: Optional function applied to a candidate before it is held for a
+                later frame, e.g. to copy views into per-frame buffers
+
+        Returns:
+            Candidates to encode, including deferred faces from earlier frames
+            whose wait has run out or whose track ended
+        """
+        if now is None:
+            now = time.monotonic()
+
+        selected = []
+        claimed = set()
+
+        for candidate in candidates:
+            track = self._track_for(candidate.get('track_box', candidate['bbox']), now, claimed)
+            quality = candidate['quality']
+
+            if quality['score'] < track['best_encoded'] + IMPROVEMENT_MARGIN:
+                continue  # Already encoded an equally good face of this person
+
+            if quality['score'] >= GOOD_QUALITY:
+                selected.append(candidate)
+                track['best_encoded'] = quality['score']
+                track['encoded_at'] = now
+                track['pending'] = None
+                track['pending_since'] = None
+                continue
+
+            # Acceptable but not good: hold it and hope for a better one
+            self.deferred += 1
+            if track['pending'] is None or quality['score'] > track['pending']['quality']['score']:
+                track['pending'] = detach(candidate) if detach else candidate
+            if track['pending_since'] is None:
+                track['pending_since'] = now
+
+        # Release deferred faces that waited long enough, or whose person left
+        alive = []
+        for track in self.tracks:
+            expired = now - track['last_seen'] > TRACK_TTL
+            pending = track['pending']
+            if pending is not None and (expired or now - track['pending_since'] >= DEFER_SECONDS):
+                selected.append(pending)
+                track['best_encoded'] = pending['quality']['score']
+                track['encoded_at'] = now
+                track['pending'] = None
+                track['pending_since'] = None
+            if not expired:
+                alive.append(track)
+        self.tracks = alive
+
+        return selected
@@ -0,0 +1,419 @@
+"""
+Face Search Stage
+Finds faces only in the head region of a YOLO person box instead of
+running the face detector over the whole person crop
+"""
+import cv2
+import numpy as np
+
+from face_detectors import get_face_detector
+from frame_context import FrameContext
+
+
+# Head region geometry, as fractions of the person box
+FULL_BODY_ASPECT = 1.8  # height/width ratio above which a box is a standing full body
+UPPER_BODY_ASPECT = 1.2  # height/width ratio above which a box is head and torso
+FULL_BODY_HEAD_FRACTION = 0.3  # top share of a full-body box that contains the head
+UPPER_BODY_HEAD_FRACTION = 0.6  # top share of a head-and-torso box that contains the head
+HEAD_REGION_MARGIN = 0.1  # horizontal margin added on each side of the person box
+
+# Pose keypoints (COCO order) that lie on the head
+HEAD_KEYPOINTS = (0, 1, 2, 3, 4)  # nose, left eye, right eye, left ear, right ear
+KEYPOINT_CONFIDENCE = 0.5  # minimum keypoint confidence to trust its position
+KEYPOINT_HEAD_SCALE = 2.5  # head size relative to the spread of the visible head keypoints
+
+# Faces taken straight from pose keypoints (no face detector pass)
+KEYPOINT_FACES = True  # use the keypoint face box whenever nose and both eyes are visible
+FACE_KEYPOINTS = (0, 1, 2)  # nose, left eye, right eye
+KEYPOINT_FACE_WIDTH = 2.0  # face box side relative to the eye distance
+KEYPOINT_EYE_LINE = 0.4  # eye line position from the top of the face box
+NOSE_DROP = 0.57  # nose tip below the eye line, relative to the eye distance of a frontal face
+KEYPOINT_CROP_MARGIN = 0.25  # context kept on each side of the face box in the crop
+
+MIN_REGION_SIZE = 20  # px - smaller head regions cannot hold a detectable face
+REGION_MERGE_OVERLAP = 0.3  # head regions overlapping this much (of the smaller one) are searched together
+MAX_REGION_SIZE = 400  # px - longest side of the searched region after downscaling
+
+# Search scale and upsampling from the face size expected for the person box
+FULL_BODY_FACE_FRACTION = 0.12  # face height relative to a full-body box height
+UPPER_BODY_FACE_FRACTION = 0.3  # face height relative to a head-and-torso box height
+CLOSE_UP_FACE_FRACTION = 0.6  # face size relative to the shorter side of a close-up box
+KEYPOINT_FACE_FRACTION = 0.6  # face size relative to a keypoint-derived head region
+TARGET_FACE_SIZE = 100  # px - faces are scaled towards this size before detection
+MAX_UPSCALE = 2.0  # largest interpolation factor applied to a head crop
+DETECTOR_MIN_FACE = 80  # px - smallest face HOG finds without upsampling (halves per pass)
+MAX_UPSAMPLE = 2
+LEVEL_RESIZE_TOLERANCE = 1.1  # pyramid levels up to 10% larger than planned are searched as they are
+
+
+def head_region_from_keypoints(keypoints):
+    """
+    Head box from pose keypoints
+
+    Args:
+        keypoints: Array of shape (17, 3) with x, y, confidence per COCO keypoint
+
+    Returns:
+        (x1, y1, x2, y2) as floats, or None if too few head keypoints are visible
+    """
+    keypoints = np.asarray(keypoints)
+    head = keypoints[list(HEAD_KEYPOINTS)]
+    visible = head[head[:, 2] >= KEYPOINT_CONFIDENCE][:, :2]
+
+    if len(visible) < 2:
+        return None
+
+    center_x, center_y = visible.mean(axis=0)
+    spread = np.ptp(visible, axis=0).max()
+    half = max(spread * KEYPOINT_HEAD_SCALE, MIN_REGION_SIZE) / 2
+
+    return center_x - half, center_y - half, center_x + half, center_y + half
+
+
+def face_from_keypoints(keypoints):
+    """
+    Face box and alignment landmarks from pose keypoints
+
+    Args:
+        keypoints: Array of shape (17, 3) with x, y, confidence per COCO keypoint
+
+    Returns:
+        Tuple ((x1, y1, x2, y2), landmarks) in keypoint coordinates, where landmarks
+        has 'left_eye', 'right_eye' and 'nose_tip' point lists like
+        face_recognition.face_landmarks(..., model='small'), or None unless the
+        nose and both eyes are visible
+    """
+    keypoints = np.asarray(keypoints)
+    nose, eye_a, eye_b = keypoints[list(FACE_KEYPOINTS)]
+    if min(nose[2], eye_a[2], eye_b[2]) < KEYPOINT_CONFIDENCE:
+        return None
+
+    # Image order, like dlib landmarks (COCO's left eye is the person's left)
+    left_eye, right_eye = sorted((eye_a[:2], eye_b[:2]), key=lambda point: point[0])
+    eye_mid = (left_eye + right_eye) / 2
+
+    # A turned head brings the eyes together; the nose drop keeps the box face-sized
+    span = max(np.linalg.norm(right_eye - left_eye), (nose[1] - eye_mid[1]) / NOSE_DROP)
+    size = span * KEYPOINT_FACE_WIDTH
+    center_x = (eye_mid[0] + nose[0]) / 2
+    top = eye_mid[1] - size * KEYPOINT_EYE_LINE
+
+    landmarks = {
+        'left_eye': [tuple(map(float, left_eye))],
+        'right_eye': [tuple(map(float, right_eye))],
+        'nose_tip': [tuple(map(float, nose[:2]))]
+    }
+    return (center_x - size / 2, top, center_x + size / 2, top + size), landmarks
+
+
+def head_region(bbox, image_shape, keypoints=None):
+    """
+    Area of the image that should contain the person's face
+
+    Args:
+        bbox: Person box (x1, y1, x2, y2), or None for the whole image
+        image_shape: Shape of the image the box refers to
+        keypoints: Optional pose keypoints for this person
+
+    Returns:
+        Integer (x1, y1, x2, y2) clipped to the image
+    """
+    height, width = image_shape[:2]
+    if bbox is None:
+        bbox = (0, 0, width, height)
+
+    region = head_region_from_keypoints(keypoints) if keypoints is not None else None
+
+    if region is None:
+        x1, y1, x2, y2 = bbox
+        box_width = x2 - x1
+        box_height = y2 - y1
+        aspect = box_height / max(box_width, 1)
+
+        if aspect >= FULL_BODY_ASPECT:
+            head_height = box_height * FULL_BODY_HEAD_FRACTION
+        elif aspect >= UPPER_BODY_ASPECT:
+            head_height = box_height * UPPER_BODY_HEAD_FRACTION
+        else:
+            head_height = box_height  # Close-up: the face can be anywhere in the box
+
+        margin = box_width * HEAD_REGION_MARGIN
+        region = (x1 - margin, y1, x2 + margin, y1 + head_height)
+
+    x1, y1, x2, y2 = region
+    return (
+        max(0, int(x1)),
+        max(0, int(y1)),
+        min(width, int(round(x2))),
+        min(height, int(round(y2)))
+    )
+
+
+def expected_face_size(bbox, image_shape, keypoints=None):
+    """
+    Face size (px) to expect for a person box
+
+    Args:
+        bbox: Person box (x1, y1, x2, y2), or None for the whole image
+        image_shape: Shape of the image the box refers to
+        keypoints: Optional pose keypoints for this person
+
+    Returns:
+        Expected face height in pixels
+    """
+    region = head_region_from_keypoints(keypoints) if keypoints is not None else None
+    if region is not None:
+        return max(region[2] - region[0], region[3] - region[1]) * KEYPOINT_FACE_FRACTION
+
+    if bbox is None:
+        bbox = (0, 0, image_shape[1], image_shape[0])
+    box_width = max(bbox[2] - bbox[0], 1)
+    box_height = max(bbox[3] - bbox[1], 1)
+    aspect = box_height / box_width
+
+    if aspect >= FULL_BODY_ASPECT:
+        return box_height * FULL_BODY_FACE_FRACTION
+    if aspect >= UPPER_BODY_ASPECT:
+        return box_height * UPPER_BODY_FACE_FRACTION
+    return min(box_width, box_height) * CLOSE_UP_FACE_FRACTION
+
+
+def search_plan(region, face_size=None, upsample=None):
+    """
+    Scale and upsampling for searching a region
+
+    With an expected face size and no fixed upsample, the region is scaled so
+    the face lands near TARGET_FACE_SIZE (up to MAX_UPSCALE for distant people,
+    down for close-ups), and upsampling makes up for what scaling cannot.
+
+    Returns:
+        Tuple (scale, upsample)
+    """
+    longest = max(region[2] - region[0], region[3] - region[1])
+    size_limit = MAX_REGION_SIZE / longest
+
+    if upsample is not None or not face_size:
+        return min(1.0, size_limit), upsample or 0
+
+    scale = min(MAX_UPSCALE, TARGET_FACE_SIZE / face_size, size_limit)
+    scaled_face = face_size * scale
+    upsample = 0
+    while upsample < MAX_UPSAMPLE and scaled_face * 2 ** upsample < DETECTOR_MIN_FACE:
+        upsample += 1
+    return scale, upsample
+
+
+def _search_region(image, region, upsample, detector, face_size=None):
+    """Detect faces in one (x1, y1, x2, y2) region of an image or FrameContext"""
+    x1, y1, x2, y2 = region
+    scale, upsample = search_plan(region, face_size, upsample)
+
+    if isinstance(image, FrameContext):
+        # Converted and downscaled once per frame; cut from the nearest pyramid level
+        # at or above the planned scale, so the planned upsample still applies
+        rgb_region, level_scale = image.region(region, scale)
+        if scale > 1.0:
+            rgb_region = cv2.resize(rgb_region, (int(rgb_region.shape[1] * scale), int(rgb_region.shape[0] * scale)),
+                                    interpolation=cv2.INTER_LINEAR)
+        elif level_scale > scale * LEVEL_RESIZE_TOLERANCE:
+            # Finish the downscale from the level so the region stays within MAX_REGION_SIZE
+            relative = scale / level_scale
+            rgb_region = cv2.resize(rgb_region, (max(1, int(rgb_region.shape[1] * relative)),
+                                                 max(1, int(rgb_region.shape[0] * relative))),
+                                    interpolation=cv2.INTER_AREA)
+        else:
+            scale = level_scale
+    else:
+        crop = image[y1:y2, x1:x2]
+
+        # Scale the crop so its faces have a detectable but not wasteful size
+        if scale != 1.0:
+            crop = cv2.resize(crop, (int(crop.shape[1] * scale), int(crop.shape[0] * scale)),
+                              interpolation=cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR)
+
+        rgb_region = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+
+    if detector is None:
+        detector = get_face_detector()
+    region_locations = detector.detect(rgb_region, upsample)
+
+    image_locations = [
+        (int(top / scale) + y1, int(right / scale) + x1, int(bottom / scale) + y1, int(left / scale) + x1)
+        for top, right, bottom, left in region_locations
+    ]
+
+    return rgb_region, region_locations, image_locations
+
+
+def find_faces(image, bbox=None, keypoints=None, upsample=None, detector=None):
+    """
+    Detect faces in the head region of a person
+
+    Args:
+        image: BGR frame or person crop, or the FrameContext of the current frame
+        bbox: Person box (x1, y1, x2, y2) in image coordinates (default: whole image)
+        keypoints: Optional (17, 3) COCO pose keypoints in image coordinates
+        upsample: Fixed upsampling passes, or None to choose scale and upsampling
+            from the expected face size
+        detector: FaceDetector to use (default: the configured backend)
+
+    Returns:
+        Tuple (rgb_region, region_locations, image_locations): the RGB head region
+        that was searched, face boxes (top, right, bottom, left) inside it, and the
+        same boxes mapped back to image coordinates. With a FrameContext the region
+        is a view into the frame's shared RGB buffers.
+    """
+    region = head_region(bbox, image.shape, keypoints)
+
+    if region[2] - region[0] < MIN_REGION_SIZE or region[3] - region[1] < MIN_REGION_SIZE:
+        return None, [], []
+
+    face_size = expected_face_size(bbox, image.shape, keypoints)
+    return _search_region(image, region, upsample, detector, face_size)
+
+
+def _overlap(a, b):
+    """Intersection of two boxes relative to the smaller one"""
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return width * height / smaller if smaller > 0 else 0.0
+
+
+def _longest(box):
+    return max(box[2] - box[0], box[3] - box[1])
+
+
+def _merge_regions(regions):
+    """Group overlapping head regions; returns [(union_box, [region indices])]"""
+    groups = []
+    for index, region in enumerate(regions):
+        box, members = region, [index]
+        # Absorb every group this region (or the growing union) overlaps
+        merged = True
+        while merged:
+            merged = False
+            for group in groups:
+                if _overlap(box, group[0]) < REGION_MERGE_OVERLAP:
+                    continue
+                union = (min(box[0], group[0][0]), min(box[1], group[0][1]),
+                         max(box[2], group[0][2]), max(box[3], group[0][3]))
+                # Never merge into a region that would have to be downscaled more
+                if _longest(union) > max(MAX_REGION_SIZE, _longest(box), _longest(group[0])):
+                    continue
+                groups.remove(group)
+                box = union
+                members = group[1] + members
+                merged = True
+                break
+        groups.append((box, members))
+    return groups
+
+
+def _keypoint_face(image, owner, keypoints):
+    """Face dict for one person from its pose keypoints, or None"""
+    found = face_from_keypoints(keypoints)
+    if found is None:
+        return None
+    (fx1, fy1, fx2, fy2), landmarks = found
+
+    height, width = image.shape[:2]
+    margin = (fx2 - fx1) * KEYPOINT_CROP_MARGIN
+    x1, y1 = max(0, int(fx1 - margin)), max(0, int(fy1 - margin))
+    x2, y2 = min(width, int(round(fx2 + margin))), min(height, int(round(fy2 + margin)))
+    if x2 - x1 < MIN_REGION_SIZE or y2 - y1 < MIN_REGION_SIZE:
+        return None
+
+    # Large faces are only downscaled; the encoder resamples them anyway
+    scale = min(1.0, TARGET_FACE_SIZE / (fx2 - fx1))
+    if isinstance(image, FrameContext):
+        rgb_region, scale = image.region((x1, y1, x2, y2), scale)
+    else:
+        crop = image[y1:y2, x1:x2]
+        if scale < 1.0:
+            crop = cv2.resize(crop, (int(crop.shape[1] * scale), int(crop.shape[0] * scale)),
+                              interpolation=cv2.INTER_AREA)
+        rgb_region = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+
+    region_height, region_width = rgb_region.shape[:2]
+    location = (
+        max(0, int((fy1 - y1) * scale)),
+        min(region_width, int((fx2 - x1) * scale)),
+        min(region_height, int((fy2 - y1) * scale)),
+        max(0, int((fx1 - x1) * scale))
+    )
+    return {
+        'owner': owner,
+        'rgb': rgb_region,
+        'location': location,
+        'image_location': (max(0, int(fy1)), min(width, int(fx2)), min(height, int(fy2)), max(0, int(fx1))),
+        'landmarks': {
+            name: [((x - x1) * scale, (y - y1) * scale) for x, y in points]
+            for name, points in landmarks.items()
+        }
+    }
+
+
+def find_faces_in_frame(image, bboxes, keypoints=None, upsample=None, detector=None):
+    """
+    Detect the faces of all persons in a frame, searching each area only once
+
+    Persons whose pose keypoints show the nose and both eyes get their face box
+    from the keypoints without a detector pass (see KEYPOINT_FACES). For the
+    rest, overlapping head regions (crowds, duplicate person boxes) are merged
+    and searched together, and every face found is assigned to exactly one person.
+
+    Args:
+        image: BGR frame or the FrameContext of the current frame
+        bboxes: Person boxes (x1, y1, x2, y2)
+        keypoints: Optional list of (17, 3) pose keypoints, one per box
+        upsample: Fixed upsampling passes, or None to choose scale and upsampling
+            from the expected face size (per merged region, for its smallest face)
+        detector: FaceDetector to use (default: the configured backend)
+
+    Returns:
+        List of dicts with 'owner' (index into bboxes), 'rgb' (searched RGB region),
+        'location' (face box in that region) and 'image_location' (face box in the image).
+        Keypoint faces also carry 'landmarks' (eye and nose points in the region).
+    """
+    faces = []
+    regions = []
+    face_sizes = []
+    for index, bbox in enumerate(bboxes):
+        person_keypoints = keypoints[index] if keypoints is not None else None
+        if KEYPOINT_FACES and person_keypoints is not None:
+            face = _keypoint_face(image, index, person_keypoints)
+            if face is not None:
+                faces.append(face)
+                continue
+
+        region = head_region(bbox, image.shape, person_keypoints)
+        if region[2] - region[0] >= MIN_REGION_SIZE and region[3] - region[1] >= MIN_REGION_SIZE:
+            regions.append((index, region))
+            face_sizes.append(expected_face_size(bbox, image.shape, person_keypoints))
+
+    for box, members in _merge_regions([region for _, region in regions]):
+        face_size = min(face_sizes[member] for member in members)
+        rgb_region, region_locations, image_locations = _search_region(image, box, upsample, detector, face_size)
+
+        for location, image_location in zip(region_locations, image_locations):
+            top, right, bottom, left = image_location
+            center_x, center_y = (left + right) / 2, (top + bottom) / 2
+
+            # Owner: the person whose head region contains the face and is centred closest to it
+            def distance(member):
+                x1, y1, x2, y2 = regions[member][1]
+                inside = x1 <= center_x <= x2 and y1 <= center_y <= y2
+                return (not inside, (center_x - (x1 + x2) / 2) ** 2 + (center_y - (y1 + y2) / 2) ** 2)
+
+            owner = regions[min(members, key=distance)][0]
+            faces.append({
+                'owner': owner,
+                'rgb': rgb_region,
+                'location': location,
+                'image_location': image_location
+            })
+
+    return faces
@@ -0,0 +1,103 @@
+"""
+Frame Context
+Per-frame image cache: colour conversion and downscaling happen at most once
+per frame into buffers that are reused across frames, and person and head
+regions are served as views instead of per-detection copies
+"""
+import math
+
+import cv2
+import numpy as np
+
+
+PYRAMID_LEVELS = 3  # RGB levels kept per frame: full, 1/2 and 1/4 resolution
+
+
+class FrameContext:
+    """Lazily converted and downscaled views of the current frame"""
+
+    def __init__(self, levels=PYRAMID_LEVELS):
+        self.levels = levels
+        self.frame = None
+        self._buffers = {}  # (kind, level) -> array reused while the frame size stays the same
+        self._ready = set()  # RGB levels already computed for the current frame
+
+    @property
+    def shape(self):
+        return self.frame.shape
+
+    def _buffer(self, kind, level, shape):
+        buffer = self._buffers.get((kind, level))
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            self._buffers[(kind, level)] = buffer
+        return buffer
+
+    def update(self, frame, max_width=None):
+        """
+        Start a new frame
+
+        Args:
+            frame: BGR frame from the camera
+            max_width: Optional width to downscale wider frames to
+
+        Returns:
+            The BGR frame used for analysis. When downscaled it lives in a reused
+            buffer and is only valid until the next update.
+        """
+        height, width = frame.shape[:2]
+        if max_width and width > max_width:
+            size = (max_width, int(height * max_width / width))
+            frame = cv2.resize(frame, size, dst=self._buffer('bgr', 0, (size[1], size[0], 3)))
+
+        self.frame = frame
+        self._ready.clear()
+        return frame
+
+    def rgb(self, level=0):
+        """
+        RGB version of the frame at a pyramid level (0 = full resolution)
+
+        Each level is computed once per frame, level N from level N - 1.
+        """
+        level = min(level, self.levels - 1)
+        if level in self._ready:
+            return self._buffers[('rgb', level)]
+
+        if level == 0:
+            buffer = self._buffer('rgb', 0, self.frame.shape)
+            cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB, dst=buffer)
+        else:
+            source = self.rgb(level - 1)
+            height, width = source.shape[0] // 2, source.shape[1] // 2
+            buffer = self._buffer('rgb', level, (height, width, 3))
+            cv2.resize(source, (width, height), dst=buffer, interpolation=cv2.INTER_AREA)
+
+        self._ready.add(level)
+        return buffer
+
+    def crop(self, bbox):
+        """BGR view of a (x1, y1, x2, y2) box, clipped to the frame"""
+        height, width = self.frame.shape[:2]
+        x1, y1, x2, y2 = bbox
+        return self.frame[max(0, int(y1)):min(height, int(y2)), max(0, int(x1)):min(width, int(x2))]
+
+    def region(self, box, scale=1.0):
+        """
+        RGB view of a (x1, y1, x2, y2) box from the coarsest pyramid level that is
+        still at least as large as scale (never smaller, so faces keep the size the
+        caller planned for)
+
+        Returns:
+            Tuple (rgb_view, scale) where scale is the level's actual scale, mapping
+            frame coordinates to the view
+        """
+        x1, y1, x2, y2 = box
+        level = 0
+        if scale < 1.0:
+            level = min(self.levels - 1, int(math.floor(-math.log2(scale) + 1e-9)))
+
+        scale = 0.5 ** level
+        rgb = self.rgb(level)
+        view = rgb[int(y1 * scale):int(math.ceil(y2 * scale)), int(x1 * scale):int(math.ceil(x2 * scale))]
+        return view, scale
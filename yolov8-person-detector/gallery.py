@@ -0,0 +1,36 @@
+"""
+Gallery Lookup
+Batched nearest-neighbour search of face encodings against the known faces:
+one matrix operation for all faces of a frame instead of one per face
+"""
+import numpy as np
+
+
+def best_matches(known_encodings, encodings):
+    """
+    Closest known face for each query encoding
+
+    Args:
+        known_encodings: (N, 128) array or list of gallery encodings
+        encodings: (M, 128) array or list of query encodings
+
+    Returns:
+        Tuple (indices, distances) of length M: index of the closest gallery
+        encoding and its euclidean distance (same metric as face_distance)
+    """
+    known = np.asarray(known_encodings, dtype=np.float64)
+    queries = np.asarray(encodings, dtype=np.float64)
+
+    if known.size == 0 or queries.size == 0:
+        return np.empty(0, dtype=int), np.empty(0)
+    queries = queries.reshape(-1, known.shape[-1])
+
+    # |a - b|^2 = |a|^2 + |b|^2 - 2ab, without building an (M, N, 128) difference array
+    squared = (
+        np.einsum('ij,ij->i', queries, queries)[:, None]
+        + np.einsum('ij,ij->i', known, known)[None, :]
+        - 2.0 * queries @ known.T
+    )
+    indices = np.argmin(squared, axis=1)
+    distances = np.sqrt(np.maximum(squared[np.arange(len(queries)), indices], 0.0))
+    return indices, distances
@@ -7,11 +7,17 @@ import time
 from person_detector import PersonDetector
 from face_matcher import FaceMatcher
 from alert_system import AlertSystem
+from annotation import Annotations
+from face_detectors import detector_stats
+from frame_context import FrameContext
+from metrics import observe, start_metrics_server, timed
+from run_control import headless_requested, install_control_signals
 from datetime import datetime
 
 
 # Configuration
 CAMERA_INDEX = 0
+CAMERA_ID = f'camera_{CAMERA_INDEX}'  # label for the latency metrics
 CAMERA_NAME = 'Main Entrance Camera'  # Name of the camera
 CAMERA_LOCATION = 'Building A - Main Entrance'  # Physical location of the camera
 CONFIDENCE_THRESHOLD = 0.5
@@ -20,7 +26,7 @@ ALERT_COOLDOWN = 5  # seconds
 DATABASE_PATH = 'database/persons'
 API_URL = 'http://localhost:5000'  # Backend API URL
 AUTO_RELOAD_INTERVAL = 30  # seconds - automatically reload database every 30 seconds
-YOLO_MODEL = 'yolov8n.pt'  # Options: yolov8n, yolov8s, yolov8m, yolov8l, yolov8x
+YOLO_MODEL = 'yolov8n.pt'  # Options: yolov8n, yolov8s, yolov8m, yolov8l, yolov8x (add -pose for keypoint face boxes)
 FRAME_SKIP = 3  # Process every Nth frame for face matching (increased for better performance)
 RESIZE_MAX_WIDTH = 1280  # Maximum frame width for processing
 
@@ -42,7 +48,8 @@ def main():
     matcher = FaceMatcher(
         database_path=DATABASE_PATH,
         tolerance=FACE_MATCH_TOLERANCE,
-        api_url=API_URL
+        api_url=API_URL,
+        camera_id=CAMERA_ID
     )
     
     print("[3/4] Initializing alert system...")
@@ -61,12 +68,22 @@ def main():
     cap.set(cv2.CAP_PROP_FPS, 30)
     cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer for lower latency
     
+    # Per-stage latency histograms (and /control for headless runs)
+    start_metrics_server()
+    control = install_control_signals()
+    headless = headless_requested()  # no drawing or GUI calls (server processes)
+    
     print("\n✓ System ready!")
-    print("\nControls:")
-    print("  - Press 'q' to quit")
-    print("  - Press 'r' to reload database (refresh missing persons from API)")
-    print("  - Press 's' to save screenshot")
-    print("  - Press 'c' to clear alert cooldowns")
+    if headless:
+        print("\nHeadless mode (no video window):")
+        print("  - SIGTERM or POST /control/stop to quit")
+        print("  - SIGHUP or POST /control/reload to reload database")
+    else:
+        print("\nControls:")
+        print("  - Press 'q' to quit")
+        print("  - Press 'r' to reload database (refresh missing persons from API)")
+        print("  - Press 's' to save screenshot")
+        print("  - Press 'c' to clear alert cooldowns")
     print(f"\n🔄 Auto-reload: Database will refresh every {AUTO_RELOAD_INTERVAL} seconds")
     print("="*60 + "\n")
     
@@ -85,53 +102,62 @@ def main():
     # Auto-reload tracking
     last_reload_time = time.time()
     
+    # Colour conversion and downscaling shared by all detections of a frame
+    frame_context = FrameContext()
+    
     try:
-        while True:
+        while not control.stopping:
+            read_start = time.perf_counter()
             ret, frame = cap.read()
             if not ret:
                 print("Error: Could not read frame")
                 break
+            observe('decode', CAMERA_ID, time.perf_counter() - read_start)
             
             frame_count += 1
             current_time = time.time()
             
+            # Reload requested by SIGHUP or /control/reload
+            if control.take_reload():
+                print("\n🔄 Reload requested - Reloading database...")
+                matcher.reload_database()
+                last_reload_time = current_time
+            
             # Auto-reload database at specified interval
-            if AUTO_RELOAD_INTERVAL > 0 and (current_time - last_reload_time) >= AUTO_RELOAD_INTERVAL:
+            elif AUTO_RELOAD_INTERVAL > 0 and (current_time - last_reload_time) >= AUTO_RELOAD_INTERVAL:
                 print(f"\n🔄 Auto-reloading database... (every {AUTO_RELOAD_INTERVAL}s)")
                 matcher.reload_database()
                 last_reload_time = current_time
             
             # Detect persons in frame
-            detections = detector.detect_persons(frame)
+            frame_context.update(frame)
+            with timed('yolo', CAMERA_ID):
+                detections = detector.detect_persons(frame)
             
             # Only perform face matching every FRAME_SKIP frames to improve performance
             if frame_count % FRAME_SKIP == 0:
-                labels = []
+                # Match every person large enough to show a face, in one batch
+                matchable = [
+                    detection for detection in detections
+                    if detection['bbox'][3] - detection['bbox'][1] >= 60 and detection['bbox'][2] - detection['bbox'][0] >= 60
+                ]
+                bboxes = [detection['bbox'] for detection in matchable]
+                keypoints = [detection.get('keypoints') for detection in matchable]
+                # The head regions are downscaled from the frame pyramid
+                matched = dict(zip(bboxes, matcher.match_persons(frame_context, bboxes, keypoints)))
                 
+                labels = []
                 for detection in detections:
-                    cropped_person = detection['cropped_image']
-                    
-                    # Skip if cropped image is too small
-                    if cropped_person.shape[0] < 60 or cropped_person.shape[1] < 60:
-                        labels.append(None)
-                        continue
-                    
-                    # Resize large images for faster face matching
-                    if cropped_person.shape[0] > 400 or cropped_person.shape[1] > 400:
-                        scale = 400 / max(cropped_person.shape[0], cropped_person.shape[1])
-                        new_width = int(cropped_person.shape[1] * scale)
-                        new_height = int(cropped_person.shape[0] * scale)
-                        cropped_person = cv2.resize(cropped_person, (new_width, new_height))
-                    
-                    # Match face
-                    matched_name, confidence = matcher.match_face(cropped_person)
+                    matched_name, confidence = matched.get(detection['bbox'], (None, 0))
                     
                     if matched_name:
                         label = f"{matched_name} ({confidence:.1%})"
                         labels.append(label)
                         
                         # Trigger alert with camera info
-                        if alert_system.trigger_alert(matched_name, confidence, CAMERA_NAME, CAMERA_LOCATION):
+                        with timed('dispatch', CAMERA_ID):
+                            triggered = alert_system.trigger_alert(matched_name, confidence, CAMERA_NAME, CAMERA_LOCATION)
+                        if triggered and not headless:
                             active_alerts[matched_name] = {
                                 'time': current_time,
                                 'confidence': confidence
@@ -145,27 +171,27 @@ def main():
                 # Use cached labels from previous frame
                 labels = last_labels if len(last_labels) == len(detections) else [None] * len(detections)
             
-            # Draw detections
-            annotated_frame = detector.draw_detections(frame, detections, labels)
+            # Headless: alerts are sent above; nothing is drawn, shown or polled
+            if headless:
+                continue
             
-            # Draw alert banners for recent alerts
-            alerts_to_remove = []
-            for person_name, alert_info in active_alerts.items():
-                if current_time - alert_info['time'] < 3:  # Show banner for 3 seconds
-                    annotated_frame = alert_system.draw_alert_banner(
-                        annotated_frame, 
-                        person_name, 
-                        alert_info['confidence'],
-                        CAMERA_NAME,
-                        CAMERA_LOCATION
-                    )
-                else:
-                    alerts_to_remove.append(person_name)
+            # Draw detections (in place)
+            annotated_frame = detector.draw_detections(frame, detections, labels)
             
-            # Remove expired alert banners
-            for person_name in alerts_to_remove:
+            # Remove expired alert banners (shown for 3 seconds)
+            for person_name in [name for name, info in active_alerts.items() if current_time - info['time'] >= 3]:
                 del active_alerts[person_name]
             
+            # Banners and the info panel are drawn together in one pass below
+            annotations = Annotations()
+            alert_system.draw_alert_banners(
+                annotated_frame,
+                [(person_name, alert_info['confidence']) for person_name, alert_info in active_alerts.items()],
+                CAMERA_NAME,
+                CAMERA_LOCATION,
+                annotations
+            )
+            
             # Calculate FPS
             fps_counter += 1
             if fps_counter >= 30:
@@ -183,8 +209,8 @@ def main():
             
             y_offset = annotated_frame.shape[0] - 120
             for i, text in enumerate(info_text):
-                cv2.putText(annotated_frame, text, (10, y_offset + i*25),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+                annotations.text(text, (10, y_offset + i*25), 0.6, (0, 255, 0), 2)
+            annotations.render(annotated_frame)
             
             # Display frame
             cv2.imshow('YOLOv8 Person Detection & Recognition', annotated_frame)
@@ -216,7 +242,8 @@ def main():
         # Cleanup
         print("\nCleaning up...")
         cap.release()
-        cv2.destroyAllWindows()
+        if not headless:
+            cv2.destroyAllWindows()
         
         # Print alert log
         alert_log = alert_system.get_alert_log()
@@ -227,6 +254,13 @@ def main():
             for alert in alert_log:
                 print(alert)
         
+        # Print face detector timing
+        stats = detector_stats()
+        if stats:
+            print("\nFace detector timing:")
+            for backend, backend_stats in stats.items():
+                print(f"  {backend}: {backend_stats['calls']} calls, {backend_stats['avg_ms']} ms avg")
+        
         print("\n✓ System shutdown complete")
 
 
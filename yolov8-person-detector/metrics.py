@@ -0,0 +1,249 @@
+"""
+Pipeline Metrics
+Per-stage latency histograms labelled by camera, exported in the Prometheus
+text format from a small built-in /metrics HTTP endpoint (no extra packages).
+The same endpoint serves on-demand profiles at /profile and run control
+(/control/stop, /control/reload) to local clients.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+# Metrics Settings
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 9108))  # one port per process; 0 disables the endpoint
+METRICS_HOST = '0.0.0.0'
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)  # seconds
+ALERT_LATENCY_SLO = float(os.environ.get('ALERT_LATENCY_SLO', 2.0))  # seconds from capture to alert sent
+
+# Pipeline stages, in frame order
+STAGES = (
+    'decode',          # capture read: waiting for and decoding the next frame
+    'resize',          # downscaling the frame for analysis
+    'yolo',            # person detection
+    'face_detection',  # face search in head regions (or over the frame)
+    'encoding',        # face embeddings
+    'matching',        # gallery lookup
+    'dispatch',        # sending alerts to the backend
+)
+ALERT_LATENCY = 'alert_latency'  # end to end: frame captured until its alert was accepted by the backend
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class FrameTrace:
+    """
+    Monotonic capture time of one frame plus the time its stages took
+
+    Travels with the frame (and its faces, even when they are encoded on a
+    later frame) so alerts can report how old the frame was when they went out.
+    """
+
+    def __init__(self, captured_at=None, read_seconds=None):
+        """
+        Args:
+            captured_at: time.monotonic() when the frame was read (default: now)
+            read_seconds: Time the capture read took, recorded as the decode stage
+        """
+        self.captured_at = time.monotonic() if captured_at is None else captured_at
+        # Wall-clock equivalent for other machines; monotonic values mean nothing there
+        self.captured_wall = time.time() - (time.monotonic() - self.captured_at)
+        self.stages = {}
+        if read_seconds is not None:
+            self.stages['decode'] = read_seconds
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def age(self):
+        """Seconds since the frame was captured"""
+        return time.monotonic() - self.captured_at
+
+    def to_payload(self):
+        """Timings for an alert payload, in milliseconds (decode precedes the capture time)"""
+        return {
+            'capturedAt': datetime.fromtimestamp(self.captured_wall).isoformat(),
+            'stagesMs': {stage: round(seconds * 1000, 2) for stage, seconds in self.stages.items()},
+            'captureToDispatchMs': round(self.age() * 1000, 2)
+        }
+
+
+_histograms = {}  # (stage, camera) -> Histogram
+_lock = threading.Lock()
+_server = None
+
+
+def observe(stage, camera, seconds):
+    """Record one stage duration for a camera"""
+    with _lock:
+        histogram = _histograms.get((stage, camera))
+        if histogram is None:
+            histogram = _histograms[(stage, camera)] = Histogram()
+        histogram.observe(seconds)
+
+
+@contextmanager
+def timed(stage, camera, trace=None):
+    """Time the enclosed block as one observation of a stage (and add it to a FrameTrace)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        observe(stage, camera, seconds)
+        if trace is not None:
+            trace.add(stage, seconds)
+
+
+def observe_alert_latency(trace, camera, label=None):
+    """
+    Record capture-to-alert time of a delivered alert, warning when over the SLO
+
+    Returns:
+        The latency in seconds
+    """
+    latency = trace.age()
+    observe(ALERT_LATENCY, camera, latency)
+    if latency > ALERT_LATENCY_SLO:
+        print(f"[{label or camera}] ⏰ Alert {latency:.2f}s after capture (SLO {ALERT_LATENCY_SLO:g}s)")
+    return latency
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render():
+    """All histograms in the Prometheus text exposition format"""
+    lines = [
+        '# HELP surveillance_stage_seconds Time spent per pipeline stage and frame',
+        '# TYPE surveillance_stage_seconds histogram'
+    ]
+    with _lock:
+        snapshot = sorted((key, list(h.counts), h.sum, h.count, h.buckets) for key, h in _histograms.items())
+
+    for (stage, camera), counts, total, count, buckets in snapshot:
+        labels = f'stage="{_label(stage)}",camera="{_label(camera)}"'
+        cumulative = 0
+        for bound, bucket_count in zip(buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'surveillance_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'surveillance_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f'surveillance_stage_seconds_sum{{{labels}}} {total}')
+        lines.append(f'surveillance_stage_seconds_count{{{labels}}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _is_local(self):
+        if self.client_address[0] in ('127.0.0.1', '::1'):
+            return True
+        self.send_error(403)
+        return False
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        if path == '/profile':
+            self._profile(parse_qs(query))
+            return
+        if path == '/control':
+            self._control(None)
+            return
+        if path != '/metrics':
+            self.send_error(404)
+            return
+        self._send(200, render().encode(), 'text/plain; version=0.0.4; charset=utf-8')
+
+    def _profile(self, query):
+        """Blocking profile of this process: /profile?seconds=N (local clients only)"""
+        if not self._is_local():
+            return
+        from profiler import PROFILE_SECONDS, run_profile
+
+        try:
+            seconds = float(query.get('seconds', [PROFILE_SECONDS])[-1])
+        except ValueError:
+            self.send_error(400)
+            return
+        report = run_profile(seconds)
+        if report is None:
+            self._send(409, b'{"error": "A profile is already running"}', 'application/json')
+            return
+        self._send(200, json.dumps(report, indent=2).encode(), 'application/json')
+
+    def do_POST(self):
+        path = self.path.partition('?')[0]
+        if path not in ('/control/stop', '/control/reload'):
+            self.send_error(404)
+            return
+        self._control(path[len('/control/'):])
+
+    def _control(self, action):
+        """Stop or reload the processing loop like the 'q' and 'r' keys (local clients only)"""
+        if not self._is_local():
+            return
+        from run_control import get_run_control
+
+        control = get_run_control()
+        if action is not None and action not in control.actions:
+            # No loop in this process polls for it; accepting would be a silent no-op
+            self._send(409, json.dumps({'error': f"Nothing in this process handles {action}",
+                                        **control.status()}).encode(), 'application/json')
+            return
+        if action == 'stop':
+            control.request_stop('/control/stop')
+        elif action == 'reload':
+            control.request_reload()
+        self._send(200, json.dumps(control.status()).encode(), 'application/json')
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the console
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """
+    Serve /metrics from a daemon thread (once per process)
+
+    Returns:
+        The HTTP server, or None if disabled or the port is taken
+    """
+    global _server
+    if _server is not None or not port:
+        return _server
+
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"⚠️  Metrics endpoint unavailable on port {port} ({e})")
+        return None
+
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name='metrics', daemon=True).start()
+    print(f"📈 Metrics at http://{host}:{port}/metrics")
+    return _server
@@ -5,6 +5,8 @@ from ultralytics import YOLO
 import cv2
 import numpy as np
 
+from annotation import draw_text
+
 
 class PersonDetector:
     def __init__(self, model_name='yolov8n.pt', confidence_threshold=0.5):
@@ -12,7 +14,8 @@ class PersonDetector:
         Initialize YOLOv8 person detector
         
         Args:
-            model_name: YOLOv8 model variant (yolov8n, yolov8s, yolov8m, yolov8l, yolov8x)
+            model_name: YOLOv8 model variant (yolov8n, yolov8s, yolov8m, yolov8l, yolov8x);
+                pose variants (e.g. yolov8n-pose.pt) add keypoints to every detection
             confidence_threshold: Minimum confidence for detection
         """
         self.model = YOLO(model_name)
@@ -28,14 +31,17 @@ class PersonDetector:
             
         Returns:
             List of dictionaries containing detection info:
-            [{'bbox': (x1, y1, x2, y2), 'confidence': float, 'cropped_image': np.array}]
+            [{'bbox': (x1, y1, x2, y2), 'confidence': float, 'keypoints': (17, 3) array or None}]
+            Keypoints (x, y, confidence per COCO keypoint) come from pose models only.
+            Crops are not copied out; use FrameContext.crop(bbox) for a view
         """
         results = self.model(frame, verbose=False)
         detections = []
         
         for result in results:
             boxes = result.boxes
-            for box in boxes:
+            keypoints = result.keypoints.data.cpu().numpy() if result.keypoints is not None else None
+            for index, box in enumerate(boxes):
                 # Get class ID and confidence
                 class_id = int(box.cls[0])
                 confidence = float(box.conf[0])
@@ -49,20 +55,17 @@ class PersonDetector:
                     x1, y1 = max(0, x1), max(0, y1)
                     x2, y2 = min(frame.shape[1], x2), min(frame.shape[0], y2)
                     
-                    # Crop person from frame
-                    cropped_person = frame[y1:y2, x1:x2]
-                    
                     detections.append({
                         'bbox': (x1, y1, x2, y2),
                         'confidence': confidence,
-                        'cropped_image': cropped_person
+                        'keypoints': keypoints[index] if keypoints is not None else None
                     })
         
         return detections
     
     def draw_detections(self, frame, detections, labels=None):
         """
-        Draw bounding boxes on frame
+        Draw bounding boxes on frame (in place, the frame is not copied)
         
         Args:
             frame: Input frame
@@ -70,9 +73,9 @@ class PersonDetector:
             labels: Optional list of labels for each detection
             
         Returns:
-            Frame with drawn bounding boxes
+            The same frame with drawn bounding boxes
         """
-        annotated_frame = frame.copy()
+        annotated_frame = frame
         
         for idx, detection in enumerate(detections):
             x1, y1, x2, y2 = detection['bbox']
@@ -94,8 +97,7 @@ class PersonDetector:
             cv2.rectangle(annotated_frame, (x1, y1 - label_size[1] - 10), 
                          (x1 + label_size[0], y1), color, -1)
             
-            # Draw label text
-            cv2.putText(annotated_frame, label_text, (x1, y1 - 5),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            # Draw label text (rasterised once per distinct label)
+            draw_text(annotated_frame, label_text, (x1, y1 - 5), 0.6, (255, 255, 255), 2)
         
         return annotated_frame
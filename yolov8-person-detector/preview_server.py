@@ -0,0 +1,252 @@
+"""
+Annotated Preview Streams
+Serves low-rate annotated MJPEG previews of the cameras of a worker. Each preview
+frame is JPEG-encoded once and shared by every viewer, slow viewers skip to the
+newest frame, and nothing is drawn or encoded while nobody is watching.
+"""
+import html
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote
+
+import cv2
+
+
+# Preview Settings
+PREVIEW_PORT = int(os.environ.get('PREVIEW_PORT', 9109))  # one port per process; 0 disables previews
+# Previews show matched persons' names without any authentication, so they are
+# served on this machine only; PREVIEW_HOST=0.0.0.0 (or an interface address)
+# exposes them to the network, e.g. behind an authenticating reverse proxy
+PREVIEW_HOST = os.environ.get('PREVIEW_HOST', '127.0.0.1')
+PREVIEW_FPS = float(os.environ.get('PREVIEW_FPS', 2))  # preview frames per second per camera
+PREVIEW_WIDTH = 640  # previews are downscaled to at most this width before encoding
+PREVIEW_JPEG_QUALITY = 70
+CLIENT_TIMEOUT = 10  # seconds a viewer may stall a write before it is dropped
+BOUNDARY = 'previewframe'
+
+_channels = {}
+_channels_lock = threading.Lock()
+_server = None
+
+
+class PreviewChannel:
+    """
+    Latest annotated preview of one camera
+
+    The camera thread publishes; every viewer waits for a newer sequence number
+    and sends whatever frame is current then, so a slow viewer drops frames
+    instead of holding up the camera.
+    """
+
+    def __init__(self, camera_id, fps=PREVIEW_FPS):
+        self.camera_id = camera_id
+        self.interval = 1.0 / fps if fps > 0 else 0
+        self.viewers = 0
+        self.jpeg = None
+        self.sequence = 0
+        self.closed = False
+        self._next_due = 0.0
+        self._condition = threading.Condition()
+
+    def wants_frame(self, now=None):
+        """True when somebody is watching and the next preview frame is due (cheap, lock-free)"""
+        if not self.viewers or self.closed:
+            return False
+        return (now if now is not None else time.monotonic()) >= self._next_due
+
+    def publish(self, frame, annotate=None):
+        """
+        Downscale, annotate and encode one preview frame, then wake all viewers
+
+        Args:
+            frame: BGR frame (not modified)
+            annotate: Optional callback(preview, scale) drawing on the downscaled
+                copy; scale maps frame coordinates to preview coordinates
+        """
+        self._next_due = time.monotonic() + self.interval
+        height, width = frame.shape[:2]
+        scale = min(1.0, PREVIEW_WIDTH / width)
+        if scale < 1.0:
+            preview = cv2.resize(frame, (PREVIEW_WIDTH, int(height * scale)), interpolation=cv2.INTER_AREA)
+        else:
+            preview = frame.copy() if annotate else frame
+        if annotate:
+            annotate(preview, scale)
+
+        ok, encoded = cv2.imencode('.jpg', preview, [cv2.IMWRITE_JPEG_QUALITY, PREVIEW_JPEG_QUALITY])
+        if not ok:
+            return
+        with self._condition:
+            self.jpeg = encoded.tobytes()
+            self.sequence += 1
+            self._condition.notify_all()
+
+    def next_frame(self, after, timeout):
+        """
+        Wait for a frame newer than sequence `after`
+
+        Returns:
+            Tuple (sequence, jpeg bytes); jpeg is None on timeout or when closed
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.sequence != after or self.closed, timeout)
+            if self.closed or self.sequence == after:
+                return after, None
+            return self.sequence, self.jpeg
+
+    def attach(self):
+        with self._condition:
+            self.viewers += 1
+            self._next_due = 0.0  # first frame as soon as possible
+
+    def detach(self):
+        with self._condition:
+            self.viewers = max(0, self.viewers - 1)
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+def preview_channel(camera_id, fps=PREVIEW_FPS):
+    """The preview channel of a camera, created on first use"""
+    with _channels_lock:
+        channel = _channels.get(camera_id)
+        if channel is None or channel.closed:
+            channel = PreviewChannel(camera_id, fps)
+            _channels[camera_id] = channel
+        return channel
+
+
+def close_channel(camera_id):
+    """Drop a stopped camera's preview and end its viewers' streams"""
+    with _channels_lock:
+        channel = _channels.pop(camera_id, None)
+    if channel is not None:
+        channel.close()
+
+
+def scale_box(bbox, scale):
+    """(x1, y1, x2, y2) in frame coordinates to integer preview coordinates"""
+    return tuple(int(value * scale) for value in bbox)
+
+
+class _PreviewHandler(BaseHTTPRequestHandler):
+    timeout = CLIENT_TIMEOUT
+
+    def do_GET(self):
+        path = unquote(self.path.partition('?')[0]).rstrip('/')
+        if path in ('', '/preview'):
+            self._index()
+            return
+        if not path.startswith('/preview/'):
+            self.send_error(404)
+            return
+
+        camera_id = path[len('/preview/'):]
+        snapshot = camera_id.endswith('.jpg')
+        if snapshot:
+            camera_id = camera_id[:-len('.jpg')]
+        with _channels_lock:
+            channel = _channels.get(camera_id)
+        if channel is None:
+            self.send_error(404, f"No camera {camera_id}")
+            return
+
+        if snapshot:
+            self._snapshot(channel)
+        else:
+            self._stream(channel)
+
+    def _index(self):
+        with _channels_lock:
+            cameras = sorted(_channels)
+        if 'application/json' in self.headers.get('Accept', ''):
+            body = json.dumps({'cameras': cameras, 'fps': PREVIEW_FPS}).encode()
+            content_type = 'application/json'
+        else:
+            tiles = ''.join(
+                f'<figure><img src="/preview/{quote(camera_id)}" width="{PREVIEW_WIDTH // 2}">'
+                f'<figcaption>{html.escape(camera_id)}</figcaption></figure>'
+                for camera_id in cameras
+            )
+            body = (f'<!doctype html><title>Camera previews</title>'
+                    f'<body style="display:flex;flex-wrap:wrap">{tiles or "No cameras"}</body>').encode()
+            content_type = 'text/html; charset=utf-8'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _snapshot(self, channel):
+        """One preview frame, rendered for this request"""
+        after = channel.sequence
+        channel.attach()
+        try:
+            _, jpeg = channel.next_frame(after, timeout=2 * channel.interval + 2)
+        finally:
+            channel.detach()
+        if jpeg is None:
+            self.send_error(503, 'No preview frame (camera not delivering)')
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(jpeg)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(jpeg)
+
+    def _stream(self, channel):
+        """multipart/x-mixed-replace MJPEG stream until the viewer leaves or the camera stops"""
+        self.send_response(200)
+        self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+
+        sequence = channel.sequence  # a fresh frame, not the one left from the last viewer
+        channel.attach()
+        try:
+            while not channel.closed:
+                sequence, jpeg = channel.next_frame(sequence, timeout=CLIENT_TIMEOUT)
+                if jpeg is None:
+                    continue  # camera stalled; keep the viewer until it recovers or stops
+                self.wfile.write(f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n'
+                                 f'Content-Length: {len(jpeg)}\r\n\r\n'.encode() + jpeg + b'\r\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, TimeoutError, OSError):
+            pass  # viewer went away
+        finally:
+            channel.detach()
+
+    def log_message(self, format, *args):
+        pass  # one line per viewer frame would flood the console
+
+
+def start_preview_server(port=PREVIEW_PORT, host=PREVIEW_HOST):
+    """
+    Serve /preview from a daemon thread (once per process)
+
+    Returns:
+        The HTTP server, or None if disabled or the port is taken
+    """
+    global _server
+    if _server is not None or not port:
+        return _server
+
+    try:
+        _server = ThreadingHTTPServer((host, port), _PreviewHandler)
+    except OSError as e:
+        print(f"⚠️  Preview endpoint unavailable on port {port} ({e})")
+        return None
+
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name='preview', daemon=True).start()
+    print(f"📺 Camera previews at http://{host}:{port}/preview ({PREVIEW_FPS:g} fps while watched)")
+    if host not in ('127.0.0.1', 'localhost', '::1'):
+        print("⚠️  Previews are reachable from the network without authentication (PREVIEW_HOST)")
+    return _server
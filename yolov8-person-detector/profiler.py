@@ -0,0 +1,175 @@
+"""
+On-Demand Sampling Profiler
+Samples the stacks of every thread for a few seconds on request (SIGUSR1 or
+GET /profile on the metrics endpoint) and writes a flamegraph-compatible
+folded-stack file plus per-thread CPU use, without restarting the process
+"""
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+
+# Profiler Settings
+PROFILE_SECONDS = 30  # default profile length
+MAX_PROFILE_SECONDS = 300
+SAMPLE_INTERVAL = 0.01  # seconds between stack samples (100 Hz)
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+CAMERA_THREAD_PREFIX = 'camera:'  # thread names of camera processors: camera:<cameraId>
+
+_lock = threading.Lock()  # one profile at a time
+
+
+def _clock_ticks():
+    try:
+        return os.sysconf('SC_CLK_TCK')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+CLOCK_TICKS = _clock_ticks()
+
+
+def thread_cpu_seconds(native_id):
+    """CPU time (user + system) of a thread from /proc, or None where unavailable"""
+    if not CLOCK_TICKS:
+        return None
+    try:
+        with open(f'/proc/self/task/{native_id}/stat') as f:
+            # The command name may contain spaces; fields resume after its closing parenthesis
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime, stime
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _thread_label(thread):
+    if thread is None:
+        return 'unknown'
+    if thread.name.startswith(CAMERA_THREAD_PREFIX):
+        return f"camera {thread.name[len(CAMERA_THREAD_PREFIX):]}"
+    return thread.name
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})"
+
+
+def sample_stacks(seconds, interval=SAMPLE_INTERVAL):
+    """
+    Sample all thread stacks for a while
+
+    Returns:
+        Tuple (folded stack counts, per-thread summary list, measured seconds)
+    """
+    own = threading.get_ident()
+    stacks = Counter()
+    samples = Counter()
+    threads = {thread.ident: thread for thread in threading.enumerate()}
+    cpu_start = {ident: thread_cpu_seconds(t.native_id) for ident, t in threads.items()}
+
+    start = time.monotonic()
+    deadline = start + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if ident not in threads:
+                # Started during the profile (e.g. a new camera)
+                threads.update({thread.ident: thread for thread in threading.enumerate()})
+                cpu_start.setdefault(ident, thread_cpu_seconds(threads[ident].native_id)
+                                     if ident in threads else None)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            label = _thread_label(threads.get(ident))
+            # Root frame carries the thread, so camera threads group per camera ID
+            stacks[';'.join([label] + names[::-1])] += 1
+            samples[ident] += 1
+        time.sleep(interval)
+    elapsed = time.monotonic() - start
+
+    summary = []
+    for ident, count in samples.items():
+        thread = threads.get(ident)
+        end = thread_cpu_seconds(thread.native_id) if thread is not None else None
+        cpu = end - cpu_start[ident] if end is not None and cpu_start.get(ident) is not None else None
+        label = _thread_label(thread)
+        summary.append({
+            'thread': label,
+            'camera': label[len('camera '):] if label.startswith('camera ') else None,
+            'samples': count,
+            'cpu_seconds': round(cpu, 3) if cpu is not None else None,
+            'cpu_share': round(cpu / elapsed, 3) if cpu is not None and elapsed else None  # of one core
+        })
+    summary.sort(key=lambda entry: (entry['cpu_seconds'] or 0, entry['samples']), reverse=True)
+    return stacks, summary, elapsed
+
+
+def run_profile(seconds=PROFILE_SECONDS, directory=PROFILE_DIR):
+    """
+    Profile every thread of this process and write the results
+
+    Returns:
+        Dict with the written file paths and the per-thread summary, or None if
+        a profile is already running
+    """
+    seconds = max(0.1, min(float(seconds), MAX_PROFILE_SECONDS))
+    if not _lock.acquire(blocking=False):
+        return None
+
+    try:
+        print(f"🔬 Profiling all threads for {seconds:g}s...")
+        started = datetime.now()
+        stacks, summary, elapsed = sample_stacks(seconds)
+
+        os.makedirs(directory, exist_ok=True)
+        stem = Path(directory) / f"profile-{started.strftime('%Y%m%d-%H%M%S')}"
+        folded_path = f"{stem}.folded"
+        with open(folded_path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        report = {
+            'started': started.isoformat(),
+            'seconds': round(elapsed, 2),
+            'sample_interval': SAMPLE_INTERVAL,
+            'process_cpu_share': round(sum(t['cpu_seconds'] or 0 for t in summary) / elapsed, 3),
+            'threads': summary,
+            'folded': folded_path
+        }
+        threads_path = f"{stem}.json"
+        with open(threads_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        report['threads_file'] = threads_path
+
+        print(f"🔬 Profile written to {folded_path} (flamegraph.pl / speedscope) and {threads_path}")
+        for entry in summary[:10]:
+            share = f"{entry['cpu_share']:.0%}" if entry['cpu_share'] is not None else 'n/a'
+            print(f"   {entry['thread']:<32} CPU {share:>5}  ({entry['samples']} samples)")
+        return report
+    finally:
+        _lock.release()
+
+
+def install_profile_signal(seconds=PROFILE_SECONDS):
+    """Profile for `seconds` in the background whenever the process gets SIGUSR1 (POSIX only)"""
+    if not hasattr(signal, 'SIGUSR1'):
+        return False
+
+    def handler(signum, frame):
+        threading.Thread(target=run_profile, args=(seconds,), name='profiler', daemon=True).start()
+
+    try:
+        signal.signal(signal.SIGUSR1, handler)
+    except ValueError:
+        return False  # not the main thread
+    print(f"🔬 Send SIGUSR1 (kill -USR1 {os.getpid()}) for a {seconds}s profile")
+    return True
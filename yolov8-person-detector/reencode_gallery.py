@@ -0,0 +1,136 @@
+"""
+Gallery Re-encoding Tool
+Adds encodings from another embedder version to every person, computed from
+the stored enrollment photos, so a new embedder can be switched on without
+re-enrolling anyone. Existing encodings are left untouched.
+"""
+import argparse
+import base64
+import os
+
+import cv2
+import numpy as np
+import requests
+
+from embedders import ENCODER_VERSION, encoding_version, get_embedder
+from face_detectors import get_face_detector
+
+
+# Configuration
+API_URL = 'http://localhost:3000'
+DETECTION_UPSAMPLE = 1  # enrollment photos can hold small faces
+
+
+def load_image(api_url, url):
+    """RGB image from a data: URL or a path/URL served by the API, or None"""
+    if url.startswith('data:'):
+        data = base64.b64decode(url.split(',', 1)[1])
+    else:
+        if not url.startswith('http'):
+            url = f"{api_url}{url}"
+        response = requests.get(url, timeout=10)
+        if response.status_code != 200:
+            return None
+        data = response.content
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB) if image is not None else None
+
+
+def image_sources(person):
+    """Enrollment images of a person: encoding source images and photos, without duplicates"""
+    urls = [enc.get('imageUrl') for enc in person.get('faceEncodings', [])]
+    urls += [photo.get('url') for photo in person.get('photos', [])]
+    return list(dict.fromkeys(url for url in urls if url))
+
+
+def reencode_person(person, embedder, detector, api_url, headers, dry_run=False):
+    """
+    Add missing encodings of the embedder's version for one person
+
+    Returns:
+        Tuple (added, skipped, failed) image counts
+    """
+    done = {enc.get('imageUrl') for enc in person.get('faceEncodings', [])
+            if encoding_version(enc) == embedder.version}
+    added = skipped = failed = 0
+
+    for url in image_sources(person):
+        if url in done:
+            skipped += 1
+            continue
+
+        try:
+            rgb_image = load_image(api_url, url)
+            if rgb_image is None:
+                failed += 1
+                continue
+
+            locations = detector.detect(rgb_image, DETECTION_UPSAMPLE)
+            if not locations:
+                failed += 1
+                continue
+
+            # Enrollment photos show one person; use the largest face
+            location = max(locations, key=lambda loc: (loc[2] - loc[0]) * (loc[1] - loc[3]))
+            encoding = embedder.embed(rgb_image, [location])[0]
+
+            if not dry_run:
+                response = requests.post(
+                    f"{api_url}/api/persons/{person['_id']}/encodings",
+                    json={'encoding': encoding.tolist(), 'imageUrl': url, 'encoderVersion': embedder.version},
+                    headers=headers,
+                    timeout=10
+                )
+                if response.status_code != 200:
+                    print(f"  ✗ {person.get('name')}: API returned {response.status_code}")
+                    failed += 1
+                    continue
+            added += 1
+
+        except Exception as e:
+            print(f"  ✗ {person.get('name')}: {e}")
+            failed += 1
+
+    return added, skipped, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Add encodings of another embedder version to the gallery')
+    parser.add_argument('--version', default=ENCODER_VERSION, help='Target embedder version')
+    parser.add_argument('--api-url', default=API_URL)
+    parser.add_argument('--token', default=os.environ.get('API_TOKEN'),
+                        help='JWT of an admin or operator (default: $API_TOKEN)')
+    parser.add_argument('--status', default='missing', help="Person status to migrate ('all' for every person)")
+    parser.add_argument('--dry-run', action='store_true', help='Encode but do not upload')
+    args = parser.parse_args()
+
+    if not args.token and not args.dry_run:
+        parser.error('an API token is required to upload encodings (--token or $API_TOKEN)')
+
+    embedder = get_embedder(args.version)
+    if embedder.version != args.version:
+        print(f"❌ Embedder '{args.version}' is not available, nothing to do")
+        return
+
+    query = '' if args.status == 'all' else f'&status={args.status}'
+    response = requests.get(f"{args.api_url}/api/persons?limit=1000{query}", timeout=30)
+    response.raise_for_status()
+    persons = response.json().get('persons', [])
+
+    print(f"Re-encoding {len(persons)} persons with {embedder.version}{' (dry run)' if args.dry_run else ''}")
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    detector = get_face_detector()
+
+    totals = [0, 0, 0]
+    for person in persons:
+        counts = reencode_person(person, embedder, detector, args.api_url, headers, args.dry_run)
+        totals = [total + count for total, count in zip(totals, counts)]
+        if counts[0]:
+            print(f"  ✓ {person.get('name')}: {counts[0]} encodings added")
+
+    print(f"\nDone: {totals[0]} added, {totals[1]} already present, {totals[2]} failed")
+
+
+if __name__ == "__main__":
+    main()
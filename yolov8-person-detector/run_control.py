@@ -0,0 +1,107 @@
+"""
+Run Control
+Headless operation for server deployments: decides whether a surveillance loop
+opens windows at all, and turns signals (SIGTERM, SIGHUP) and the local /control
+endpoint into the stop and reload requests the keyboard gives in a window
+"""
+import os
+import signal
+import sys
+import threading
+
+
+# Run Control Settings
+HEADLESS_ENV = 'SURVEILLANCE_HEADLESS'  # 1 = no windows, 0 = always show them; unset = decide from the display
+HEADLESS_FLAG = '--headless'
+DISPLAY_FLAG = '--display'
+
+
+def headless_requested(argv=None):
+    """
+    Whether to run without drawing or GUI calls
+
+    --headless / --display on the command line win, then SURVEILLANCE_HEADLESS;
+    otherwise headless on Linux without an X11 or Wayland display.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if HEADLESS_FLAG in argv:
+        return True
+    if DISPLAY_FLAG in argv:
+        return False
+
+    value = os.environ.get(HEADLESS_ENV, '').strip().lower()
+    if value:
+        return value not in ('0', 'false', 'no')
+    return sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+class RunControl:
+    """Stop and reload requests for a processing loop, safe to set from any thread or signal handler"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._reload = threading.Event()
+        self.actions = set()  # actions a running loop polls for ('stop', 'reload')
+
+    @property
+    def stopping(self):
+        return self._stop.is_set()
+
+    def request_stop(self, reason='stop requested'):
+        if not self._stop.is_set():
+            print(f"\n🛑 Stopping ({reason})...")
+        self._stop.set()
+
+    def request_reload(self):
+        self._reload.set()
+
+    def take_reload(self):
+        """True once per reload request"""
+        if self._reload.is_set():
+            self._reload.clear()
+            return True
+        return False
+
+    def wait(self, seconds):
+        """Sleep that ends early on stop; returns True if stopping"""
+        return self._stop.wait(seconds)
+
+    def status(self):
+        return {'stopping': self.stopping, 'reload_pending': self._reload.is_set(),
+                'actions': sorted(self.actions), 'pid': os.getpid()}
+
+
+_control = RunControl()
+
+
+def get_run_control():
+    """The process-wide RunControl (shared by the loop, signal handlers and /control)"""
+    return _control
+
+
+def install_control_signals(control=None, reload=True):
+    """
+    Attach the calling loop: SIGTERM and /control/stop stop it cleanly and, if
+    the loop has something to reload (reload=True), SIGHUP and /control/reload
+    reload it (POSIX signals). Returns the RunControl the loop must poll.
+    """
+    control = control or _control
+    control.actions.add('stop')
+    if reload:
+        control.actions.add('reload')
+
+    handlers = {'SIGTERM': lambda signum, frame: control.request_stop('SIGTERM')}
+    if reload:
+        handlers['SIGHUP'] = lambda signum, frame: control.request_reload()
+    installed = []
+    for name, handler in handlers.items():
+        if not hasattr(signal, name):
+            continue  # Windows has no SIGHUP
+        try:
+            signal.signal(getattr(signal, name), handler)
+        except ValueError:
+            return control  # not the main thread
+        installed.append(name)
+    if 'SIGHUP' in installed:
+        print(f"🎛️  kill -TERM {os.getpid()} stops, kill -HUP {os.getpid()} reloads persons")
+    return control
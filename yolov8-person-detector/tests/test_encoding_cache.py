@@ -0,0 +1,65 @@
+"""Encoding cache hits for real faces whose detector box moved a few pixels"""
+from pathlib import Path
+
+import cv2
+import pytest
+
+from encoding_cache import EncodingCache, face_hash, face_hashes
+
+PERSONS = Path(__file__).resolve().parent.parent / 'database' / 'persons'
+
+# Hand-labelled face boxes (top, right, bottom, left) in the enrolment photos
+FACES = {
+    'jay_singh': (185, 457, 335, 307),
+    'prakhar_bisen': (168, 390, 333, 225),
+    'priyanshu_singh': (200, 392, 354, 238),
+    'riya_bisen': (170, 398, 280, 288),
+}
+SHIFTS = [(3, 0), (-4, 2), (5, 5), (-5, -3), (0, -5)]
+
+
+def _face(name, size=None):
+    """RGB photo and face box, rescaled so the face is `size` px wide"""
+    rgb = cv2.cvtColor(cv2.imread(str(PERSONS / f'{name}.jpg')), cv2.COLOR_BGR2RGB)
+    top, right, bottom, left = FACES[name]
+    if size is None:
+        return rgb, (top, right, bottom, left)
+    scale = size / (right - left)
+    rgb = cv2.resize(rgb, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return rgb, tuple(int(value * scale) for value in (top, right, bottom, left))
+
+
+def _shifted(location, dx, dy):
+    top, right, bottom, left = location
+    return top + dy, right + dx, bottom + dy, left + dx
+
+
+@pytest.mark.parametrize('size', [60, 100, 150])
+@pytest.mark.parametrize('name', sorted(FACES))
+def test_shifted_face_box_hits(name, size):
+    rgb, location = _face(name, size)
+    cache = EncodingCache()
+    cache.put('cam', face_hashes(rgb, location), 'encoding', 'match', 1, now=0.0)
+
+    for dx, dy in SHIFTS:
+        assert cache.get('cam', face_hashes(rgb, _shifted(location, dx, dy)), 1, now=1.0) == ('encoding', 'match')
+
+
+@pytest.mark.parametrize('name', sorted(FACES))
+def test_other_persons_miss(name):
+    cache = EncodingCache()
+    cache.put('cam', face_hash(*_face(name)), 'encoding', 'match', 1, now=0.0)
+
+    for other in sorted(set(FACES) - {name}):
+        rgb, location = _face(other)
+        for dx, dy in [(0, 0)] + SHIFTS:
+            assert cache.get('cam', face_hashes(rgb, _shifted(location, dx, dy)), 1, now=1.0) is None
+
+
+def test_entries_expire_by_caller_time():
+    rgb, location = _face('riya_bisen')
+    cache = EncodingCache(ttl=5.0)
+    cache.put('cam', face_hash(rgb, location), 'encoding', 'match', 1, now=100.0)
+
+    assert cache.get('cam', face_hashes(rgb, location), 1, now=104.0) is not None
+    assert cache.get('cam', face_hashes(rgb, location), 1, now=106.0) is None
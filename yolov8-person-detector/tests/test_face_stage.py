@@ -0,0 +1,48 @@
+"""Head-region search scale with the FrameContext pyramid"""
+import numpy as np
+import pytest
+
+pytest.importorskip('face_recognition')  # face_stage loads the detector backends
+
+from face_stage import DETECTOR_MIN_FACE, _search_region  # noqa: E402
+from frame_context import FrameContext  # noqa: E402
+
+
+class RecordingDetector:
+    """Records what the detector is asked to search; returns the whole region as a face"""
+
+    def __init__(self):
+        self.calls = []
+
+    def detect(self, rgb_image, upsample=0):
+        self.calls.append((rgb_image.shape, upsample))
+        height, width = rgb_image.shape[:2]
+        return [(0, width, height, 0)]
+
+
+def _context():
+    context = FrameContext()
+    context.update(np.random.default_rng(0).integers(0, 255, (1080, 1920, 3), dtype=np.uint8))
+    return context
+
+
+@pytest.mark.parametrize('face_size', [140, 150, 160, 190])
+def test_faces_near_150px_stay_detectable(face_size):
+    """A 150 px face plans scale 0.667; the ½ pyramid level alone would shrink it to 75 px"""
+    region = (400, 100, 700, 400)
+    detector = RecordingDetector()
+
+    _search_region(_context(), region, None, detector, face_size)
+
+    (height, width, _), upsample = detector.calls[0]
+    searched_scale = width / (region[2] - region[0])
+    assert face_size * searched_scale * 2 ** upsample >= DETECTOR_MIN_FACE
+
+
+def test_found_faces_map_back_to_the_region():
+    region = (400, 100, 700, 400)
+    _, _, image_locations = _search_region(_context(), region, None, RecordingDetector(), 150)
+
+    top, right, bottom, left = image_locations[0]
+    assert abs(left - region[0]) <= 2 and abs(top - region[1]) <= 2
+    assert abs(right - region[2]) <= 2 and abs(bottom - region[3]) <= 2